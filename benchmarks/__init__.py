@@ -0,0 +1 @@
+"""End-to-end benchmarks for the docs agent. Run with `python -m benchmarks`."""
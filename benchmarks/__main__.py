@@ -0,0 +1,161 @@
+"""
+Docs agent benchmarks.
+
+Runs end-to-end scenarios against a synthetic documentation corpus and a local fake Ollama server,
+writes the results as JSON, and compares them with a stored baseline. Run with `python -m benchmarks`.
+
+Usage:
+  benchmarks [--size=<size>] [--scenario=<name>]... [--queries=<n>] [--repeat=<n>] [--latency=<s>] [--tokens-per-second=<n>] [--output=<file>] [--baseline=<file>] [--save-baseline] [--tolerance=<fraction>]
+  benchmarks --list
+  benchmarks -h | --help
+
+Options:
+  -h, --help                 Show this screen.
+  --list                     List the scenarios.
+  --size=<size>              Corpus size: small, medium or large. Defaults to small.
+  --scenario=<name>          Run only this scenario; may be repeated. Scenarios that search the corpus need `ingest`, which always runs first.
+  --queries=<n>              Number of questions per search or ask scenario. Defaults to 20.
+  --repeat=<n>               Number of runs per cold start measurement. Defaults to 5.
+  --latency=<s>              Fake Ollama latency per request, in seconds. Defaults to 0.005.
+  --tokens-per-second=<n>    Fake Ollama generation rate. Defaults to 2000.
+  --output=<file>            Write the results to <file> as JSON, as well as printing them.
+  --baseline=<file>          Baseline results to compare with. Defaults to benchmarks/baseline-<size>.json, if it exists.
+  --save-baseline            Save the results as the baseline instead of comparing with it.
+  --tolerance=<fraction>     Slowdown allowed before a metric counts as a regression. Defaults to 0.25.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import traceback
+
+from docopt import docopt
+
+from benchmarks.corpus import SIZES
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.workspace import Workspace
+
+default_tolerance = 0.25
+
+
+def scenario_errors():
+    """Errors a scenario can fail with, which are recorded in its results rather than ending the run."""
+    import chromadb.errors
+    import httpx
+    import ollama
+
+    return (
+        OSError, RuntimeError, ValueError, LookupError, subprocess.SubprocessError,
+        ollama.ResponseError, ollama.RequestError, httpx.HTTPError, chromadb.errors.ChromaError,
+    )
+
+
+def lower_is_better(metric):
+    return metric.endswith("_s") and not metric.endswith("_per_s") or metric.endswith("_ms")
+
+def higher_is_better(metric):
+    return metric.endswith("_per_s")
+
+
+def run(size, names, queries, repeat, server_options):
+    """Run the named scenarios in one workspace. Returns the results, with each failed scenario's error."""
+    names = ["ingest"] + [name for name in SCENARIOS if name in names and name != "ingest"]
+    results = {
+        "meta": {
+            "size": size,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "server": server_options,
+        },
+        "scenarios": {},
+    }
+    with Workspace(size, queries=queries, repeat=repeat, server_options=server_options) as workspace:
+        results["meta"]["corpus_bytes"] = workspace.corpus_bytes
+        errors = scenario_errors()  # Imported once the workspace has set up the environment
+        for name in names:
+            print(f"Running {name}...", file=sys.stderr)
+            try:
+                results["scenarios"][name] = SCENARIOS[name](workspace)
+            except errors as e:
+                traceback.print_exc()
+                results["scenarios"][name] = {"error": f"{type(e).__name__}: {e}"}
+        results["meta"]["requests"] = dict(workspace.server.requests)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compare results with a baseline. Returns report lines and the regressions:
+    durations more than `tolerance` slower, or rates more than `tolerance` lower, than the baseline.
+    """
+    lines, regressions = [], []
+    for name, metrics in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name, {})
+        for metric, value in metrics.items():
+            previous = base.get(metric)
+            if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)) or not previous:
+                continue
+            change = value / previous - 1
+            regressed = (lower_is_better(metric) and change > tolerance) or (higher_is_better(metric) and change < -tolerance)
+            line = f"{name}.{metric}: {previous:.4g} -> {value:.4g} ({change:+.1%})"
+            lines.append(line + ("  REGRESSION" if regressed else ""))
+            if regressed:
+                regressions.append(line)
+    return lines, regressions
+
+
+def main():
+    arguments = docopt(__doc__)
+    if arguments["--list"]:
+        for name, scenario in SCENARIOS.items():
+            print(f"{name:16} {scenario.__doc__.splitlines()[0]}")
+        return 0
+    size = arguments["--size"] or "small"
+    if size not in SIZES:
+        sys.exit(f"Unknown corpus size '{size}'. Choose from: {', '.join(SIZES)}.")
+    names = arguments["--scenario"] or list(SCENARIOS)
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Unknown scenario(s): {', '.join(sorted(unknown))}. Run with --list to see them.")
+    server_options = {
+        "latency": float(arguments["--latency"] or 0.005),
+        "tokens_per_second": float(arguments["--tokens-per-second"] or 2000),
+    }
+    # Paths are resolved now; scenarios run from inside a temporary project
+    baseline_path = os.path.abspath(arguments["--baseline"] or os.path.join(os.path.dirname(__file__), f"baseline-{size}.json"))
+    output = os.path.abspath(arguments["--output"]) if arguments["--output"] else None
+
+    results = run(size, names, int(arguments["--queries"] or 20), int(arguments["--repeat"] or 5), server_options)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
+    failed = [name for name, metrics in results["scenarios"].items() if "error" in metrics]
+
+    if arguments["--save-baseline"]:
+        with open(baseline_path, "w") as f:
+            f.write(text + "\n")
+        print(f"Saved baseline to {baseline_path}.", file=sys.stderr)
+    elif os.path.exists(baseline_path):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        tolerance = float(arguments["--tolerance"] or default_tolerance)
+        lines, regressions = compare(results, baseline, tolerance)
+        print(f"Compared with {baseline_path} (tolerance {tolerance:.0%}):", file=sys.stderr)
+        for line in lines:
+            print(f"  {line}", file=sys.stderr)
+        if regressions:
+            print(f"{len(regressions)} regression(s).", file=sys.stderr)
+            return 1
+    if failed:
+        print(f"Failed scenario(s): {', '.join(failed)}.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Synthetic documentation corpora for benchmarks, generated deterministically from a seed."""
+import os
+import random
+
+# Number of elements and approximate documentation size of each, per corpus size
+SIZES = {
+    "small": (5, 20_000),
+    "medium": (20, 100_000),
+    "large": (50, 400_000),
+}
+
+WORDS = [
+    "configure", "install", "deploy", "request", "response", "client", "server", "option", "default", "value",
+    "returns", "raises", "parameter", "argument", "module", "function", "class", "method", "instance",
+    "attribute", "version", "release", "cache", "index", "query", "result", "error", "timeout", "retry",
+    "stream", "buffer", "token", "model", "embedding", "document", "chunk", "store",
+]
+
+
+def identifier(rng):
+    """A plausible API identifier: a dotted path, snake_case name, flag or error code."""
+    kind = rng.randrange(4)
+    if kind == 0:
+        return ".".join(rng.sample(WORDS, 3))
+    if kind == 1:
+        return "_".join(rng.sample(WORDS, 2)) + "()"
+    if kind == 2:
+        return "--" + "-".join(rng.sample(WORDS, 2))
+    return f"E{rng.randrange(100, 999)}"
+
+
+def document(name, version, size, seed=0):
+    """Generate one element's documentation as HTML of roughly `size` characters."""
+    rng = random.Random(f"{seed}:{name}:{version}")
+    parts = [f"<html><head><title>{name} {version}</title><style>body {{}}</style></head><body>"]
+    length = 0
+    section = 0
+    while length < size:
+        section += 1
+        heading = f"<h2>{name} {rng.choice(WORDS)} {section}</h2>"
+        sentences = []
+        for _ in range(rng.randrange(4, 10)):
+            words = rng.choices(WORDS, k=rng.randrange(8, 20))
+            words.insert(rng.randrange(len(words)), f"<code>{identifier(rng)}</code>")
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = f"{heading}<p>{' '.join(sentences)}</p>"
+        parts.append(paragraph)
+        length += len(paragraph)
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def elements(size):
+    """The (name, version) pairs in a corpus."""
+    count, _ = SIZES[size]
+    return [(f"lib{i:03d}", f"{1 + i % 3}.{i % 7}.0") for i in range(count)]
+
+
+def write_corpus(directory, size, seed=0):
+    """
+    Write a corpus to `directory`, one HTML file per element version.
+    Returns the `DOC_SOURCES` mapping pointing at the files, and the total size in bytes.
+    """
+    os.makedirs(directory, exist_ok=True)
+    _, doc_size = SIZES[size]
+    total = 0
+    for name, version in elements(size):
+        text = document(name, version, doc_size, seed)
+        with open(os.path.join(directory, f"{name}-{version}.html"), "w", encoding="utf-8") as f:
+            f.write(text)
+        total += len(text.encode("utf-8"))
+    sources = {name: os.path.join(directory, "{name}-{version}.html") for name, _ in elements(size)}
+    return sources, total
+
+
+def questions(size, count=20, seed=0):
+    """Questions about a corpus: a mix of natural language questions and bare identifier lookups."""
+    rng = random.Random(f"{seed}:questions")
+    names = [name for name, _ in elements(size)]
+    asked = []
+    for i in range(count):
+        if i % 2:
+            asked.append(identifier(rng))
+        else:
+            asked.append(f"How do I {rng.choice(WORDS)} the {rng.choice(WORDS)} in {rng.choice(names)}?")
+    return asked
@@ -0,0 +1,174 @@
+"""
+Deterministic stand-in for the Ollama HTTP API, for benchmarks.
+
+Serves `/api/chat` (streamed or not), `/api/embed`, `/api/tags` and `/api/pull` with configurable
+latency and token rates, so benchmark results depend on the docs agent rather than on a model.
+"""
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY_WORDS = ["the", "docs", "agent", "answers", "from", "the", "documentation", "it", "has", "indexed", "for", "this", "project"]
+
+
+def embed_text(text, dimensions):
+    """Embed text deterministically by hashing its words onto a fixed number of dimensions."""
+    vector = [0.0] * dimensions
+    for word in text.lower().split():
+        vector[int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:4], "little") % dimensions] += 1.0
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Headers and body are written separately; don't delay small responses
+
+    def log_message(self, format, *args):
+        pass
+
+    def __body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def __send_json(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def __send_stream(self, parts):
+        """Send newline-delimited JSON objects with chunked transfer encoding, as Ollama streams."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for part in parts:
+                line = (json.dumps(part) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client stopped reading, as on a cancelled generation
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self.__send_json({"models": [
+                {"model": name, "name": name, "digest": hashlib.sha256(name.encode()).hexdigest(), "size": 1 << 30}
+                for name in self.server.models
+            ]})
+        elif self.path == "/api/version":
+            self.__send_json({"version": "0.0.0-fake"})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        body = self.__body()
+        self.server.count(self.path)
+        time.sleep(self.server.latency)
+        if self.path == "/api/chat":
+            self.__chat(body)
+        elif self.path == "/api/embed":
+            inputs = body.get("input")
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            time.sleep(self.server.embed_seconds_per_input * len(inputs))
+            self.__send_json({"model": body.get("model"), "embeddings": [embed_text(text, self.server.dimensions) for text in inputs]})
+        elif self.path == "/api/pull":
+            self.__pull(body)
+        else:
+            self.send_error(404)
+
+    def __chat(self, body):
+        model = body.get("model")
+        words = [REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(self.server.reply_tokens)]
+        prompt_tokens = sum(len(message.get("content", "").split()) for message in body.get("messages", []))
+        final = {"model": model, "created_at": "1970-01-01T00:00:00Z", "done": True, "done_reason": "stop",
+                 "prompt_eval_count": prompt_tokens, "eval_count": len(words)}
+        if not body.get("stream", True):
+            time.sleep(len(words) / self.server.tokens_per_second)
+            self.__send_json({**final, "message": {"role": "assistant", "content": " ".join(words)}})
+            return
+
+        def parts():
+            for i, word in enumerate(words):
+                time.sleep(1 / self.server.tokens_per_second)
+                content = word if i == 0 else " " + word
+                yield {"model": model, "created_at": "1970-01-01T00:00:00Z", "done": False,
+                       "message": {"role": "assistant", "content": content}}
+            yield {**final, "message": {"role": "assistant", "content": ""}}
+        self.__send_stream(parts())
+
+    def __pull(self, body):
+        model = body.get("model")
+        total = 64 * 1024 * 1024
+
+        def parts():
+            yield {"status": "pulling manifest"}
+            for step in range(1, 11):
+                time.sleep(self.server.latency)
+                yield {"status": f"pulling {model}", "digest": "sha256:fake", "total": total, "completed": total * step // 10}
+            self.server.models.add(model if ":" in model else f"{model}:latest")
+            yield {"status": "success"}
+        self.__send_stream(parts())
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Fake Ollama server on a local port. Every POST waits `latency` seconds; chat replies are
+    `reply_tokens` words long, produced at `tokens_per_second`; embeddings cost
+    `embed_seconds_per_input` per text. Request counts by path are kept in `requests`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.005, tokens_per_second=2000, reply_tokens=200, dimensions=64,
+                 embed_seconds_per_input=0.0002, models=("llama2:latest", "nomic-embed-text:latest")):
+        super().__init__(("127.0.0.1", port), FakeOllamaHandler)
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.dimensions = dimensions
+        self.embed_seconds_per_input = embed_seconds_per_input
+        self.models = set(models)
+        self.requests = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+if __name__ == "__main__":
+    # Run standalone, e.g. to point a real `docs` command at it with OLLAMA_URL
+    with FakeOllamaServer(port=11435) as server:
+        print(f"Fake Ollama listening on {server.url}. Press Ctrl+C to stop.")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
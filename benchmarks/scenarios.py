@@ -0,0 +1,164 @@
+"""
+Benchmark scenarios. Each takes a `Workspace` and returns a dict of metrics: names ending in `_s`
+or `_ms` are durations (lower is better), names ending in `_per_s` are rates (higher is better),
+anything else is informational. docs_agent is imported inside each scenario, after the workspace
+has pointed its configuration, caches and Ollama URL at benchmark-only locations.
+"""
+import io
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.corpus import elements, questions
+
+
+def _percentiles(samples_ms, prefix):
+    samples_ms = sorted(samples_ms)
+    return {
+        f"{prefix}_p50_ms": statistics.median(samples_ms),
+        f"{prefix}_p95_ms": samples_ms[min(len(samples_ms) - 1, round(0.95 * (len(samples_ms) - 1)))],
+    }
+
+
+def ingest(workspace):
+    """Add every element of the corpus to an empty project with `add_element.main`."""
+    from docs_agent import add_element
+    pairs = elements(workspace.size)
+    embeds = workspace.server.requests.get("/api/embed", 0)
+    start = time.perf_counter()
+    add_element.main([name for name, _ in pairs], [version for _, version in pairs], noninteractive=True, silent=True)
+    elapsed = time.perf_counter() - start
+    chunks = workspace.db.count_chunks()
+    if not chunks:
+        raise RuntimeError("No documentation was indexed.")
+    return {
+        "elapsed_s": elapsed,
+        "bytes_per_s": workspace.corpus_bytes / elapsed,
+        "chunks_per_s": chunks / elapsed,
+        "chunks": chunks,
+        "embed_requests": workspace.server.requests.get("/api/embed", 0) - embeds,
+    }
+
+
+def update(workspace):
+    """Re-fetch and re-index every element with `update.main(force=True)`; embeddings come from the cache."""
+    from docs_agent import update as update_module
+    embeds = workspace.server.requests.get("/api/embed", 0)
+    start = time.perf_counter()
+    update_module.main(force=True, silent=True)
+    elapsed = time.perf_counter() - start
+    return {
+        "elapsed_s": elapsed,
+        "bytes_per_s": workspace.corpus_bytes / elapsed,
+        "embed_requests": workspace.server.requests.get("/api/embed", 0) - embeds,
+    }
+
+
+def search_elements(workspace):
+    """Search the element collection with `DB.search_elements`."""
+    samples = []
+    for question in questions(workspace.size, workspace.queries):
+        start = time.perf_counter()
+        workspace.db.search_elements(question, count=3)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples, "search")
+
+
+def retrieve(workspace):
+    """Retrieve documentation chunks for questions with the hybrid `Retriever`."""
+    from docs_agent.helpers.retrieval import Retriever
+    retriever = Retriever(db=workspace.db)
+    samples = []
+    for question in questions(workspace.size, workspace.queries, seed=1):
+        start = time.perf_counter()
+        retriever.retrieve(question)
+        samples.append((time.perf_counter() - start) * 1000)
+    return _percentiles(samples, "retrieve")
+
+
+def ask(workspace):
+    """Answer fresh questions with `agent.ask`, then the same questions again from the answer cache."""
+    from docs_agent import agent
+    asked = [f"{question} (ask)" for question in questions(workspace.size, workspace.queries, seed=2)]
+    metrics = {}
+    for label, prompts in (("ask", asked), ("ask_cached", asked)):
+        samples = []
+        for prompt in prompts:
+            start = time.perf_counter()
+            agent.ask(prompt, out_stream=io.StringIO())
+            samples.append((time.perf_counter() - start) * 1000)
+        metrics.update(_percentiles(samples, label))
+    return metrics
+
+
+def stream(workspace):
+    """Stream answers with `agent.ask(stream=True)`, measuring time to first token and token rate."""
+    from docs_agent import agent
+
+    class FirstWrite(io.StringIO):
+        first = None
+
+        def write(self, text):
+            if self.first is None and text:
+                self.first = time.perf_counter()
+            return super().write(text)
+
+    ttft, rates = [], []
+    for question in questions(workspace.size, workspace.queries, seed=3):
+        out = FirstWrite()
+        start = time.perf_counter()
+        agent.ask(f"{question} (stream)", stream=True, out_stream=out)
+        elapsed = time.perf_counter() - start
+        ttft.append(((out.first or time.perf_counter()) - start) * 1000)
+        rates.append(workspace.server.reply_tokens / elapsed)
+    return {**_percentiles(ttft, "ttft"), "tokens_per_s": statistics.median(rates)}
+
+
+def stream_long(workspace):
+    """Stream 200-token and 10,000-token answers, measuring the cost per token of each, which should match."""
+    from docs_agent import agent
+    short_tokens = workspace.server.reply_tokens
+    prompts = questions(workspace.size, min(workspace.queries, 3), seed=4)
+    metrics = {}
+    try:
+        for label, tokens in (("short", short_tokens), ("long", 10_000)):
+            workspace.server.reply_tokens = tokens
+            samples = []
+            for question in prompts:
+                start = time.perf_counter()
+                agent.ask(f"{question} (stream {label})", stream=True, out_stream=io.StringIO())
+                samples.append((time.perf_counter() - start) * 1000 / tokens)
+            metrics[f"{label}_per_token_ms"] = statistics.median(samples)
+    finally:
+        workspace.server.reply_tokens = short_tokens
+    metrics["long_to_short_ratio"] = metrics["long_per_token_ms"] / metrics["short_per_token_ms"]
+    return metrics
+
+
+def cold_start(workspace):
+    """Start the CLI in a fresh interpreter for commands that shouldn't touch storage or models."""
+    metrics = {}
+    for label, args in (("version", ["--version"]), ("config", ["config", "CHAT_MODEL"])):
+        code = f"import sys; sys.argv = ['docs', *{args!r}]; from docs_agent.__main__ import main; main()"
+        samples = []
+        for _ in range(workspace.repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), capture_output=True, check=False)
+            samples.append((time.perf_counter() - start) * 1000)
+        metrics[f"{label}_ms"] = statistics.median(samples)
+    return metrics
+
+
+# In the order they run: later scenarios search what `ingest` indexed
+SCENARIOS = {
+    "ingest": ingest,
+    "update": update,
+    "search_elements": search_elements,
+    "retrieve": retrieve,
+    "ask": ask,
+    "stream": stream,
+    "stream_long": stream_long,
+    "cold_start": cold_start,
+}
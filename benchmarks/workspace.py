@@ -0,0 +1,54 @@
+import json
+import os
+import shutil
+import tempfile
+
+from benchmarks.corpus import write_corpus
+from benchmarks.fake_ollama import FakeOllamaServer
+
+
+class Workspace:
+    """
+    A throwaway project for benchmarks: a synthetic corpus of the given `size`, a fake Ollama server,
+    and configuration, caches and storage confined to a temporary directory.
+    The process works from inside the project until the workspace is closed.
+    Must be entered before docs_agent is first imported, since some locations are resolved at import.
+    """
+
+    def __init__(self, size="small", queries=20, repeat=5, server_options=None):
+        self.size = size
+        self.queries = queries
+        self.repeat = repeat
+        self.server = FakeOllamaServer(**(server_options or {}))
+        self.directory = None
+        self.corpus_bytes = 0
+        self._cwd = None
+        self._environ = None
+
+    @property
+    def db(self):
+        from docs_agent.helpers.chromadb import default_db
+        return default_db()
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix="docs-agent-bench-")
+        sources, self.corpus_bytes = write_corpus(os.path.join(self.directory, "corpus"), self.size)
+        self.server.start()
+        self._environ = dict(os.environ)
+        for variable in ("XDG_CACHE_HOME", "XDG_DATA_HOME", "XDG_CONFIG_HOME"):
+            os.environ[variable] = os.path.join(self.directory, variable.lower())
+        os.environ["OLLAMA_URL"] = self.server.url
+        os.environ["DOC_SOURCES"] = json.dumps(sources)
+        os.environ["LOG_LEVEL"] = "WARNING"  # Keep per-request logging out of the measurements
+        self._cwd = os.getcwd()
+        project = os.path.join(self.directory, "project")
+        os.makedirs(os.path.join(project, ".docs"))
+        os.chdir(project)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        os.chdir(self._cwd)
+        os.environ.clear()
+        os.environ.update(self._environ)
+        self.server.stop()
+        shutil.rmtree(self.directory, ignore_errors=True)
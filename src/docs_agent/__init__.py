@@ -1,4 +1,4 @@
 """Public API for the docs_agent package."""
 
 __version__ = "0.0.1"
-__log_level__ = "DEBUG"
+__log_level__ = "INFO"
@@ -1,36 +1,147 @@
-import requests
+from docs_agent.config import get_settings
 from docs_agent.helpers.log import logger
 from docs_agent.helpers.elements import Element
+from docs_agent.helpers.manifest import Manifest
+from docs_agent.helpers.chromadb import default_db, storage_errors
+from docs_agent.helpers.fetch import Fetcher, fetch_errors
+from docs_agent.helpers.http_cache import ResponseCache
+from docs_agent.helpers.chunking import iter_pieces
+from docs_agent.helpers.dependencies import normalize_name
+from docs_agent.helpers.embeddings import embedding_errors
+from docs_agent.helpers.pipeline import IndexPipeline
+from docs_agent.helpers.profile import span
 
+placeholder_text = "Text retrieval not yet implemented"
 
-def main(tools=[], versions=[], noninteractive=False, silent=False):
+
+def main(tools=[], versions=[], noninteractive=False, silent=False, db=None, jobs=None):
     """Main add_element function. Invoked by the CLI handler."""
+    db = db or default_db()
 
-    # For each tool and version, add the element to the local docs.
+    # Pair each tool with its version.
+    pairs = []
+    detected = None
     for i, tool in enumerate(tools):
         version = versions[i] if i < len(versions) else None
         if not version:
-            # TODO: intelligently determine version
-            logger.warning(f"No version specified for tool '{tool}'. Skipping.")
-            logger.debug("Intelligent version detection not yet implemented.")
-            continue
+            detected = detected if detected is not None else detected_versions()
+            version = detected.get(tool) or detected.get(normalize_name(tool))
+            if not version:
+                logger.warning("No version specified or detected for tool '%s'. Skipping.", tool)
+                continue
+            logger.info("Using version %s of '%s' found in the project.", version, tool) if not silent else None
+        pairs.append((tool, version))
+
+    # Reuse documentation already in the shared store, fetch the rest concurrently, then prepare the elements.
+    known = shared_documentation(pairs, db)
+    texts, _ = fetch_documentation([pair for pair in pairs if pair not in known], jobs=jobs)
+    texts.update(known)
+    elements = []
+    manifest = Manifest()
+    for tool, version in pairs:
         try:
-            # _doc_text = obtain_text(version)
-            doc_text = "Text retrieval not yet implemented"
-            logger.debug(f"Obtained documentation for '{tool}-{version}'.")
-            logger.info(f"Successfully added documentation for '{tool}-{version}'.") if not silent else None
-            element = Element(name=tool, version=version, content=doc_text)
-            element.save()
+            doc_text = texts[(tool, version)]
+            if isinstance(doc_text, Exception):
+                raise doc_text
+            logger.debug("Obtained documentation for '%s-%s'.", tool, version)
+            element = Element(name=tool, version=version, content=doc_text, db=db)
+            element.save_yaml(manifest)
+            elements.append(element)
+
+        except fetch_errors as e:
+            logger.error("Failed to add documentation for '%s-%s': %s", tool, version, e) if not silent else None
+    with span("manifest.save"):
+        manifest.save()  # One write for all added elements
+
+    # Write all prepared elements to the DB in one batched upsert.
+    if not elements:
+        return
+    try:
+        db.save_elements(elements)
+    except storage_errors() as e:
+        logger.error("Failed to save documentation for %s element(s): %s", len(elements), e) if not silent else None
+        return
+    for element in index_documentation(elements, db, silent=silent, skip=known):
+        logger.info("Successfully added documentation for '%s-%s'.", element.name, element.version) if not silent else None
+
+def detected_versions():
+    """
+    Versions of the tools the project uses, from a scan of the project (cached, so cheap to repeat),
+    falling back to versions recorded in the manifest.
+    """
+    from docs_agent.helpers.scanner import detect_dependencies
+    versions = Manifest().versions()
+    versions.update({name: entry["version"] for name, entry in detect_dependencies(jobs=get_settings().get("SCAN_JOBS")).items()})
+    return versions
 
-        except Exception as e:
-            logger.error(f"Failed to add documentation for '{tool}-{version}': {e}") if not silent else None
+def resolve_source(name, version):
+    """
+    Find the documentation source (URL or file path) for a tool version.
+    Sources are configured in `DOC_SOURCES` as `{tool: url_or_path}`; `{version}` is substituted.
+    """
+    source = (get_settings().get("DOC_SOURCES") or {}).get(name)
+    return source.format(name=name, version=version) if source else None
+
+def fetch_documentation(pairs, jobs=None):
+    """
+    Fetch documentation for many (name, version) pairs concurrently, revalidating against the HTTP cache.
+    Returns a dict mapping each pair to its text (or to the exception raised while fetching it),
+    and the set of pairs whose documentation is unchanged since it was last fetched.
+    Pairs without a configured source get placeholder text.
+    """
+    sources = {}
+    texts = {}
+    unchanged = set()
+    for name, version in pairs:
+        source = resolve_source(name, version)
+        if source:
+            sources[(name, version)] = source
+        else:
+            logger.debug("No documentation source configured for '%s'.", name)
+            texts[(name, version)] = placeholder_text
+    if sources:
+        settings = get_settings()
+        cache = ResponseCache(max_bytes=settings.get("HTTP_CACHE_MAX_BYTES"))
+        with span("fetch", sources=len(sources)), Fetcher(jobs=jobs or settings.get("FETCH_JOBS"), cache=cache) as fetcher:
+            texts.update(fetcher.fetch_all(sources))
+        unchanged = {pair for pair, source in sources.items() if source in fetcher.unchanged}
+    return texts, unchanged
+
+def shared_documentation(pairs, db):
+    """
+    Find (name, version) pairs whose documentation is already in the shared store.
+    Returns a dict mapping each such pair to a preview of its documentation.
+    """
+    if not db.shared_directory:
+        return {}
+    known = {}
+    for name, version in pairs:
+        preview = db.chunk_preview(name, version)
+        if preview is not None:
+            logger.debug("Documentation for '%s-%s' is already in the shared store.", name, version)
+            known[(name, version)] = preview
+    return known
+
+def index_documentation(elements, db, silent=False, skip=()):
+    """
+    Chunk, embed and store the full documentation text of each element.
+    Yields the elements that were indexed successfully. Elements with placeholder text,
+    or whose (name, version) is in `skip`, are passed through without indexing.
+    """
+    pipeline = None
+    for element in elements:
+        if element.content == placeholder_text or (element.name, element.version) in skip:
+            yield element
+            continue
+        try:
+            pipeline = pipeline or IndexPipeline(db)
+            with span("index"):
+                pipeline.index(element, iter_pieces(element.content))
+            yield element
+        except embedding_errors() + storage_errors() as e:
+            logger.error("Failed to index documentation for '%s-%s': %s", element.name, element.version, e) if not silent else None
 
 def obtain_text(url_or_path):
     """Obtain text from a URL or file path."""
-    if url_or_path.startswith("http://") or url_or_path.startswith("https://"):
-        response = requests.get(url_or_path)
-        response.raise_for_status()
-        return response.text
-    else:
-        with open(url_or_path, "r", encoding="utf-8") as file:
-            return file.read()
+    with Fetcher(jobs=1) as fetcher:
+        return fetcher.fetch(url_or_path)
@@ -1,84 +1,311 @@
+import asyncio
+import json
+import re
 import sys
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 
+import httpx
 import ollama
 import functools
-import time
-from docs_agent.config import settings
-from docs_agent.helpers.filesize import filesize_to_english
+from docs_agent.config import get_settings
+from docs_agent.helpers.answer_cache import AnswerCache, context_fingerprint, settings_fingerprint
+from docs_agent.helpers.embeddings import Embedder
 from docs_agent.helpers.log import logger
+from docs_agent.helpers.model_cache import ModelCache, model_tag
+from docs_agent.helpers.output import BufferedWriter
+from docs_agent.helpers.profile import span
+from docs_agent.helpers.pull import PullManager
+from docs_agent.helpers.retrieval import Retriever, element_filter
+from docs_agent.helpers.tokens import count_tokens
+
 
+def available_models(client, host, required=(), refresh=False, cache=None):
+    """
+    Get the models available on an Ollama server as a name -> digest mapping.
+    Answered from the model cache while it is fresh and lists every `required` model; otherwise
+    the server is listed once and the cache updated. With `MODEL_CACHE_REVALIDATE`, a stale cache
+    is used as-is while it is refreshed in the background.
+    """
+    config = get_settings()
+    cache = cache or ModelCache(ttl=config.get("MODEL_CACHE_TTL"))
+    if not refresh:
+        entry = cache.entry(host)
+        if entry is not None and all(model_tag(model) in entry["models"] for model in required):
+            if cache.is_fresh(entry):
+                return entry["models"]
+            if config.get("MODEL_CACHE_REVALIDATE"):
+                cache.revalidate(client, host)
+                return entry["models"]
+    return cache.refresh(client, host)
 
-def _is_model_available(client, model_name):
-    """Check if a model is available locally."""
-    models = [model["model"] for model in client.list()["models"]]
-    model_name = f"{model_name}:latest" if ":" not in model_name else model_name
+
+def _is_model_available(models, model_name):
+    """Check if a model is among the models available locally."""
+    model_name = model_tag(model_name)
     model_available = model_name in models
-    logger.debug(f"Model '{model_name}' {'is' if model_available else 'is not'} available locally")
+    logger.debug("Model '%s' %s available locally", model_name, 'is' if model_available else 'is not')
     return model_available
 
 
+def pull_models(client, host, models):
+    """Pull models from the Ollama server in parallel, then refresh the model cache. Raises the first pull error."""
+    logger.info("Pulling model(s) %s from Ollama server...", ', '.join(repr(model) for model in models))
+    results = PullManager(client).pull(models)
+    available_models(client, host, refresh=True)
+    for model, error in results.items():
+        if error is not None:
+            logger.error("An error occurred while pulling the model '%s': %s", model, error)
+            raise error
+        logger.info("Successfully pulled model: %s", model)
+
+
 @functools.cache  # Initialize client only once
 def init_client():
     """Initialize Ollama client and ensure models are available."""
-    config = settings
-    ollama_url = config.get("OLLAMA_URL")
-    logger.debug(f"Initializing Ollama at {ollama_url}...")
-    ollama_client = ollama.Client(host=ollama_url, timeout=2.0)
-    # Ensure models are available
-    chat_model = config.get("CHAT_MODEL")
-    embedding_model = config.get("EMBEDDING_MODEL")
-    for model in [chat_model, embedding_model]:
-        if _is_model_available(ollama_client, model):
-            logger.debug(f"Model '{model}' is already available. Skipping pull.")
-            continue
-        logger.info(f"Pulling model '{model}' from Ollama server...")
-        try:
-            max_length = 0
-            for status in ollama_client.pull(model, stream=True):
-                status_line = f"\rStatus: {status.get('status')}, Completed: {filesize_to_english(status.get('completed'))}/{filesize_to_english(status.get('total'))} ({(status.get('completed') or 0) / (status.get('total') or 1) * 100:.2f}%)"
-                max_length = max(max_length, len(status_line))
-                status_line = status_line.ljust(max_length)
-                print(status_line, end="", flush=True)
-                time.sleep(0.5)
-            logger.info(f"\nSuccessfully pulled model: {model}")
-        except Exception as e:
-            logger.error(f"\nAn error occurred while pulling the model: {e}")
-            raise e
-    return ollama_client, config
+    with span("ollama.init"):
+        config = get_settings()
+        ollama_url = config.get("OLLAMA_URL")
+        logger.debug("Initializing Ollama at %s...", ollama_url)
+        ollama_client = ollama.Client(host=ollama_url, timeout=2.0)
+        # Ensure models are available
+        chat_model = config.get("CHAT_MODEL")
+        embedding_model = config.get("EMBEDDING_MODEL")
+        with span("ollama.models"):
+            models = available_models(ollama_client, ollama_url, required=[chat_model, embedding_model])
+        missing = [model for model in [chat_model, embedding_model] if not _is_model_available(models, model)]
+        if missing:
+            with span("ollama.pull", models=len(missing)):
+                pull_models(ollama_client, ollama_url, missing)
+        return ollama_client, config
+
+
+def _generation_stats(response, start, first=None, chunks=None):
+    """
+    Time to first token (for streams), tokens generated and tokens/sec of a chat response.
+    Uses the server's own token count and generation time when it reports them.
+    """
+    end = time.perf_counter()
+    stats = {}
+    if first is not None:
+        stats["ttft_ms"] = (first - start) * 1000
+    tokens = getattr(response, "eval_count", None) or chunks
+    duration = (getattr(response, "eval_duration", None) or 0) / 1e9 or end - (first or start)
+    if tokens and duration > 0:
+        stats["tokens"] = tokens
+        stats["tokens_per_s"] = tokens / duration
+    return stats
+
+
+def _replay(answer):
+    """Split a cached answer into word-sized chunks, so it streams like a model response."""
+    return re.findall(r"\s*\S+|\s+$", answer)
+
+
+_async_clients = weakref.WeakKeyDictionary()  # One pooled client per event loop
+
+
+def async_client():
+    """
+    Get the shared Ollama async client for the running event loop, creating it on first use.
+    Its connection pool is bounded by `OLLAMA_MAX_CONNECTIONS` and shared by all async conversations.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        config = get_settings()
+        max_connections = config.get("OLLAMA_MAX_CONNECTIONS")
+        client = ollama.AsyncClient(
+            host=config.get("OLLAMA_URL"),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+def default_answer_cache():
+    """Open the project's answer cache as configured, or None if it is disabled."""
+    config = get_settings()
+    if not config.get("ANSWER_CACHE"):
+        return None
+    return AnswerCache(
+        ttl=config.get("ANSWER_CACHE_TTL"),
+        max_entries=config.get("ANSWER_CACHE_MAX_ENTRIES"),
+        similarity=config.get("ANSWER_CACHE_SIMILARITY") if config.get("ANSWER_CACHE_SEMANTIC") else None,
+    )
 
 
 class Conversation:
     """
     Conversation class for managing chat sessions with the docs agent.
+    Keeps the messages sent to the model within a token budget (`MAX_TOKENS` by default):
+    the system prompt and the latest turns are kept, and the oldest turns are evicted first.
+    With an `AnswerCache`, the answer to a conversation's first question is looked up before
+    calling the chat model, and stored after.
     """
 
-    def __init__(self, system_prompt=None, model=None, **kwargs):
-        """Creates a conversation. Optionally specify a system prompt and model. Additional arguments are passed directly to the Ollama client."""
-        self.client, self.config = init_client()
+    message_overhead_tokens = 4  # Role and formatting tokens the model adds around each message
+
+    def __init__(self, system_prompt=None, model=None, retriever=None, retrieve=True, elements=None, max_tokens=None, client=None, answer_cache=None, **kwargs):
+        """
+        Creates a conversation. Optionally specify a system prompt and model. Additional arguments are passed directly to the Ollama client.
+        Relevant indexed documentation is retrieved for each user message unless `retrieve` is False;
+        `elements` (names, or a name -> version dict) restricts which documentation is searched.
+        Pass `client` to use an existing Ollama client instead of the shared one,
+        and `answer_cache` to answer repeated first questions from an `AnswerCache`.
+        """
+        self.client, self.config = (client, get_settings()) if client else init_client()
         system_prompt = system_prompt or self.config.get("SYSTEM_PROMPT")
         self.messages = [{"role": "system", "content": system_prompt}]
+        self.token_counts = [self.__count_tokens(self.messages[0])]
+        self.total_tokens = self.token_counts[0]
+        self.max_tokens = int(max_tokens or self.config.get("MAX_TOKENS"))
         self.model = model or self.config.get("CHAT_MODEL")
+        self.retriever = retriever or (Retriever(embedder=Embedder(client=self.client)) if retrieve else None)
+        self.retrieval_filter = element_filter(elements)
+        self.context_chunks = []  # Documentation retrieved for the latest user message
+        self.answer_cache = answer_cache
+        self.answered_from_cache = False  # Whether the latest response came from the answer cache
+        self.token_usage = {}  # Prompt and response tokens the server reported for the latest `get_response()`
         self.args = kwargs
 
     def add_user_message(self, content):
-        self.messages.append({"role": "user", "content": content})
+        if self.retriever:
+            try:
+                self.context_chunks = self.retriever.retrieve(content, where=self.retrieval_filter)
+            except Exception as e:
+                logger.warning("Could not retrieve documentation; answering without it: %s", e)
+                self.context_chunks = []
+            context = Retriever.format_context(self.context_chunks)
+            if context:
+                self._append({"role": "system", "content": context})
+        self._append({"role": "user", "content": content})
 
     def get_response(self):
-        response = self.client.chat(
-            model=self.model, messages=self.messages, **self.args
-        )
-        self.messages.append(
+        cache_entry, cached = self._cached_answer()
+        self.answered_from_cache = cached is not None
+        if cached is not None:
+            self.token_usage = {"prompt_tokens": 0, "response_tokens": 0}
+            self._append({"role": "assistant", "content": cached})
+            return cached
+        self._fit_window()
+        with span("generate") as timed:
+            start = time.perf_counter()
+            response = self.client.chat(
+                model=self.model, messages=self.messages, **self.args
+            )
+            timed.set(**_generation_stats(response, start))
+        self.token_usage = {
+            "prompt_tokens": getattr(response, "prompt_eval_count", None),
+            "response_tokens": getattr(response, "eval_count", None),
+        }
+        self._append(
             {"role": "assistant", "content": response.message["content"]}
         )
+        self._cache_answer(cache_entry, response.message["content"])
         return response.message["content"]
 
     def stream_response(self):
-        self.messages.append({"role": "assistant", "content": ""})
-        for chunk in self.client.chat(
-            model=self.model, messages=self.messages, stream=True, **self.args
-        ):
-            self.messages[-1]["content"] += chunk.message["content"]
-            yield chunk.message["content"]
+        cache_entry, cached = self._cached_answer()
+        self.answered_from_cache = cached is not None
+        if cached is not None:
+            self._append({"role": "assistant", "content": cached})
+            yield from _replay(cached)
+            return
+        self._fit_window()
+        self._append({"role": "assistant", "content": ""})
+        parts = []
+        with span("generate", stream=True) as timed:
+            start = time.perf_counter()
+            first = chunk = None
+            try:
+                for chunk in self.client.chat(
+                    model=self.model, messages=self.messages, stream=True, **self.args
+                ):
+                    if first is None and chunk.message["content"]:
+                        first = time.perf_counter()
+                    parts.append(chunk.message["content"])
+                    yield parts[-1]
+            finally:
+                self._finish_stream(parts)
+                timed.set(**_generation_stats(chunk, start, first, chunks=sum(1 for part in parts if part)))
+        self._cache_answer(cache_entry, self.messages[-1]["content"])
+
+    def _cached_answer(self):
+        """
+        Look up the answer to the conversation's first question in the answer cache.
+        Returns the cache entry to store a fresh answer under (None if it can't be cached), and the cached answer or None.
+        """
+        user_messages = [message for message in self.messages if message["role"] == "user"]
+        if self.answer_cache is None or len(user_messages) != 1:
+            return None, None
+        with span("answer_cache.lookup"):
+            return self.__cached_answer(user_messages[0]["content"])
+
+    def __cached_answer(self, prompt):
+        names = sorted({chunk["metadata"]["name"] for chunk in self.context_chunks})
+        index = self.retriever.db.get_metadata_index() if names else {}
+        embedding = None
+        if self.answer_cache.similarity:
+            try:
+                embedder = self.retriever.embedder if self.retriever else Embedder(client=self.client)
+                embedding = embedder.embed([prompt])[0]
+            except Exception as e:
+                logger.debug("Could not embed the prompt for the answer cache: %s", e)
+        entry = {
+            "prompt": prompt,
+            "model": self.model,
+            "fingerprint": context_fingerprint(self.context_chunks),
+            "settings": settings_fingerprint(self.messages[0]["content"], self.args),
+            "elements": {name: index.get(name, {}).get("updated_at") for name in names},
+            "embedding": embedding,
+        }
+        return entry, self.answer_cache.get(**entry)
+
+    def _cache_answer(self, entry, answer):
+        if entry is not None and answer:
+            self.answer_cache.put(answer=answer, **entry)
+
+    @classmethod
+    def __count_tokens(cls, message):
+        return count_tokens(message["content"]) + cls.message_overhead_tokens
+
+    def _append(self, message):
+        """Add a message, keeping the running token total up to date."""
+        self.messages.append(message)
+        self.token_counts.append(self.__count_tokens(message))
+        self.total_tokens += self.token_counts[-1]
+
+    def _finish_stream(self, parts):
+        """Set the streamed reply's content once streaming stops; appending to a string per chunk is quadratic."""
+        self.messages[-1]["content"] = "".join(parts)
+        self._recount_last()
+
+    def _recount_last(self):
+        """Recount the last message after its content changed (e.g. once streaming finishes)."""
+        count = self.__count_tokens(self.messages[-1])
+        self.total_tokens += count - self.token_counts[-1]
+        self.token_counts[-1] = count
+
+    def _fit_window(self):
+        """Evict the oldest messages after the system prompt until the conversation fits the token budget."""
+        if len(self.token_counts) != len(self.messages):
+            # Messages were changed directly; recount them all
+            self.token_counts = [self.__count_tokens(message) for message in self.messages]
+            self.total_tokens = sum(self.token_counts)
+        evicted = 0
+        while self.total_tokens > self.max_tokens and len(self.messages) > 2:
+            self.messages.pop(1)
+            self.total_tokens -= self.token_counts.pop(1)
+            evicted += 1
+        # Don't leave a reply without the question that prompted it
+        while evicted and len(self.messages) > 2 and self.messages[1]["role"] == "assistant":
+            self.messages.pop(1)
+            self.total_tokens -= self.token_counts.pop(1)
+            evicted += 1
+        if evicted:
+            logger.debug("Evicted %s message(s) to fit %s tokens within %s.", evicted, self.total_tokens, self.max_tokens)
 
 
 def ask(prompt="", stream=False, out_stream=sys.stdout):
@@ -86,14 +313,16 @@ def ask(prompt="", stream=False, out_stream=sys.stdout):
     Ask function for the docs agent. Invoked by the CLI handler.
     Supports streaming responses.
     """
-    conversation = Conversation()
+    conversation = Conversation(answer_cache=default_answer_cache())
     conversation.add_user_message(prompt)
-    response = ""
     if stream:
         logger.debug("Streaming response...")
-        for chunk in conversation.stream_response():
-            print(chunk, end="", flush=True, file=out_stream)
-            response += chunk
+        parts = []
+        with BufferedWriter(out_stream) as writer:
+            for chunk in conversation.stream_response():
+                writer.write(chunk)
+                parts.append(chunk)
+        response = "".join(parts)
         print(file=out_stream)  # Newline after streaming
     else:
         logger.debug("Getting full response...")
@@ -103,6 +332,164 @@ def ask(prompt="", stream=False, out_stream=sys.stdout):
     return response
 
 
+class AsyncConversation(Conversation):
+    """
+    Conversation for asyncio applications, built on `ollama.AsyncClient`.
+    Responses are awaited, or streamed with `async for`, without blocking the event loop; retrieval
+    and cache lookups run in worker threads. Each request is bounded by a timeout (`REQUEST_TIMEOUT`
+    seconds by default, 0 for none). Cancelling a request, or timing out, closes its connection,
+    which makes Ollama abort the generation. By default, all async conversations in an event loop
+    share one pooled client (see `async_client`). Create conversations with `await AsyncConversation.create()`,
+    which checks the models are available without blocking the event loop.
+    """
+
+    def __init__(self, *args, client=None, retriever=None, retrieve=True, timeout=None, **kwargs):
+        client = client or async_client()
+        if retriever is None and retrieve:
+            retriever = Retriever(embedder=Embedder())  # Embeds with the synchronous client, in a worker thread
+        super().__init__(*args, client=client, retriever=retriever, retrieve=retrieve, **kwargs)
+        self.timeout = timeout if timeout is not None else self.config.get("REQUEST_TIMEOUT")
+
+    @classmethod
+    async def create(cls, *args, client=None, retriever=None, retrieve=True, **kwargs):
+        """
+        Create a conversation. Without a `client`, the models are checked (and pulled if missing) in a worker
+        thread first, so other sessions carry on meanwhile. The default retriever's database is opened there too.
+        """
+        sync_client = None
+        if client is None:
+            sync_client, _ = await asyncio.to_thread(init_client)
+        if retriever is None and retrieve:
+            retriever = await asyncio.to_thread(Retriever, embedder=Embedder(client=sync_client))
+        return cls(*args, client=client, retriever=retriever, retrieve=retrieve, **kwargs)
+
+    async def add_user_message(self, content):
+        await asyncio.to_thread(super().add_user_message, content)
+
+    def __deadline(self, timeout):
+        timeout = timeout if timeout is not None else self.timeout
+        return asyncio.get_running_loop().time() + timeout if timeout else None
+
+    async def get_response(self, timeout=None):
+        cache_entry, cached = await asyncio.to_thread(self._cached_answer)
+        self.answered_from_cache = cached is not None
+        if cached is not None:
+            self._append({"role": "assistant", "content": cached})
+            return cached
+        self._fit_window()
+        async with asyncio.timeout_at(self.__deadline(timeout)):
+            response = await self.client.chat(model=self.model, messages=self.messages, **self.args)
+        self._append({"role": "assistant", "content": response.message["content"]})
+        await asyncio.to_thread(self._cache_answer, cache_entry, response.message["content"])
+        return response.message["content"]
+
+    async def stream_response(self, timeout=None):
+        cache_entry, cached = await asyncio.to_thread(self._cached_answer)
+        self.answered_from_cache = cached is not None
+        if cached is not None:
+            self._append({"role": "assistant", "content": cached})
+            for chunk in _replay(cached):
+                yield chunk
+            return
+        deadline = self.__deadline(timeout)
+        self._fit_window()
+        self._append({"role": "assistant", "content": ""})
+        stream = None
+        parts = []
+        try:
+            async with asyncio.timeout_at(deadline):
+                stream = await self.client.chat(model=self.model, messages=self.messages, stream=True, **self.args)
+            while True:
+                # The deadline only covers waiting on the server, not the time the caller spends on each chunk
+                async with asyncio.timeout_at(deadline):
+                    try:
+                        chunk = await anext(stream)
+                    except StopAsyncIteration:
+                        break
+                parts.append(chunk.message["content"])
+                yield parts[-1]
+        finally:
+            if stream is not None:
+                await stream.aclose()  # Closes the connection, so an abandoned generation stops on the server
+            self._finish_stream(parts)
+        await asyncio.to_thread(self._cache_answer, cache_entry, self.messages[-1]["content"])
+
+
+def _batch_prompts(in_stream):
+    """
+    Read batch prompts, one JSON object (with a `prompt` and optional `id`) or JSON string per line.
+    A line that can't be read yields an error record, with its line number as the `id`, in its place.
+    """
+    for number, line in enumerate(in_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"prompt": item}
+            yield {"id": item.get("id", number), "prompt": item["prompt"]}
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            yield {"id": number, "error": f"Invalid batch line: {type(e).__name__}: {e}"}
+
+
+def _answer_batch_item(item, client, retriever, answer_cache):
+    """Answer one batch prompt in its own conversation, returning the result record."""
+    start = time.perf_counter()
+    try:
+        conversation = Conversation(client=client, retriever=retriever, answer_cache=answer_cache)
+        conversation.add_user_message(item["prompt"])
+        response = conversation.get_response()
+    except Exception as e:
+        return {**item, "error": str(e), "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+    return {
+        **item,
+        "response": response,
+        "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+        **conversation.token_usage,
+        "cached": conversation.answered_from_cache,
+    }
+
+
+def ask_batch(in_stream=sys.stdin, out_stream=sys.stdout, jobs=None, client=None, retriever=None, answer_cache=None):
+    """
+    Answer many prompts concurrently. Invoked by the CLI handler for `docs ask --batch`.
+    Prompts are read as JSONL and answered by up to `jobs` workers sharing one client, retriever and
+    answer cache. Results are written as JSONL in completion order, with latency and the token counts
+    the server reported (zero for answers from the cache). Returns the number of prompts answered successfully.
+    """
+    if client is None:
+        client, _ = init_client()
+    retriever = retriever or Retriever(embedder=Embedder(client=client))
+    answer_cache = answer_cache or default_answer_cache()
+    jobs = max(int(jobs or get_settings().get("BATCH_JOBS")), 1)
+    answered = 0
+
+    def write(result):
+        out_stream.write(json.dumps(result) + "\n")
+        out_stream.flush()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending = set()
+        for item in _batch_prompts(in_stream):
+            # Keep a bounded number of prompts in flight, so huge batches aren't read into memory up front
+            if len(pending) >= jobs * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    answered += "error" not in result
+                    write(result)
+            if "error" in item:
+                write(item)  # An unreadable line
+                continue
+            pending.add(executor.submit(_answer_batch_item, item, client, retriever, answer_cache))
+        for future in as_completed(pending):
+            result = future.result()
+            answered += "error" not in result
+            write(result)
+    logger.debug("Answered %s batch prompt(s).", answered)
+    return answered
+
+
 def chat(in_stream=sys.stdin, out_stream=sys.stdout):
     """Chat function for the docs agent. Invoked by the CLI handler."""
     conversation = Conversation()
@@ -116,8 +503,9 @@ def chat(in_stream=sys.stdin, out_stream=sys.stdout):
                 logger.info("Ending chat session.")
                 break
             conversation.add_user_message(user_input)
-            for chunk in conversation.stream_response():
-                print(chunk, end="", flush=True, file=out_stream)
+            with BufferedWriter(out_stream) as writer:
+                for chunk in conversation.stream_response():
+                    writer.write(chunk)
             print(file=out_stream)  # Newline after streaming
             print(file=out_stream)  # Extra newline for readability
     finally:
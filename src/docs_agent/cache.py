@@ -0,0 +1,46 @@
+"""Inspects and prunes the docs agent's local caches."""
+import os
+
+from docs_agent.config import get_settings
+from docs_agent.helpers.answer_cache import AnswerCache
+from docs_agent.helpers.embedding_cache import EmbeddingCache
+from docs_agent.helpers.filesize import filesize_to_english
+from docs_agent.helpers.http_cache import ResponseCache
+from docs_agent.helpers.log import logger
+
+
+def report(name, stats):
+    """Log the stats for one cache."""
+    lookups = stats["hits"] + stats["misses"]
+    hit_rate = f"{stats['hits'] / lookups * 100:.1f}%" if lookups else "N/A"
+    bound = f" of {filesize_to_english(stats['max_bytes'])}" if stats['max_bytes'] is not None else ""
+    logger.info(
+        "%s: %s entries, %s%s, %s hits / %s misses (hit rate %s)",
+        name, stats['entries'], filesize_to_english(stats['bytes']), bound, stats['hits'], stats['misses'], hit_rate,
+    )
+
+def main(stats=False, prune=False):
+    """Main cache function. Invoked by the CLI handler."""
+    settings = get_settings()
+    http_cache = ResponseCache(max_bytes=settings.get("HTTP_CACHE_MAX_BYTES"))
+    if prune:
+        evicted = http_cache.prune()
+        http_cache.save()
+        logger.info("HTTP cache: evicted %s entries.", evicted)
+    report("HTTP cache", http_cache.stats())
+
+    for model in EmbeddingCache.models():
+        embedding_cache = EmbeddingCache(model, max_entries=settings.get("EMBEDDING_CACHE_MAX_ENTRIES"))
+        if prune:
+            evicted = embedding_cache.prune()
+            logger.info("Embedding cache (%s): evicted %s entries.", model, evicted)
+        report(f"Embedding cache ({model})", embedding_cache.stats())
+        embedding_cache.close()
+
+    if os.path.isdir(AnswerCache.default_directory):
+        answer_cache = AnswerCache(ttl=settings.get("ANSWER_CACHE_TTL"), max_entries=settings.get("ANSWER_CACHE_MAX_ENTRIES"))
+        if prune:
+            evicted = answer_cache.prune()
+            logger.info("Answer cache: evicted %s entries.", evicted)
+        report("Answer cache", answer_cache.stats())
+        answer_cache.close()
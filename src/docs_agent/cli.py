@@ -3,21 +3,31 @@ Docs agent.
 
 Usage:
   docs init [<dir>] [(-i | --interactive) | (-n | --non-interactive [--silent])]
-  docs add (<tool> [<version>]) ... [(-i | --interactive) | (-n | --non-interactive [--silent])] [--verbose]
+  docs add (<tool> [<version>]) ... [(-i | --interactive) | (-n | --non-interactive [--silent])] [--verbose] [--jobs=<n>] [--profile] [--profile-output=<file>]
   docs config <option> [<value>]
-  docs ask [--stream] [--] <prompt>
+  docs ask [--stream] [--profile] [--profile-output=<file>] [--] <prompt>
+  docs ask --batch=<file> [--jobs=<n>] [--profile] [--profile-output=<file>]
   docs chat
-  docs (pull | update) [--force] [--silent | --verbose]
+  docs serve
+  docs (pull | update) [--force] [--dry-run] [--jobs=<n>] [--silent | --verbose] [--profile] [--profile-output=<file>]
+  docs watch [--poll] [--jobs=<n>] [--silent]
+  docs cache (stats | prune)
+  docs models (refresh | pull)
   docs -h | --help
   docs -v | --version
 
 Commands:
-  init [<dir>]                 Initialize and configure the docs agent for your project. Uses the current directory if none is specified. Creates and sets up the .docs folder if it doesn't exist.
+  init [<dir>]                 Initialize and configure the docs agent for your project. Uses the current directory if none is specified. Creates and sets up the .docs folder if it doesn't exist, and records the dependencies found in the project, with their versions.
   add (<tool> [<version>])...  Manually add one or more tools, languages, or libraries to your local docs.
   config <option> [<value>]    If a value is given, sets the configuration option to that value, assuming `--local` if neither `--local` or `--global` is specified. If a value is not given, reports the existing configuration for that value and where it came from (global or local config).
   ask <prompt>                 Ask the Docs agent a question. Response can be streamed with `--stream`.
+  ask --batch=<file>           Answer many questions concurrently. Reads one JSON object with a "prompt" (and optional "id") per line from <file>, or from stdin if <file> is `-`, and writes one JSON result per line as each finishes.
   chat                         Start a chat session with the Docs agent.
+  serve                        Run the Docs agent as a background daemon, keeping models, storage and caches warm. `ask` and `chat` use it automatically when it is running.
   pull | update                Check for version updates and re-pull documentation where necessary.
+  watch                        Watch the project's lockfiles, manifests and .docs/elements.yaml, and re-index only the documentation whose versions change. Runs until interrupted.
+  cache (stats | prune)        Report cache sizes and hit rates, or evict entries to keep caches within their size limits.
+  models (refresh | pull)      Re-list the models available on the Ollama server, refreshing the cached list, or pull the configured chat and embedding models ahead of time.
 
 Options:
   -h, --help                   Show this screen.
@@ -28,17 +38,45 @@ Options:
   --verbose                    Configure progress verbosely.
   --stream                     Stream the Docs agent's response.
   --force                      Re-download all documentation, not just version updates.
+  --poll                       Watch by polling for changes rather than with inotify, e.g. on network filesystems. Polls every WATCH_POLL_INTERVAL seconds.
+  --dry-run                    Report which documentation would be updated without doing any work.
+  --jobs=<n>                   Number of documentation downloads, or batch questions, to run concurrently. Defaults to the FETCH_JOBS or BATCH_JOBS config option.
+  --batch=<file>               JSONL file of questions to answer, or `-` for stdin.
+  --profile                    Print how long each stage took (config, model checks, storage, embedding, retrieval, generation), with time to first token and tokens/sec for responses. `ask` then runs in-process rather than through the daemon, so every stage is measured.
+  --profile-output=<file>      Also write the timed stages to <file>: a Prometheus textfile if it ends in `.prom`, otherwise JSON lines appended to it.
 """
 
+import logging
+
 from docopt import docopt
+
+from docs_agent.helpers import profile
 from docs_agent.helpers.log import logger
 
 
 def main(version):
     args = docopt(__doc__, version=version) # type: ignore
-    logger.debug(
-        "Received CLI command with args: %s", {k: v for k, v in args.items() if v}
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Received CLI command with args: %s", {k: v for k, v in args.items() if v})
+    if not (args["--profile"] or args["--profile-output"]):
+        return run(args)
+    import sys
+
+    command = next((name for name in ("add", "ask", "pull", "update") if args[name]), None)
+    profiler = profile.enable(command)
+    try:
+        with profile.span(f"command.{command}"):
+            return run(args)
+    finally:
+        profile.disable()
+        if args["--profile"]:
+            profiler.report(sys.stderr)
+        if args["--profile-output"]:
+            profiler.write(args["--profile-output"])
+
+
+def run(args):
+    """Dispatch a parsed CLI command."""
     match args:
         case {
             "init": True,
@@ -55,6 +93,7 @@ def main(version):
             "<version>": versions,
             "--non-interactive": noninteractive,
             "--silent": silent,
+            "--jobs": jobs,
         }:
             from docs_agent.add_element import main as add_element
 
@@ -63,26 +102,61 @@ def main(version):
                 versions=versions,
                 noninteractive=noninteractive,
                 silent=silent,
+                jobs=int(jobs) if jobs else None,
             )
         case {"config": True, "<option>": option, "<value>": value}:
             from docs_agent.config import get_or_set_option as configure
 
             configure(option=option, value=value)
+        case {"ask": True, "--batch": str(batch), "--jobs": jobs}:
+            import sys
+
+            from docs_agent.agent import ask_batch
+
+            if batch == "-":
+                ask_batch(in_stream=sys.stdin, jobs=int(jobs) if jobs else None)
+            else:
+                with open(batch, "r", encoding="utf-8") as in_stream:
+                    ask_batch(in_stream=in_stream, jobs=int(jobs) if jobs else None)
         case {"ask": True, "<prompt>": prompt, "--stream": stream}:
-            from docs_agent.agent import ask as ask
+            from docs_agent import daemon
 
-            ask(prompt=prompt, stream=stream)
+            # A profiled question is answered in-process, so its stages can be timed
+            if args["--profile"] or args["--profile-output"] or daemon.ask(prompt=prompt, stream=stream) is None:
+                from docs_agent.agent import ask as ask
+
+                ask(prompt=prompt, stream=stream)
         case {"chat": True}:
-            from docs_agent.agent import chat as chat
+            from docs_agent import daemon
+
+            if not daemon.chat():
+                from docs_agent.agent import chat as chat
+
+                chat()
+        case {"serve": True}:
+            from docs_agent.daemon import serve
 
-            chat()
-        case {"pull": True, "--force": force, "--silent": silent, "--verbose": verbose}:
+            serve()
+        # `docs models pull` also sets "pull", so this must come before `docs pull`
+        case {"models": True, "refresh": refresh, "pull": pull}:
+            from docs_agent.models import main as models
+
+            models(refresh=refresh, pull=pull)
+        case {"pull": True, "--force": force, "--dry-run": dry_run, "--jobs": jobs, "--silent": silent, "--verbose": verbose}:
             from docs_agent.update import main as update
 
-            update(force=force, silent=silent, verbose=verbose)
-        case {"update": True, "--force": force, "--silent": silent, "--verbose": verbose}:
+            update(force=force, silent=silent, verbose=verbose, dry_run=dry_run, jobs=int(jobs) if jobs else None)
+        case {"watch": True, "--poll": poll, "--jobs": jobs, "--silent": silent}:
+            from docs_agent.watch import main as watch
+
+            watch(poll=poll, silent=silent, jobs=int(jobs) if jobs else None)
+        case {"update": True, "--force": force, "--dry-run": dry_run, "--jobs": jobs, "--silent": silent, "--verbose": verbose}:
             from docs_agent.update import main as update
-            update(force=force, silent=silent, verbose=verbose)
+            update(force=force, silent=silent, verbose=verbose, dry_run=dry_run, jobs=int(jobs) if jobs else None)
+        case {"cache": True, "stats": stats, "prune": prune}:
+            from docs_agent.cache import main as cache
+
+            cache(stats=stats, prune=prune)
         case _:
             logger.error("Given command is either invalid or not yet implemented.")
             logger.debug("Debug info: %s", args)
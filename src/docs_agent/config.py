@@ -1,13 +1,17 @@
+import functools
 import os
-import yaml
-from platformdirs import user_config_dir
-from docs_agent.helpers.log import logger
-from dotenv import load_dotenv
+from docs_agent.helpers.log import configure as configure_logging, logger
+from docs_agent.helpers.profile import span
 
 """Configuration loader for the docs_agent package."""
 
 class Config:
     """Configuration class to manage settings for the docs_agent."""
+
+    integer_options = ("MAX_TOKENS", "FETCH_JOBS", "HTTP_CACHE_MAX_BYTES", "CHUNK_TOKENS", "CHUNK_OVERLAP", "EMBED_BATCH_SIZE", "EMBEDDING_CACHE_MAX_ENTRIES", "RETRIEVAL_K", "MODEL_CACHE_TTL", "ANSWER_CACHE_TTL", "ANSWER_CACHE_MAX_ENTRIES", "BATCH_JOBS", "OLLAMA_MAX_CONNECTIONS", "SCAN_JOBS")
+    float_options = ("RETRIEVAL_MAX_DISTANCE", "ANSWER_CACHE_SIMILARITY", "REQUEST_TIMEOUT", "WATCH_DEBOUNCE", "WATCH_POLL_INTERVAL")
+    boolean_options = ("SHARED_STORE", "EMBEDDING_CACHE", "MODEL_CACHE_REVALIDATE", "HYBRID_SEARCH", "ANSWER_CACHE", "ANSWER_CACHE_SEMANTIC")
+
     def __init__(self):
         self.settings = {}
         self.load_config()
@@ -50,6 +54,114 @@ class Config:
                 "value": 4096,
                 "defined_in": "default",
             },
+            "FETCH_JOBS": {
+                "value": 4,
+                "defined_in": "default",
+            },
+            "HTTP_CACHE_MAX_BYTES": {
+                "value": 256 * 1024 * 1024,
+                "defined_in": "default",
+            },
+            "DOC_SOURCES": {
+                "value": {},
+                "defined_in": "default",
+            },
+            "CHUNK_TOKENS": {
+                "value": 512,
+                "defined_in": "default",
+            },
+            "CHUNK_OVERLAP": {
+                "value": 64,
+                "defined_in": "default",
+            },
+            "EMBED_BATCH_SIZE": {
+                "value": 32,
+                "defined_in": "default",
+            },
+            "SHARED_STORE": {
+                "value": False,
+                "defined_in": "default",
+            },
+            "EMBEDDING_CACHE": {
+                "value": True,
+                "defined_in": "default",
+            },
+            "EMBEDDING_CACHE_MAX_ENTRIES": {
+                "value": 500000,
+                "defined_in": "default",
+            },
+            "RETRIEVAL_K": {
+                "value": 4,
+                "defined_in": "default",
+            },
+            "RETRIEVAL_MAX_DISTANCE": {
+                "value": 0.8,
+                "defined_in": "default",
+            },
+            "HYBRID_SEARCH": {
+                "value": True,
+                "defined_in": "default",
+            },
+            "MODEL_CACHE_TTL": {
+                "value": 3600,
+                "defined_in": "default",
+            },
+            "MODEL_CACHE_REVALIDATE": {
+                "value": False,
+                "defined_in": "default",
+            },
+            "ANSWER_CACHE": {
+                "value": True,
+                "defined_in": "default",
+            },
+            "ANSWER_CACHE_SEMANTIC": {
+                "value": False,
+                "defined_in": "default",
+            },
+            "ANSWER_CACHE_SIMILARITY": {
+                "value": 0.95,
+                "defined_in": "default",
+            },
+            "ANSWER_CACHE_TTL": {
+                "value": 7 * 24 * 60 * 60,
+                "defined_in": "default",
+            },
+            "ANSWER_CACHE_MAX_ENTRIES": {
+                "value": 1000,
+                "defined_in": "default",
+            },
+            "BATCH_JOBS": {
+                "value": 4,
+                "defined_in": "default",
+            },
+            "OLLAMA_MAX_CONNECTIONS": {
+                "value": 16,
+                "defined_in": "default",
+            },
+            "REQUEST_TIMEOUT": {
+                "value": 300,
+                "defined_in": "default",
+            },
+            "SCAN_JOBS": {
+                "value": 8,
+                "defined_in": "default",
+            },
+            "WATCH_DEBOUNCE": {
+                "value": 0.5,
+                "defined_in": "default",
+            },
+            "WATCH_POLL_INTERVAL": {
+                "value": 1.0,
+                "defined_in": "default",
+            },
+            "LOG_LEVEL": {
+                "value": "INFO",
+                "defined_in": "default",
+            },
+            "LOG_FORMAT": {
+                "value": "text",
+                "defined_in": "default",
+            },
             "SYSTEM_PROMPT": {
                 "value": "You are a helpful assistant specialized in providing accurate and concise information based on the provided documentation.",
                 "defined_in": "default",
@@ -75,7 +187,8 @@ class Config:
 
     def _load_settings_from_file(self, file_path, source_desc):
         """Load settings from a YAML file."""
-        logger.debug(f"Attempting to load settings from file: {file_path}...")
+        import yaml
+        logger.debug("Attempting to load settings from file: %s...", file_path)
         if os.path.exists(file_path):
             with open(file_path, "r") as f:
                 try:
@@ -83,15 +196,16 @@ class Config:
                     logger.debug("Settings loaded successfully")
                     return self._apply_cfg_from_source(cfg, source_desc) if cfg else {}
                 except yaml.YAMLError as e:
-                    logger.error(f"Settings could not be loaded from {file_path}: {e}")
+                    logger.error("Settings could not be loaded from %s: %s", file_path, e)
                     return {}
-        logger.debug(
-            f"No config file found at: {file_path}. Using defaults where applicable."
-        )
+        logger.debug("No config file found at: %s. Using defaults where applicable.", file_path)
         return {}
 
     def load_config(self):
         """Load configuration settings from defaults, global config file, local config file, and environment variables."""
+        import yaml
+        from dotenv import load_dotenv
+        from platformdirs import user_config_dir
         logger.debug("Loading configuration...")
         # First, load default settings
         self._apply_defaults()
@@ -113,23 +227,33 @@ class Config:
                     "value": os.environ[key],
                     "defined_in": "environment variable",
                 }
-                logger.debug(f"Loaded {key} from environment variable with value: {os.environ[key]}")
+                logger.debug("Loaded %s from environment variable with value: %s", key, os.environ[key])
         
         # Normalize values
-        self.settings["MAX_TOKENS"]["value"] = int(self.settings["MAX_TOKENS"]["value"])
+        for key in self.integer_options:
+            self.settings[key]["value"] = int(self.settings[key]["value"])
+        for key in self.float_options:
+            self.settings[key]["value"] = float(self.settings[key]["value"])
+        for key in self.boolean_options:
+            value = self.settings[key]["value"]
+            self.settings[key]["value"] = value.strip().lower() in ("1", "true", "yes", "on") if isinstance(value, str) else bool(value)
+        if isinstance(self.settings["DOC_SOURCES"]["value"], str):
+            self.settings["DOC_SOURCES"]["value"] = yaml.safe_load(self.settings["DOC_SOURCES"]["value"]) or {}
+        configure_logging(level=self.settings["LOG_LEVEL"]["value"], format=self.settings["LOG_FORMAT"]["value"])
         return self.settings
 
     def save(self, config_file=os.path.join(".docs", "config.yaml")):
         """Save the given configuration to the local config file."""
+        import yaml
         # Remove any settings defined in defaults or global config file, only save those defined in local config file or set at runtime
         local_settings = {k: v["value"] for k, v in self.settings.items() if v["defined_in"] in ["local config file", "set at runtime", "from dictionary"]}
-        logger.debug(f"Attempting to save settings to file: {config_file}...")
+        logger.debug("Attempting to save settings to file: %s...", config_file)
         with open(config_file, "w") as f:
             try:
                 yaml.safe_dump(local_settings, f)
                 logger.debug("Settings saved successfully")
             except yaml.YAMLError as e:
-                logger.error(f"Settings could not be saved to {config_file}: {e}")
+                logger.error("Settings could not be saved to %s: %s", config_file, e)
     
     def get(self, option):
         """Get the value of a configuration option."""
@@ -146,20 +270,31 @@ class Config:
             "defined_in": source_desc,
         }
 
-settings = Config()
+@functools.cache  # Load the config only once, on first use
+def get_settings():
+    """Get the shared configuration, loading it on first use."""
+    with span("config.load"):
+        return Config()
+
+def __getattr__(name):
+    # `settings` used to be built at import time; keep it importable, but load it lazily
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_or_set_option(option, value=None, config_file=os.path.join(".docs", "config.yaml")):
     """Get or set a configuration option."""
+    settings = get_settings()
     if value is not None:
         source_desc = "local config file"
         settings.set(option, value, source_desc=source_desc)
         settings.save(config_file=config_file)
-        logger.info(f"Set {option} to {value} (in {source_desc}).")
+        logger.info("Set %s to %s (in %s).", option, value, source_desc)
     else:
         # Get the option
         value = settings.get(option)
         if value is not None:
-            logger.info(f"{option} (from {settings.source(option)}): {value}")
+            logger.info("%s (from %s): %s", option, settings.source(option), value)
         else:
-            logger.info(f"{option} is not set.")
+            logger.info("%s is not set.", option)
     return value
@@ -0,0 +1,224 @@
+"""
+Persistent local daemon for the docs agent.
+
+`docs serve` keeps the Ollama client, DB handles and caches resident and answers requests on a
+Unix socket, so `docs ask` and `docs chat` don't pay start-up costs on every call. Requests and
+replies are newline-delimited JSON. This module avoids heavy imports so that thin clients stay fast.
+"""
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import uuid
+
+from docs_agent.helpers.log import logger
+from docs_agent.helpers.output import BufferedWriter
+
+default_socket_path = os.path.join(".docs", "agent.sock")
+
+
+def _send(stream, message):
+    stream.write((json.dumps(message) + "\n").encode("utf-8"))
+    stream.flush()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles one client connection; each request line gets a stream of reply lines ending in `done` or `error`."""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                self.server.dispatch(request, lambda message: _send(self.wfile, message))
+                _send(self.wfile, {"done": True})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:  # noqa: BLE001 - the daemon's top-level handler: one bad request must not end the connection
+                logger.exception("Daemon request failed: %s", e)
+                _send(self.wfile, {"error": str(e)})
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Threaded Unix socket server holding a warm Ollama client, a shared retriever, the answer cache
+    and chat sessions.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path=default_socket_path, client=None, retriever=None, retrieve=True, answer_cache=None):
+        if client is None:
+            from docs_agent.agent import init_client
+            client, _ = init_client()
+        if retriever is None and retrieve:
+            from docs_agent.helpers.embeddings import Embedder
+            from docs_agent.helpers.retrieval import Retriever
+            retriever = Retriever(embedder=Embedder(client=client))
+        if answer_cache is None:
+            from docs_agent.agent import default_answer_cache
+            answer_cache = default_answer_cache()
+        self.client = client
+        self.retriever = retriever
+        self.answer_cache = answer_cache
+        self.retrieve = retrieve
+        self.sessions = {}
+        self.sessions_lock = threading.Lock()
+        self.path = path
+        super().__init__(path, _RequestHandler)
+
+    def conversation(self, answer_cache=None):
+        from docs_agent.agent import Conversation
+        return Conversation(client=self.client, retriever=self.retriever, retrieve=self.retrieve, answer_cache=answer_cache)
+
+    def dispatch(self, request, reply):
+        """Run a request, calling `reply` with each message to send back."""
+        match request:
+            case {"command": "ping"}:
+                pass
+            case {"command": "ask", "prompt": prompt}:
+                conversation = self.conversation(answer_cache=self.answer_cache)
+                conversation.add_user_message(prompt)
+                self.__respond(conversation, request.get("stream", False), reply)
+            case {"command": "chat", "session": session, "prompt": prompt}:
+                with self.sessions_lock:
+                    conversation = self.sessions.get(session)
+                    if conversation is None:
+                        conversation = self.sessions[session] = self.conversation()
+                conversation.add_user_message(prompt)
+                self.__respond(conversation, True, reply)
+            case {"command": "end", "session": session}:
+                with self.sessions_lock:
+                    self.sessions.pop(session, None)
+            case _:
+                raise ValueError(f"Unknown daemon request: {request}")
+
+    @staticmethod
+    def __respond(conversation, stream, reply):
+        if stream:
+            for chunk in conversation.stream_response():
+                reply({"chunk": chunk})
+        else:
+            reply({"chunk": conversation.get_response()})
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def connect(path=default_socket_path):
+    """Connect to a running daemon. Returns None if none is listening."""
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    return sock
+
+
+def _request(connection, request, on_chunk):
+    """Send one request over a daemon connection, passing each reply chunk to `on_chunk`."""
+    _send(connection, request)
+    for line in connection:
+        reply = json.loads(line)
+        if "chunk" in reply:
+            on_chunk(reply["chunk"])
+        elif "error" in reply:
+            raise RuntimeError(f"Daemon error: {reply['error']}")
+        elif reply.get("done"):
+            return
+    raise ConnectionError("Daemon closed the connection.")
+
+
+def ask(prompt, stream=False, out_stream=sys.stdout, path=default_socket_path):
+    """
+    Ask through a running daemon. Returns the response, or None if no daemon is running or it went away
+    before answering (callers should fall back to answering in-process). If it goes away part way
+    through an answer, the error is logged and the partial response returned.
+    """
+    sock = connect(path)
+    if sock is None:
+        return None
+    logger.debug("Asking via daemon at %s.", path)
+    parts = []
+    writer = BufferedWriter(out_stream)
+
+    def on_chunk(chunk):
+        parts.append(chunk)
+        if stream:
+            writer.write(chunk)
+
+    try:
+        with sock, sock.makefile("rwb") as connection, writer:
+            _request(connection, {"command": "ask", "prompt": prompt, "stream": stream}, on_chunk)
+    except (OSError, ValueError) as e:
+        if not parts:
+            logger.debug("Daemon request failed before any reply; answering in-process: %s", e)
+            return None
+        logger.error("Lost the connection to the daemon part way through the answer: %s", e)
+    response = "".join(parts)
+    if stream:
+        print(file=out_stream)  # Newline after streaming
+    else:
+        print(response, file=out_stream)
+    return response
+
+
+def chat(in_stream=sys.stdin, out_stream=sys.stdout, path=default_socket_path):
+    """
+    Chat through a running daemon. Returns False if no daemon is running, or if it goes away during
+    the session (callers should fall back to chatting in-process).
+    """
+    sock = connect(path)
+    if sock is None:
+        return False
+    session = uuid.uuid4().hex
+    logger.info("Starting chat session with the Docs agent. Type '/done' to quit.")
+    connected = True
+    with sock, sock.makefile("rwb") as connection:
+        try:
+            while True:
+                print("> ", end="", flush=True, file=out_stream)
+                user_input = in_stream.readline()
+                if not user_input or user_input.strip().lower() == "/done":
+                    logger.info("Ending chat session.")
+                    break
+                with BufferedWriter(out_stream) as writer:
+                    _request(connection, {"command": "chat", "session": session, "prompt": user_input.rstrip("\n")}, writer.write)
+                print(file=out_stream)  # Newline after streaming
+                print(file=out_stream)  # Extra newline for readability
+        except (OSError, ValueError) as e:
+            connected = False
+            logger.error("Lost the connection to the daemon; continuing in-process in a new session: %s", e)
+        finally:
+            if connected:
+                try:
+                    _request(connection, {"command": "end", "session": session}, lambda chunk: None)
+                except (OSError, ValueError):
+                    pass
+    return connected
+
+
+def serve(path=default_socket_path):
+    """Run the daemon until interrupted. Invoked by the CLI handler."""
+    sock = connect(path)
+    if sock is not None:
+        sock.close()
+        logger.error("A docs agent daemon is already listening on %s.", path)
+        return
+    if os.path.exists(path):
+        os.remove(path)  # Stale socket left by a daemon that didn't shut down cleanly
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with DaemonServer(path) as server:
+        logger.info("Docs agent daemon listening on %s. Press Ctrl+C to stop.", path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logger.info("Stopping docs agent daemon.")
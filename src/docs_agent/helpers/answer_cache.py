@@ -0,0 +1,157 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+
+from docs_agent.helpers.log import logger
+
+
+def normalize_prompt(prompt):
+    """Normalize a prompt so trivially different phrasings share a cache entry."""
+    return re.sub(r"\s+", " ", prompt).strip().rstrip("?!. ").lower()
+
+def context_fingerprint(chunks):
+    """Fingerprint the documentation retrieved for a prompt."""
+    digest = hashlib.sha256()
+    for chunk in chunks or []:
+        digest.update(f"{chunk['id']}\0{chunk['document']}\0".encode())
+    return digest.hexdigest()
+
+def settings_fingerprint(system_prompt, options=None):
+    """Fingerprint the generation settings an answer depends on: the system prompt and chat options."""
+    return hashlib.sha256(f"{system_prompt}\0{json.dumps(options or {}, sort_keys=True, default=str)}".encode()).hexdigest()
+
+def _cosine_similarity(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class AnswerCache:
+    """
+    Cache of model answers to single questions, keyed by the normalized prompt, the chat model, a
+    fingerprint of the retrieved documentation and one of the generation settings (the system prompt
+    and chat options). Each entry records the `updated_at` of the elements its context came from and
+    is only served while those are unchanged.
+
+    With a `similarity` threshold, a prompt embedding is stored too, and a prompt whose embedding is
+    at least that similar to a cached one (with the same model, context and settings) is also a hit.
+    Entries expire after `ttl` seconds; past `max_entries`, the least recently used are evicted.
+    """
+
+    default_directory = os.path.join(".docs", "cache", "answers")
+    default_ttl = 7 * 24 * 60 * 60
+    default_max_entries = 1000
+
+    def __init__(self, directory=default_directory, ttl=None, max_entries=None, similarity=None):
+        self.directory = directory
+        self.ttl = int(ttl if ttl is not None else self.default_ttl)
+        self.max_entries = int(max_entries or self.default_max_entries)
+        self.similarity = similarity
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(self.directory, "answers.sqlite3"), check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, model TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                "settings TEXT NOT NULL, elements TEXT NOT NULL, embedding BLOB, answer TEXT NOT NULL, created REAL NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @staticmethod
+    def key(prompt, model, fingerprint, settings=""):
+        return hashlib.sha256(f"{normalize_prompt(prompt)}\0{model}\0{fingerprint}\0{settings}".encode()).hexdigest()
+
+    def __count(self, counter):
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = value + 1", (counter,)
+        )
+
+    def get(self, prompt, model, fingerprint, elements, embedding=None, settings=""):
+        """
+        Look up a cached answer. `elements` maps the names of the elements in the context to their
+        current `updated_at`. Returns the answer, or None on a miss.
+        """
+        elements = json.dumps(elements, sort_keys=True)
+        fresh_after = time.time() - self.ttl
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT key, answer FROM answers WHERE key = ? AND elements = ? AND created > ?",
+                (self.key(prompt, model, fingerprint, settings), elements, fresh_after),
+            ).fetchone()
+            if row is None and self.similarity and embedding is not None:
+                row = self.__nearest(model, fingerprint, settings, elements, fresh_after, embedding)
+            self.__count("hits" if row else "misses")
+            if row is None:
+                return None
+            self._db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (time.time(), row[0]))
+        logger.debug("Answer served from the answer cache.")
+        return row[1]
+
+    def __nearest(self, model, fingerprint, settings, elements, fresh_after, embedding):
+        """Find the cached answer whose prompt is most similar to the embedding, if similar enough."""
+        best, best_similarity = None, self.similarity
+        rows = self._db.execute(
+            "SELECT key, answer, embedding FROM answers WHERE model = ? AND fingerprint = ? AND settings = ? AND elements = ? "
+            "AND created > ? AND embedding IS NOT NULL",
+            (model, fingerprint, settings, elements, fresh_after),
+        )
+        for key, answer, blob in rows:
+            cached = array("f")
+            cached.frombytes(blob)
+            similarity = _cosine_similarity(embedding, cached)
+            if similarity >= best_similarity:
+                best, best_similarity = (key, answer), similarity
+        return best
+
+    def put(self, prompt, model, fingerprint, elements, answer, embedding=None, settings=""):
+        """Cache an answer, evicting expired and least recently used entries as needed."""
+        now = time.time()
+        blob = array("f", embedding).tobytes() if embedding is not None else None
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO answers (key, model, fingerprint, settings, elements, embedding, answer, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.key(prompt, model, fingerprint, settings), model, fingerprint, settings, json.dumps(elements, sort_keys=True), blob, answer, now, now),
+            )
+            self.__evict()
+
+    def __evict(self, max_entries=None):
+        max_entries = self.max_entries if max_entries is None else max_entries
+        evicted = self._db.execute("DELETE FROM answers WHERE created <= ?", (time.time() - self.ttl,)).rowcount
+        excess = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0] - max_entries
+        if excess > 0:
+            evicted += self._db.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY last_used LIMIT ?)", (excess,)
+            ).rowcount
+        if evicted:
+            logger.debug("Evicted %s entries from the answer cache.", evicted)
+        return evicted
+
+    def prune(self, max_entries=None):
+        """Evict expired entries, then least recently used ones until at most `max_entries` remain."""
+        with self._lock, self._db:
+            return self.__evict(max_entries)
+
+    def stats(self):
+        """Report the number of entries, their size, and persisted hit/miss counters."""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(answer)), 0) FROM answers").fetchone()
+            counters = dict(self._db.execute("SELECT key, value FROM meta"))
+        return {
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": None,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,44 +1,155 @@
-from chromadb import errors, PersistentClient
+import functools
 import os
 from typing import Optional
+from platformdirs import user_data_dir
+from docs_agent.helpers.lexical import LexicalIndex
+from docs_agent.helpers.profile import span
+from docs_agent.helpers.retrieval import element_filter
 
 class DB:
     """
     Class to handle interactions with ChromaDB for storing and retrieving documentation elements.
+    Owns one lazily created client per persist directory and caches collection handles,
+    so repeated operations don't pay client construction and storage setup every time.
+    Use `close()` (or the instance as a context manager) to release them.
+    ChromaDB itself is only imported, and directories only created, once storage is first used.
+
+    Documentation chunks are also kept in a full-text `LexicalIndex` next to the chunk collection,
+    updated whenever chunks are saved or deleted.
+
+    With a `shared_directory`, documentation chunks are kept in a global store shared by all
+    projects, addressed by element name and version. Chunk searches are then restricted to the
+    element versions this project uses.
     """
 
     default_persist_directory = os.path.join(".docs", "chromadb")
+    default_shared_directory = os.path.join(user_data_dir("docs_agent"), "chromadb")
+    default_batch_size = 100
 
-    def __init__(self, persist_directory=default_persist_directory):
+    def __init__(self, persist_directory=default_persist_directory, shared_directory=None):
+        self._clients = {}
+        self._collections = {}
+        self._lexical = None
+        self.shared_directory = shared_directory
         self.persist_directory = persist_directory
-        # Ensure the directory exists
-        os.makedirs(self.persist_directory, exist_ok=True)
 
-    def __chromadb_client(self):
+    @property
+    def persist_directory(self):
+        return self._persist_directory
+
+    @persist_directory.setter
+    def persist_directory(self, persist_directory):
+        """Point the DB at a new directory, dropping handles for the old one."""
+        if getattr(self, "_persist_directory", None) not in (None, persist_directory):
+            self.reset()
+        self._persist_directory = persist_directory
+
+    @property
+    def client(self):
+        """Get the ChromaDB client for the current persist directory, creating it on first use."""
+        return self.__chromadb_client(self.persist_directory)
+
+    def __chromadb_client(self, directory):
         """Get a ChromaDB client instance."""
-        client = PersistentClient(path=self.persist_directory)
+        client = self._clients.get(directory)
+        if client is None:
+            with span("chromadb.client"):
+                from chromadb import PersistentClient
+                # Ensure the directory exists
+                os.makedirs(directory, exist_ok=True)
+                client = PersistentClient(path=directory)
+            self._clients[directory] = client
         return client
 
     def __get_collection(self, collection_name):
         """Get or create a ChromaDB collection."""
-        client = self.__chromadb_client()
-        try:
-            collection = client.get_collection(name=collection_name)
-        except errors.NotFoundError:
-            collection = client.create_collection(name=collection_name)
+        directory = self.persist_directory
+        if collection_name == "chunks" and self.shared_directory:
+            directory = self.shared_directory
+        key = (directory, collection_name)
+        collection = self._collections.get(key)
+        if collection is not None:
+            return collection
+        client = self.__chromadb_client(directory)
+        with span("chromadb.collection", collection=collection_name):
+            if collection_name == "chunks":
+                # Chunks are embedded by the docs agent itself, and compared by cosine distance
+                collection = client.get_or_create_collection(
+                    name=collection_name,
+                    embedding_function=None,
+                    configuration={"hnsw": {"space": "cosine"}},
+                )
+            else:
+                from chromadb import errors
+                try:
+                    collection = client.get_collection(name=collection_name)
+                except errors.NotFoundError:
+                    collection = client.create_collection(name=collection_name)
+        self._collections[key] = collection
         return collection
 
+    @property
+    def chunks_directory(self):
+        """The directory holding documentation chunks: the shared store if enabled, else the project store."""
+        return self.shared_directory or self.persist_directory
+
+    def __lexical_index(self):
+        """Get the full-text index of chunks, opening it on first use and backfilling it if it is missing."""
+        if self._lexical is None:
+            collection = self.__get_collection("chunks")
+            lexical = LexicalIndex(os.path.join(self.chunks_directory, "lexical.sqlite3"))
+            if lexical.count() == 0 and collection.count() > 0:
+                # Chunks indexed before the lexical index existed
+                for offset in range(0, collection.count(), self.default_batch_size):
+                    batch = collection.get(include=["documents", "metadatas"], limit=self.default_batch_size, offset=offset)
+                    lexical.upsert(batch['ids'], batch['documents'], batch['metadatas'])
+            self._lexical = lexical
+        return self._lexical
+
+    def reset(self):
+        """Drop cached collection handles and close all clients. They are recreated on next use."""
+        self._collections.clear()
+        if self._lexical is not None:
+            self._lexical.close()
+            self._lexical = None
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            close = getattr(client, "close", None)  # Only available in newer ChromaDB releases
+            if close is not None:
+                close()
+
+    def close(self):
+        """Release the client and collection handles held by this DB."""
+        self.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def get_elements(self):
         """Retrieve all elements from the ChromaDB collection."""
         collection = self.__get_collection("elements")
         return collection.get()
 
+    def get_metadata_index(self):
+        """
+        Build a name -> metadata index of all elements from a single metadata-only fetch.
+        No documents are loaded and nothing is embedded.
+        """
+        collection = self.__get_collection("elements")
+        with span("chromadb.metadata_index"):
+            results = collection.get(include=["metadatas"])
+        return {str(metadata['name']): metadata for metadata in results['metadatas'] or []}
+
     def search_elements(self, query : str, count : Optional[int] = None):
         """Search for elements in the ChromaDB collection."""
         collection = self.__get_collection("elements")
         count = count if count is not None else max(collection.count(), 1)
 
-        results = collection.query(query_texts=[query], n_results=count)
+        with span("chromadb.search_elements"):
+            results = collection.query(query_texts=[query], n_results=count)
         return results
 
     def save_element(self, element):
@@ -46,10 +157,121 @@ class DB:
         Save an element to the ChromaDB collection.
         Update it if it already exists.
         """
+        self.save_elements([element])
+
+    def save_elements(self, elements, batch_size: int | None = None):
+        """
+        Save many elements to the ChromaDB collection, upserting by element ID.
+        Elements are written in batches of at most `batch_size` (bounded by ChromaDB's own limit).
+        """
         collection = self.__get_collection("elements")
-        # Check if element already exists
-        existing = collection.query(query_texts=[element.name], n_results=1)
-        add_or_update = collection.update if existing['ids'][0] else collection.add
-        add_or_update(**element.to_dict())
+        batch_size = min(batch_size or self.default_batch_size, self.client.get_max_batch_size())
+        batch = {}  # Keyed by ID so repeated elements collapse to the latest one
+        for element in elements:
+            record = element.to_dict()
+            batch[record['ids']] = record
+            if len(batch) >= batch_size:
+                self.__upsert(collection, batch.values())
+                batch = {}
+        if batch:
+            self.__upsert(collection, batch.values())
+
+    def __upsert(self, collection, records):
+        """Upsert a batch of element records (as returned by `Element.to_dict`) in one call."""
+        with span("chromadb.save_elements"):
+            collection.upsert(
+                ids=[record['ids'] for record in records],
+                metadatas=[record['metadatas'] for record in records],
+                documents=[record['documents'] for record in records],
+            )
+
+    def save_chunks(self, ids, documents, embeddings, metadatas):
+        """Upsert one batch of pre-embedded documentation chunks."""
+        collection = self.__get_collection("chunks")
+        with span("chromadb.save_chunks"):
+            collection.upsert(ids=ids, documents=documents, embeddings=embeddings, metadatas=metadatas)
+        with span("lexical.save_chunks"):
+            self.__lexical_index().upsert(ids, documents, metadatas)
+
+    @staticmethod
+    def chunk_id(name, version, chunk):
+        """ID of a documentation chunk, addressed by element name and version."""
+        return f"{name}@{version}#{chunk}"
+
+    def delete_chunks(self, name, version, start=0):
+        """
+        Delete an element version's documentation chunks from chunk number `start` onwards.
+        In a project-local store, chunks for any other version of the element are deleted too;
+        in the shared store, other projects may still use them.
+        """
+        collection = self.__get_collection("chunks")
+        stale = {"$and": [{"version": version}, {"chunk": {"$gte": start}}]}
+        if not self.shared_directory:
+            stale = {"$or": [{"version": {"$ne": version}}, stale]}
+        collection.delete(where={"$and": [{"name": name}, stale]})
+        self.__lexical_index().delete({"$and": [{"name": name}, stale]})
+
+    def chunk_preview(self, name, version):
+        """Get the first documentation chunk stored for an element version, or None if it isn't stored."""
+        collection = self.__get_collection("chunks")
+        results = collection.get(ids=[self.chunk_id(name, version, 0)], include=["documents"])
+        return results['documents'][0] if results['ids'] else None
+
+    def search_chunks(self, embedding, count=4, where=None):
+        """
+        Find the documentation chunks nearest to a query embedding, optionally filtered by metadata.
+        Searches of the shared store only cover the element versions this project uses.
+        """
+        collection = self.__get_collection("chunks")
+        where = self.__project_filter(where)
+        if where is False:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        with span("chromadb.search_chunks"):
+            return collection.query(query_embeddings=[embedding], n_results=count, where=where)
+
+    def search_chunks_lexical(self, query, count=4, where=None):
+        """
+        Find the documentation chunks best matching a query's terms, without embedding it.
+        Returns a list of dicts of id, document, metadata and BM25 score, best first.
+        """
+        where = self.__project_filter(where)
+        if where is False:
+            return []
+        with span("lexical.search"):
+            return self.__lexical_index().search(query, count=count, where=where)
+
+    def __project_filter(self, where):
+        """Restrict a chunk filter to this project's element versions when using the shared store. False if there are none."""
+        if not self.shared_directory:
+            return where
+        project = element_filter({name: str(metadata['version']) for name, metadata in self.get_metadata_index().items()})
+        if project is None:
+            return False
+        return {"$and": [project, where]} if where else project
+
+    def count_chunks(self):
+        """Count the documentation chunks in the collection."""
+        return self.__get_collection("chunks").count()
+
+def storage_errors():
+    """Errors reading or writing the DB can fail with, for callers that carry on past a failed element. Imports ChromaDB."""
+    import sqlite3
+
+    from chromadb import errors
+    return (errors.ChromaError, sqlite3.Error, ValueError, OSError)
+
+def shared_store_directory():
+    """The global documentation store directory, if the shared store is enabled in the config."""
+    from docs_agent.config import get_settings
+    return DB.default_shared_directory if get_settings().get("SHARED_STORE") else None
+
+@functools.cache  # Create the default DB only once, on first use
+def default_db():
+    """Get the DB for the current project, honouring the shared store setting."""
+    return DB(shared_directory=shared_store_directory())
 
-ChromaDB = DB()
\ No newline at end of file
+def __getattr__(name):
+    # `ChromaDB` used to be created at import time; keep it importable, but create it lazily
+    if name == "ChromaDB":
+        return default_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,128 @@
+import re
+from collections import deque
+from html.parser import HTMLParser
+
+from docs_agent.helpers.tokens import count_tokens
+
+# A word and the whitespace that follows it
+WORD_PATTERN = re.compile(r"\S+\s*")
+HTML_START_PATTERN = re.compile(r"^\s*(<!doctype html|<html|<head|<body)", re.IGNORECASE)
+
+
+def iter_pieces(text, size=64 * 1024):
+    """Split a string into pieces of at most `size` characters, so it can be streamed."""
+    for start in range(0, len(text), size):
+        yield text[start:start + size]
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Incremental HTML-to-text parser that drops scripts and styles."""
+
+    skipped_tags = frozenset({"script", "style", "noscript", "template"})
+    block_tags = frozenset({"p", "div", "br", "li", "tr", "pre", "section", "article", "h1", "h2", "h3", "h4", "h5", "h6"})
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.skipping = 0
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.skipped_tags:
+            self.skipping += 1
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.skipped_tags and self.skipping:
+            self.skipping -= 1
+        elif tag in self.block_tags:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(data)
+
+    def drain(self):
+        text, self.parts = "".join(self.parts), []
+        return text
+
+
+def iter_text(pieces):
+    """
+    Incrementally convert streamed documentation pieces to plain text.
+    HTML is detected from the first non-empty piece and parsed as it arrives; anything else passes through.
+    """
+    pieces = iter(pieces)  # Resumed below once the first piece is seen, so lists must not restart
+    parser = None
+    for piece in pieces:
+        if not piece:
+            continue
+        if parser is None:
+            if not HTML_START_PATTERN.match(piece):
+                yield piece
+                yield from pieces
+                return
+            parser = _HTMLTextExtractor()
+        parser.feed(piece)
+        text = parser.drain()
+        if text:
+            yield text
+    if parser is not None:
+        parser.close()
+        text = parser.drain()
+        if text:
+            yield text
+
+
+def iter_chunks(pieces, chunk_tokens=512, overlap_tokens=64):
+    """
+    Split streamed text into chunks of about `chunk_tokens` tokens, each starting with
+    roughly the last `overlap_tokens` tokens of the previous chunk.
+    Chunks break between words. Only one chunk's worth of text is held in memory at a time.
+    """
+    overlap_tokens = min(overlap_tokens, chunk_tokens // 2)
+    window = deque()  # (word, token count) pairs in the current chunk
+    window_tokens = 0
+    carry = ""  # Trailing text that may be the start of a word split across pieces
+
+    def words_in(text):
+        for match in WORD_PATTERN.finditer(text):
+            word = match.group()
+            yield word, max(count_tokens(word), 1)
+
+    def take_chunk():
+        nonlocal window_tokens
+        chunk = "".join(word for word, _ in window)
+        # Keep the tail of this chunk as the overlap for the next one
+        kept = deque()
+        kept_tokens = 0
+        while window and kept_tokens + window[-1][1] <= overlap_tokens:
+            word, tokens = window.pop()
+            kept.appendleft((word, tokens))
+            kept_tokens += tokens
+        window.clear()
+        window.extend(kept)
+        window_tokens = kept_tokens
+        return chunk.rstrip()
+
+    emitted_tokens = 0  # Tokens in the window that have already been emitted as overlap
+    for piece in pieces:
+        text = carry + piece
+        # Hold back a trailing partial word until the next piece arrives
+        split = len(text)
+        while split > 0 and not text[split - 1].isspace():
+            split -= 1
+        text, carry = text[:split], text[split:]
+        for word, tokens in words_in(text):
+            window.append((word, tokens))
+            window_tokens += tokens
+            if window_tokens >= chunk_tokens:
+                yield take_chunk()
+                emitted_tokens = window_tokens
+    if carry:
+        for word, tokens in words_in(carry):
+            window.append((word, tokens))
+            window_tokens += tokens
+    # Emit the remainder, unless it's nothing more than the previous chunk's overlap
+    if window and window_tokens > emitted_tokens:
+        yield "".join(word for word, _ in window).rstrip()
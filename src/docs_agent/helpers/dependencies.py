@@ -0,0 +1,150 @@
+import json
+import re
+import tomllib
+
+# Requirement strings like `requests[socks]>=2.31,<3 ; python_version >= "3.9"`
+REQUIREMENT_PATTERN = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*([^;]*?)\s*(?:;.*)?$")
+VERSION_PATTERN = re.compile(r"\d+(?:\.\d+)*(?:[-.+]?[0-9A-Za-z]+)*")
+
+
+def normalize_name(name):
+    """Normalize a Python distribution name (PEP 503), so spellings from different files match."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+def version_from_spec(spec):
+    """
+    Get a version from a version specifier or range: the pinned version for `==1.2.3`,
+    otherwise the lower bound (`>=1.2`, `^1.2.0`, `~1.2`). Returns (version, exact), or (None, False).
+    """
+    spec = (spec or "").strip()
+    pinned = re.fullmatch(r"(?:===?|=)?\s*v?(" + VERSION_PATTERN.pattern + r")", spec)
+    if pinned and not spec.startswith(("^", "~")):
+        return pinned.group(1), True
+    for clause in spec.split(","):
+        clause = clause.strip()
+        if clause.startswith(("<", "!=")):
+            continue
+        match = VERSION_PATTERN.search(clause)
+        if match:
+            return match.group(0), False
+    return None, False
+
+
+def _requirements(lines):
+    """Map requirement names to specifiers, skipping options, includes, URLs and local paths."""
+    dependencies = {}
+    for line in lines:
+        line = line.split(" #")[0].strip()
+        if not line or line.startswith(("#", "-", ".", "/")) or "://" in line or " @ " in line:
+            continue
+        match = REQUIREMENT_PATTERN.match(line)
+        if match:
+            dependencies[normalize_name(match.group(1))] = match.group(2)
+    return dependencies
+
+def parse_requirements(text):
+    return {"ecosystem": "python", "dependencies": _requirements(text.splitlines())}
+
+def parse_pyproject(text):
+    """Dependencies of a pyproject.toml: PEP 621 dependencies, optional dependencies and groups, and Poetry's."""
+    data = tomllib.loads(text)
+    project = data.get("project", {})
+    lines = list(project.get("dependencies", []))
+    for group in project.get("optional-dependencies", {}).values():
+        lines.extend(group)
+    for group in data.get("dependency-groups", {}).values():
+        lines.extend(item for item in group if isinstance(item, str))  # Skip `{include-group = ...}`
+    dependencies = _requirements(lines)
+    poetry = data.get("tool", {}).get("poetry", {})
+    for table in [poetry.get("dependencies", {})] + [group.get("dependencies", {}) for group in poetry.get("group", {}).values()]:
+        for name, spec in table.items():
+            if name.lower() != "python":
+                dependencies[normalize_name(name)] = spec if isinstance(spec, str) else spec.get("version", "")
+    return {"ecosystem": "python", "dependencies": dependencies}
+
+def parse_uv_lock(text):
+    packages = tomllib.loads(text).get("package", [])
+    return {
+        "ecosystem": "python",
+        "locked": {normalize_name(package["name"]): str(package["version"]) for package in packages if "version" in package},
+    }
+
+def parse_package_json(text):
+    data = json.loads(text)
+    dependencies = {}
+    for key in ("dependencies", "devDependencies"):
+        dependencies.update({name: str(spec) for name, spec in (data.get(key) or {}).items()})
+    return {"ecosystem": "node", "dependencies": dependencies}
+
+def parse_package_lock(text):
+    data = json.loads(text)
+    locked = {}
+    for path, package in (data.get("packages") or {}).items():
+        # Only top-level installs; nested node_modules hold other versions for particular dependents
+        if path.count("node_modules/") == 1 and "version" in package:
+            locked[path.split("node_modules/")[-1]] = package["version"]
+    for name, package in (data.get("dependencies") or {}).items():  # Lockfile version 1
+        locked.setdefault(name, package.get("version"))
+    return {"ecosystem": "node", "locked": {name: version for name, version in locked.items() if version}}
+
+def parse_cargo_toml(text):
+    data = tomllib.loads(text)
+    tables = [data.get(key, {}) for key in ("dependencies", "dev-dependencies", "build-dependencies")]
+    tables.append(data.get("workspace", {}).get("dependencies", {}))
+    dependencies = {}
+    for table in tables:
+        for name, spec in table.items():
+            if isinstance(spec, dict):
+                if "version" not in spec:
+                    continue  # Path and git dependencies
+                name, spec = spec.get("package", name), spec["version"]
+            dependencies[name] = str(spec)
+    return {"ecosystem": "rust", "dependencies": dependencies}
+
+def parse_cargo_lock(text):
+    packages = tomllib.loads(text).get("package", [])
+    return {"ecosystem": "rust", "locked": {package["name"]: str(package["version"]) for package in packages if "version" in package}}
+
+def parse_go_mod(text):
+    """Direct requirements of a go.mod, whose versions are exact."""
+    locked = {}
+    in_block = False
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("require ("):
+            in_block = True
+            continue
+        if in_block and line.startswith(")"):
+            in_block = False
+            continue
+        if line.startswith("require "):
+            line = line[len("require "):]
+        elif not in_block:
+            continue
+        if "// indirect" in line:
+            continue
+        parts = line.split("//")[0].split()
+        if len(parts) >= 2:
+            locked[parts[0]] = parts[1].lstrip("v").split("+")[0]
+    return {"ecosystem": "go", "dependencies": {name: "" for name in locked}, "locked": locked}
+
+
+def is_requirements_file(filename):
+    return filename.endswith(".txt") and filename.startswith("requirements") or filename.endswith(".requirements.txt")
+
+# Parsers by file name; requirements files are matched by `is_requirements_file`
+PARSERS = {
+    "pyproject.toml": parse_pyproject,
+    "uv.lock": parse_uv_lock,
+    "package.json": parse_package_json,
+    "package-lock.json": parse_package_lock,
+    "Cargo.toml": parse_cargo_toml,
+    "Cargo.lock": parse_cargo_lock,
+    "go.mod": parse_go_mod,
+}
+
+def parser_for(filename):
+    """The parser for a dependency file, or None if it isn't one."""
+    if is_requirements_file(filename):
+        return parse_requirements
+    return PARSERS.get(filename)
@@ -1,4 +1,5 @@
-from docs_agent.helpers.chromadb import ChromaDB, DB
+from docs_agent.helpers.chromadb import DB, default_db
+from docs_agent.helpers.manifest import Manifest
 from datetime import datetime
 
 class Element:
@@ -7,20 +8,21 @@ class Element:
     Also holds version info and handles save/load.
     """
     
-    default_manifest_location = ".docs/elements.yaml"
-    default_db = ChromaDB
+    default_manifest_location = Manifest.default_location
+    preview_length = 2000  # Characters of content stored with the element itself; the full text is stored as chunks
 
-    def __init__(self, name: str, version: str, content: str, manifest_location: str = default_manifest_location, db: DB = default_db):
+    def __init__(self, name: str, version: str, content: str, manifest_location: str = default_manifest_location, db: DB = None):
         self.name = name
         self.version = version
         self.content = content
         self.manifest_location = manifest_location
-        self.db = db
+        self.db = db or default_db()
         self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     def to_dict(self):
         """
         Convert the element to a dictionary format suitable for saving to YAML or ChromaDB.
+        Only a preview of the content is included; see `IndexPipeline` for the full, chunked text.
         """
         return {
             'ids': self.name,
@@ -29,8 +31,7 @@ class Element:
                 "version": self.version,
                 "updated_at": self.updated_at
             },
-            'documents': self.content,
-            # 'embeddings': [[0.0]*1536] # TODO: document embeddings
+            'documents': self.content[:self.preview_length],
         }
 
     def metadata(self):
@@ -43,26 +44,27 @@ class Element:
         self.save_yaml()
         self.db.save_element(self)
     
-    def save_yaml(self):
-        import yaml
-        # First read file if it exists
-        try:
-            with open(self.manifest_location, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f) or {}
-        except FileNotFoundError:
-            data = {}
-        # Append new element
-        data.update(self.metadata())  # Use metadata for YAML storage
-        # Write back to file
-        with open(self.manifest_location, "w", encoding="utf-8") as f:
-            yaml.safe_dump(data, f)
+    def save_yaml(self, manifest=None):
+        """
+        Record this element in its manifest file.
+        Pass a shared `Manifest` to batch many elements into one write; the caller then saves it.
+        """
+        if manifest is not None:
+            manifest.add(self)
+            return
+        manifest = Manifest(self.manifest_location)
+        manifest.add(self)
+        manifest.save()
 
     def __repr__(self):
         return f"Element(name={self.name}, version={self.version})"
     
     @staticmethod
     def from_file(filepath: str):
-        import yaml
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or []
-        return [Element(name=item["name"], version=item["version"], content=item["content"]) for item in data]
\ No newline at end of file
+        """Load the elements recorded in a manifest file."""
+        elements = []
+        for name, entry in Manifest(filepath).entries.items():
+            element = Element(name=name, version=str(entry["version"]), content=entry.get("content", ""), manifest_location=filepath)
+            element.updated_at = entry.get("updated_at", element.updated_at)
+            elements.append(element)
+        return elements
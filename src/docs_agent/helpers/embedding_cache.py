@@ -0,0 +1,218 @@
+import atexit
+import hashlib
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from platformdirs import user_cache_dir
+
+from docs_agent.helpers.log import logger
+
+
+def text_hash(text):
+    """Hash a chunk of text to key its embedding."""
+    return hashlib.sha256(text.encode("utf-8")).digest()[:16]
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of embeddings for one embedding model, keyed by a hash of the embedded text.
+    Lives in the user cache directory so that projects sharing libraries share embeddings.
+
+    Vectors are stored as fixed-size float32 slots in a memory-mapped `vectors.f32` file; a small
+    SQLite index maps text hashes to slots and tracks when each was last used. Past `max_entries`,
+    the least recently used entries are evicted and their slots reused.
+
+    Lookups only read. When entries were last used, and the hit and miss counters, are kept in memory
+    and written in one transaction by `flush()`: on the next write, once `max_pending` lookups have
+    built up, and on `close()` or exit.
+    """
+
+    default_directory = os.path.join(user_cache_dir("docs_agent"), "embeddings")
+    default_max_entries = 500_000
+    max_pending = 1024
+
+    def __init__(self, model, directory=default_directory, max_entries=None):
+        self.model = model
+        self.max_entries = int(max_entries or self.default_max_entries)
+        self.directory = os.path.join(directory, re.sub(r"[^\w.-]+", "_", model))
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.f32")
+        self._lock = threading.Lock()
+        self._map = None
+        self.hits = 0
+        self.misses = 0
+        self._used = {}  # Hash -> when it was last looked up, not yet written
+        self._pending_hits = 0
+        self._pending_misses = 0
+        # Transactions are managed explicitly; see `__transaction`
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite3"), check_same_thread=False, timeout=30, isolation_level=None)
+        with self.__transaction():
+            self._db.execute("CREATE TABLE IF NOT EXISTS entries (hash BLOB PRIMARY KEY, slot INTEGER NOT NULL, last_used REAL NOT NULL)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS free_slots (slot INTEGER PRIMARY KEY)")
+            self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        with open(self.vectors_path, "ab"):
+            pass  # Make sure the vectors file exists
+        atexit.register(self.flush)
+
+    @contextmanager
+    def __transaction(self):
+        """
+        A write transaction that takes SQLite's write lock up front, so reads within it (free slots,
+        the next slot, counters) can't interleave with another process's writes to the same cache.
+        """
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def __meta(self, key, default=0):
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def __set_meta(self, key, value):
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def __read_slot(self, slot, dim):
+        offset = slot * dim * 4
+        if self._map is None or len(self._map) < offset + dim * 4:
+            # The file has grown since it was mapped
+            if self._map is not None:
+                self._map.close()
+            with open(self.vectors_path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        vector = array("f")
+        vector.frombytes(self._map[offset:offset + dim * 4])
+        return vector.tolist()
+
+    def get_many(self, texts):
+        """Look up cached embeddings. Returns one vector per text, or None where there is no entry."""
+        hashes = [text_hash(text) for text in texts]
+        with self._lock:
+            dim = self.__meta("dim")
+            slots = {}
+            if dim:
+                for start in range(0, len(hashes), 500):
+                    batch = hashes[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    slots.update(self._db.execute(f"SELECT hash, slot FROM entries WHERE hash IN ({placeholders})", batch))
+            vectors = [self.__read_slot(slots[h], dim) if h in slots else None for h in hashes]
+            now = time.time()
+            self._used.update((h, now) for h in slots)
+            found = sum(vector is not None for vector in vectors)
+            self.hits += found
+            self.misses += len(vectors) - found
+            self._pending_hits += found
+            self._pending_misses += len(vectors) - found
+            if len(self._used) >= self.max_pending:
+                with self.__transaction():
+                    self.__flush()
+        return vectors
+
+    def flush(self):
+        """Write when entries were last used, and the hit and miss counters, to the index."""
+        with self._lock:
+            if self._used or self._pending_hits or self._pending_misses:
+                with self.__transaction():
+                    self.__flush()
+
+    def __flush(self):
+        self._db.executemany("UPDATE entries SET last_used = MAX(last_used, ?) WHERE hash = ?", [(used, h) for h, used in self._used.items()])
+        self.__set_meta("hits", self.__meta("hits") + self._pending_hits)
+        self.__set_meta("misses", self.__meta("misses") + self._pending_misses)
+        self._used = {}
+        self._pending_hits = self._pending_misses = 0
+
+    def put_many(self, texts, vectors):
+        """Store embeddings for texts, evicting the least recently used entries if the cache is full."""
+        if not texts:
+            return
+        # Slots are allocated, vectors written and entries inserted under one lock, across processes
+        with self._lock, self.__transaction(), open(self.vectors_path, "r+b") as f:
+            self.__flush()  # So eviction sees the latest lookups
+            dim = self.__meta("dim")
+            if not dim:
+                dim = len(vectors[0])
+                self.__set_meta("dim", dim)
+            now = time.time()
+            records = [(text_hash(text), vector) for text, vector in zip(texts, vectors) if len(vector) == dim]
+            if len(records) < len(texts):
+                logger.warning("Not caching %s embedding(s) of unexpected size (expected %s).", len(texts) - len(records), dim)
+            slots = {}
+            for h, _ in records:
+                row = self._db.execute("SELECT slot FROM entries WHERE hash = ?", (h,)).fetchone()
+                if row:
+                    slots[h] = row[0]
+            # Make room before allocating, so evicted slots are reused rather than growing the file
+            new_hashes = {h for h, _ in records} - slots.keys()
+            self.__evict(max(self.max_entries - len(new_hashes), 0))
+            for h, vector in records:
+                if h not in slots:
+                    slots[h] = self.__allocate_slot()
+                f.seek(slots[h] * dim * 4)
+                f.write(array("f", vector).tobytes())
+                self._db.execute("INSERT OR REPLACE INTO entries (hash, slot, last_used) VALUES (?, ?, ?)", (h, slots[h], now))
+
+    def __allocate_slot(self):
+        row = self._db.execute("SELECT slot FROM free_slots LIMIT 1").fetchone()
+        if row:
+            self._db.execute("DELETE FROM free_slots WHERE slot = ?", row)
+            return row[0]
+        slot = self.__meta("next_slot")
+        self.__set_meta("next_slot", slot + 1)
+        return slot
+
+    def __evict(self, max_entries=None):
+        """Evict least recently used entries past the size bound. Returns the number evicted."""
+        max_entries = self.max_entries if max_entries is None else max_entries
+        excess = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - max_entries
+        if excess <= 0:
+            return 0
+        evicted = self._db.execute("SELECT hash, slot FROM entries ORDER BY last_used LIMIT ?", (excess,)).fetchall()
+        self._db.executemany("DELETE FROM entries WHERE hash = ?", [(h,) for h, _ in evicted])
+        self._db.executemany("INSERT OR IGNORE INTO free_slots (slot) VALUES (?)", [(slot,) for _, slot in evicted])
+        logger.debug("Evicted %s embedding(s) from the '%s' cache.", len(evicted), self.model)
+        return len(evicted)
+
+    def prune(self, max_entries=None):
+        """Evict least recently used entries until at most `max_entries` remain."""
+        with self._lock, self.__transaction():
+            self.__flush()
+            return self.__evict(max_entries)
+
+    def stats(self):
+        """Report the number of entries, their storage size and bound, and persisted hit/miss counters."""
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            dim = self.__meta("dim")
+            return {
+                "entries": entries,
+                "bytes": os.path.getsize(self.vectors_path),
+                "max_bytes": self.max_entries * dim * 4,
+                "hits": self.__meta("hits") + self._pending_hits,
+                "misses": self.__meta("misses") + self._pending_misses,
+            }
+
+    @classmethod
+    def models(cls, directory=default_directory):
+        """List the embedding models with caches in a directory."""
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if os.path.isdir(os.path.join(directory, name)))
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._db.close()
@@ -0,0 +1,77 @@
+import logging
+
+from docs_agent.helpers.log import logger
+from docs_agent.helpers.profile import span
+
+
+def embedding_errors():
+    """Errors embedding can fail with: the server's errors, and not reaching it. Imports the Ollama client."""
+    import httpx
+    import ollama
+    return (ollama.ResponseError, ollama.RequestError, httpx.HTTPError, OSError)
+
+
+class Embedder:
+    """
+    Embeds text with the configured embedding model through the Ollama client,
+    sending texts in batches of at most `batch_size` per call.
+    Embeddings are looked up in, and saved to, a persistent `EmbeddingCache` unless `cache` is False.
+    """
+
+    default_batch_size = 32
+
+    def __init__(self, client=None, model=None, batch_size=None, cache=None):
+        self._client = client
+        self._model = model
+        self._cache = cache
+        self.batch_size = max(int(batch_size or self.default_batch_size), 1)
+
+    @property
+    def client(self):
+        """The Ollama client, initialized on first use."""
+        if self._client is None:
+            from docs_agent.agent import init_client
+            self._client, _ = init_client()
+        return self._client
+
+    @property
+    def model(self):
+        if self._model is None:
+            from docs_agent.config import get_settings
+            settings = get_settings()
+            self._model = settings.get("EMBEDDING_MODEL")
+        return self._model
+
+    @property
+    def cache(self):
+        """The embedding cache for this model, opened on first use. None if caching is disabled."""
+        if self._cache is None:
+            from docs_agent.config import get_settings
+            settings = get_settings()
+            if settings.get("EMBEDDING_CACHE"):
+                from docs_agent.helpers.embedding_cache import EmbeddingCache
+                self._cache = EmbeddingCache(self.model, max_entries=settings.get("EMBEDDING_CACHE_MAX_ENTRIES"))
+            else:
+                self._cache = False
+        return self._cache or None
+
+    def embed(self, texts):
+        """Embed a list of texts, returning one vector per text."""
+        with span("embed") as timed:
+            cache = self.cache
+            embeddings = cache.get_many(texts) if cache else [None] * len(texts)
+            missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if cache and texts and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Embedding cache: %s hit(s), %s miss(es).", len(texts) - len(missing), len(missing))
+            timed.set(texts=len(texts), cached=len(texts) - len(missing))
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start:start + self.batch_size]
+                with span("embed.request"):
+                    response = self.client.embed(model=self.model, input=[texts[i] for i in batch])
+                vectors = [list(vector) for vector in response["embeddings"]]
+                for i, vector in zip(batch, vectors):
+                    embeddings[i] = vector
+                if cache:
+                    cache.put_many([texts[i] for i in batch], vectors)
+                logger.debug("Embedded %s text(s) with '%s'.", len(batch), self.model)
+            return embeddings
@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from docs_agent.helpers.log import logger
+
+# Errors fetching a documentation source can fail with: network and HTTP errors, unreadable files and undecodable text
+fetch_errors = (requests.RequestException, OSError, UnicodeDecodeError)
+
+
+def is_url(url_or_path):
+    """Check whether a documentation source is a URL rather than a file path."""
+    return url_or_path.startswith("http://") or url_or_path.startswith("https://")
+
+
+class Fetcher:
+    """
+    Bounded, thread-pooled fetcher for documentation sources (URLs or file paths).
+    Shares one keep-alive HTTP session across workers, limits concurrent requests per host,
+    and retries transient failures with exponential backoff.
+    With a `ResponseCache`, URLs are fetched with conditional requests; sources whose body
+    didn't change (a 304, or an identical body) are collected in `unchanged`.
+    """
+
+    default_jobs = 4
+    default_per_host = 2
+    default_timeout = 10.0
+    default_retries = 3
+    default_backoff = 0.5
+    retry_statuses = (429, 500, 502, 503, 504)
+
+    def __init__(self, jobs=None, per_host=None, timeout=None, retries=None, backoff=None, cache=None):
+        self.jobs = max(int(jobs or self.default_jobs), 1)
+        self.per_host = max(int(per_host or self.default_per_host), 1)
+        self.timeout = timeout if timeout is not None else self.default_timeout
+        retries = retries if retries is not None else self.default_retries
+        backoff = backoff if backoff is not None else self.default_backoff
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.retry_statuses,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+        )
+        adapter = HTTPAdapter(pool_connections=self.jobs, pool_maxsize=self.jobs, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+        self.cache = cache
+        self.unchanged = set()
+
+    def __host_limit(self, url):
+        """Get the semaphore bounding concurrent requests to the URL's host."""
+        host = urlparse(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def fetch(self, url_or_path):
+        """Fetch the text of a single URL or file path."""
+        if is_url(url_or_path):
+            return self.__fetch_url(url_or_path)
+        with open(url_or_path, "r", encoding="utf-8") as file:
+            return file.read()
+
+    def __fetch_url(self, url):
+        """Fetch a URL, revalidating against the response cache if there is one."""
+        headers = self.cache.conditional_headers(url) if self.cache else {}
+        with self.__host_limit(url):
+            response = self.session.get(url, timeout=self.timeout, headers=headers)
+            if response.status_code == 304:
+                text = self.cache.read(url)
+                if text is not None:
+                    logger.debug("'%s' not modified; using cached copy.", url)
+                    self.unchanged.add(url)
+                    return text
+                # Cached body went missing; fall back to a full download
+                response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        text = response.text
+        if self.cache and not self.cache.store(url, response.headers, text):
+            logger.debug("'%s' downloaded but unchanged.", url)
+            self.unchanged.add(url)
+        return text
+
+    def fetch_all(self, sources):
+        """
+        Fetch many sources concurrently.
+        `sources` maps arbitrary keys to URLs or paths. Returns a dict mapping each key to the
+        fetched text, or to the exception raised while fetching it.
+        """
+        results = {}
+        if not sources:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.jobs, len(sources))) as executor:
+            futures = {executor.submit(self.fetch, source): key for key, source in sources.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except fetch_errors as e:
+                    logger.debug("Failed to fetch '%s': %s", sources[key], e)
+                    results[key] = e
+        return results
+
+    def close(self):
+        """Close the pooled HTTP session and persist the response cache."""
+        self.session.close()
+        if self.cache:
+            self.cache.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from docs_agent.helpers.log import logger
+
+
+def content_hash(text):
+    """Hash documentation text so unchanged bodies can be recognised."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk cache of fetched documentation, keyed by URL.
+    Stores each body alongside its ETag/Last-Modified headers and content hash, so fetches
+    can be sent as conditional requests and unchanged bodies recognised.
+    Total body size is bounded; least recently used entries are evicted first.
+    """
+
+    default_directory = os.path.join(".docs", "cache", "http")
+    default_max_bytes = 256 * 1024 * 1024
+
+    def __init__(self, directory=default_directory, max_bytes=None):
+        self.directory = directory
+        self.max_bytes = int(max_bytes or self.default_max_bytes)
+        self.index_path = os.path.join(self.directory, "index.json")
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries, self.counters = self.__load()
+
+    def __load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("entries", {}), data.get("counters", {"hits": 0, "misses": 0})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}, {"hits": 0, "misses": 0}
+
+    def __body_path(self, url):
+        return os.path.join(self.directory, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".txt")
+
+    def conditional_headers(self, url):
+        """Get the headers for a conditional request revalidating a cached URL."""
+        entry = self.entries.get(url)
+        if entry is None or not os.path.exists(self.__body_path(url)):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read(self, url):
+        """Read a cached body, recording a hit. Returns None if it isn't cached."""
+        if url not in self.entries:
+            return None
+        try:
+            with open(self.__body_path(url), "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self.entries[url]["accessed"] = time.time()
+            self.counters["hits"] += 1
+            self._dirty = True
+        return text
+
+    def store(self, url, headers, text):
+        """
+        Store a freshly downloaded body and its validators.
+        Returns True if the body changed since it was last cached.
+        """
+        digest = content_hash(text)
+        with self._lock:
+            previous = self.entries.get(url)
+            changed = previous is None or previous.get("sha256") != digest
+            self.counters["misses" if changed else "hits"] += 1
+            self.entries[url] = {
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified"),
+                "sha256": digest,
+                "size": len(text.encode("utf-8")),
+                "accessed": time.time(),
+            }
+            self._dirty = True
+        if changed or not os.path.exists(self.__body_path(url)):
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.__body_path(url), "w", encoding="utf-8") as f:
+                f.write(text)
+        return changed
+
+    def size(self):
+        """Total size in bytes of all cached bodies."""
+        return sum(entry.get("size", 0) for entry in self.entries.values())
+
+    def prune(self, max_bytes=None):
+        """
+        Evict least recently used entries until the cache fits in `max_bytes`,
+        and remove body files no longer referenced by the index. Returns the number of entries evicted.
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = 0
+        with self._lock:
+            total = self.size()
+            for url, entry in sorted(self.entries.items(), key=lambda item: item[1].get("accessed", 0)):
+                if total <= max_bytes:
+                    break
+                total -= entry.get("size", 0)
+                del self.entries[url]
+                evicted += 1
+                self._dirty = True
+            referenced = {os.path.basename(self.__body_path(url)) for url in self.entries}
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                if filename.endswith(".txt") and filename not in referenced:
+                    os.remove(os.path.join(self.directory, filename))
+        if evicted:
+            logger.debug("Evicted %s entries from the HTTP cache.", evicted)
+        return evicted
+
+    def stats(self):
+        """Report the number of entries, their total size, the size bound and hit/miss counters."""
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size(),
+            "max_bytes": self.max_bytes,
+            **self.counters,
+        }
+
+    def save(self):
+        """Enforce the size bound and atomically write the index, if anything changed."""
+        self.prune()
+        if not self._dirty:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with self._lock:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": self.entries, "counters": self.counters}, f)
+            os.replace(temp_path, self.index_path)
+            self._dirty = False
@@ -0,0 +1,127 @@
+import re
+import sqlite3
+import threading
+
+from docs_agent.helpers.log import logger
+
+# Identifiers, dotted paths, flags and error codes are kept whole so they match as phrases
+TERM_PATTERN = re.compile(r"\w+(?:[.:/-]+\w+)*")
+IDENTIFIER_PATTERN = re.compile(
+    r"^(?:-{1,2}[\w-]+"  # Command line flags
+    r"|[\w.:/]*[_.:/][\w.:/]*(?:\(\))?"  # snake_case, dotted.paths, a::b, calls()
+    r"|\w*[a-z][A-Z]\w*"  # camelCase
+    r"|[A-Z]+\d+\w*"  # Error codes like E501
+    r")$"
+)
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how", "i", "if", "in",
+    "is", "it", "me", "my", "of", "on", "or", "should", "so", "that", "the", "this", "to", "use", "using",
+    "what", "when", "where", "which", "who", "why", "will", "with", "you", "your",
+})
+COLUMNS = ("id", "name", "version", "chunk")
+
+
+def query_terms(text):
+    """Search terms in a query, without common English words."""
+    return [term for term in TERM_PATTERN.findall(text) if term.lower() not in STOPWORDS]
+
+def is_identifier_query(text):
+    """Check whether a query is nothing but a few identifiers, flags or error codes."""
+    words = text.strip().strip("`'\"?").split()
+    return 0 < len(words) <= 3 and all(IDENTIFIER_PATTERN.match(word.strip("`'\",?")) for word in words)
+
+def where_clause(where):
+    """
+    Translate a ChromaDB metadata filter (equality, `$ne`, `$gte`, `$lte`, `$in`, `$and`, `$or`)
+    on chunk name, version or number into an SQL condition and parameters.
+    """
+    if not where:
+        return "1", []
+    clauses, params = [], []
+    for key, value in where.items():
+        if key in ("$and", "$or"):
+            parts = [where_clause(condition) for condition in value]
+            clauses.append("(" + f" {key[1:].upper()} ".join(sql for sql, _ in parts) + ")")
+            params.extend(param for _, part_params in parts for param in part_params)
+            continue
+        if key not in COLUMNS:
+            raise ValueError(f"Cannot filter lexical search on '{key}'.")
+        operator, operand = next(iter(value.items())) if isinstance(value, dict) else ("$eq", value)
+        if operator == "$in":
+            clauses.append(f"{key} IN ({','.join('?' * len(operand))})")
+            params.extend(operand)
+        else:
+            sql_operator = {"$eq": "=", "$ne": "!=", "$gte": ">=", "$lte": "<=", "$gt": ">", "$lt": "<"}[operator]
+            clauses.append(f"{key} {sql_operator} ?")
+            params.append(operand)
+    return " AND ".join(clauses), params
+
+
+class LexicalIndex:
+    """
+    Full-text index of documentation chunks (SQLite FTS5), ranked by BM25.
+    Kept alongside the ChromaDB chunk collection and updated with it, so exact matches on
+    function names, flags and error codes can be found without embedding the query.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._db:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+                "id UNINDEXED, name UNINDEXED, version UNINDEXED, chunk UNINDEXED, document, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def upsert(self, ids, documents, metadatas):
+        """Add or replace chunks."""
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM chunks WHERE id = ?", [(id,) for id in ids])
+            self._db.executemany(
+                "INSERT INTO chunks (id, name, version, chunk, document) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (id, metadata["name"], str(metadata["version"]), metadata["chunk"], document)
+                    for id, document, metadata in zip(ids, documents, metadatas)
+                ],
+            )
+
+    def delete(self, where):
+        """Delete the chunks matching a metadata filter."""
+        sql, params = where_clause(where)
+        with self._lock, self._db:
+            self._db.execute(f"DELETE FROM chunks WHERE {sql}", params)
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def search(self, query, count=4, where=None):
+        """
+        Find the chunks best matching the query's terms, optionally filtered by metadata.
+        Returns a list of dicts of id, document, metadata and BM25 score (lower is better), best first.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        sql, params = where_clause(where)
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    f"SELECT id, name, version, chunk, document, bm25(chunks) AS score FROM chunks "
+                    f"WHERE chunks MATCH ? AND {sql} ORDER BY score LIMIT ?",
+                    [match, *params, count],
+                ).fetchall()
+            except sqlite3.OperationalError as e:
+                logger.debug("Lexical search for %r failed: %s", match, e)
+                return []
+        return [
+            {"id": id, "document": document, "metadata": {"name": name, "version": version, "chunk": chunk}, "score": score}
+            for id, name, version, chunk, document, score in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
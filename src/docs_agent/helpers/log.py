@@ -1,37 +1,116 @@
+import json
 import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
 from docs_agent import __log_level__
 
-# Custom filter -- we want to separate logs for stdout and stderr
-class CustomLevelsFilter(logging.Filter):
-    def __init__(self, low, high):
+text_format = '%(name)s: (%(levelname)s) %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, for log collectors."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class ConsoleHandler(logging.Handler):
+    """
+    Writes info messages to stdout as plain text, and everything else to stderr prefixed with the
+    logger name and level. In JSON mode, every record goes to stderr as JSON.
+    Streams are looked up when each record is written, so redirection after import is respected.
+    """
+
+    def __init__(self, json_mode=False):
         super().__init__()
-        self.low = low
-        self.high = high
-    
-    def filter(self, record):
-        return self.low <= record.levelno <= self.high
+        self.set_json(json_mode)
+
+    def set_json(self, json_mode):
+        self.json_mode = json_mode
+        self.setFormatter(JsonFormatter() if json_mode else logging.Formatter(text_format))
+        self.info_formatter = self.formatter if json_mode else logging.Formatter('%(message)s')
+
+    def emit(self, record):
+        try:
+            if record.levelno == logging.INFO and not self.json_mode:
+                stream, message = sys.stdout, self.info_formatter.format(record)
+            else:
+                stream, message = sys.stderr, self.format(record)
+            stream.write(message + "\n")
+            stream.flush()
+        except (OSError, ValueError, TypeError, KeyError):  # Closed streams and bad format arguments
+            self.handleError(record)
+
+
+class DeferredHandler(QueueHandler):
+    """
+    Hands debug records to a background `QueueListener` without formatting them, so debug logging
+    on hot paths costs a queue put. Info and higher are written straight away, keeping
+    user-facing messages in order with the rest of the program's output.
+    The listener thread is only started once a debug record is actually logged.
+    """
+
+    def __init__(self, target):
+        super().__init__(queue.Queue())  # Tracks unfinished records, so `flush()` can wait for them
+        self.target = target
+        self.listener = None
+
+    def prepare(self, record):
+        return record  # Formatted by the listener; records never leave the process
+
+    def emit(self, record):
+        if record.levelno >= logging.INFO:
+            self.flush()  # Earlier debug records first
+            self.target.handle(record)
+            return
+        if self.listener is None:
+            self.listener = QueueListener(self.queue, self.target)
+            self.listener.start()
+        super().emit(record)
+
+    def flush(self):
+        """Wait until every queued record has been written."""
+        if self.listener is not None:
+            self.queue.join()  # The listener marks each record done once handled
+
+    def close(self):
+        # Called by `logging.shutdown` at exit, after a final flush
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+        super().close()
+
+
+def _level(name):
+    level = logging.getLevelName(str(name).strip().upper())
+    return level if isinstance(level, int) else logging.INFO
+
+def configure(level=None, format=None):
+    """
+    Set the log level (a name such as "DEBUG" or "WARNING") and format ("text" or "json").
+    Called with the `LOG_LEVEL` and `LOG_FORMAT` config options once configuration is loaded.
+    """
+    if level:
+        logger.setLevel(_level(level))
+    if format:
+        console_handler.set_json(str(format).strip().lower() == "json")
 
 logger = logging.getLogger("docs_agent")
 
-# Log error and higher to stderr
-stderr_handler = logging.StreamHandler()
-stderr_handler.setLevel(logging.WARNING)
-stderr_handler.addFilter(CustomLevelsFilter(logging.WARNING, logging.CRITICAL))
-stderr_handler.setFormatter(logging.Formatter('%(name)s: (%(levelname)s) %(message)s'))
-
-# Log info and higher to stdout
-stdout_handler = logging.StreamHandler()
-stdout_handler.setLevel(logging.INFO)
-stdout_handler.addFilter(CustomLevelsFilter(logging.INFO, logging.INFO))
-stdout_handler.setFormatter(logging.Formatter('%(message)s'))
-
-debug_handler = logging.StreamHandler()
-debug_handler.setLevel(logging.DEBUG)
-debug_handler.addFilter(CustomLevelsFilter(logging.DEBUG, logging.DEBUG))
-debug_handler.setFormatter(logging.Formatter('%(name)s: (%(levelname)s) %(message)s'))
-
-# Add handlers to logger
-logger.addHandler(stderr_handler)
-logger.addHandler(stdout_handler)
-logger.addHandler(debug_handler)
-logger.setLevel(getattr(logging, __log_level__.upper(), logging.DEBUG))
\ No newline at end of file
+console_handler = ConsoleHandler()
+deferred_handler = DeferredHandler(console_handler)
+logger.addHandler(deferred_handler)
+# Environment variables apply from the start; config files are applied once configuration is loaded
+logger.setLevel(_level(os.environ.get("LOG_LEVEL", __log_level__)))
+console_handler.set_json(os.environ.get("LOG_FORMAT", "").strip().lower() == "json")
@@ -0,0 +1,143 @@
+import json
+import os
+import threading
+
+from docs_agent.helpers.log import logger
+
+# Parsed manifests for this process, keyed by path, with the (mtime, size) they were parsed at
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _normalize(data):
+    """
+    Convert any manifest layout to a name -> entry mapping. Besides the current `{name: {version, ...}}`
+    layout, accepts a list of entries and the single flat entry written by older releases.
+    """
+    if not data:
+        return {}
+    if isinstance(data, list):
+        return {str(item["name"]): dict(item) for item in data}
+    if isinstance(data.get("name"), str) and "version" in data:
+        return {data["name"]: dict(data)}
+    return {str(name): {"name": str(name), **(entry or {})} for name, entry in data.items()}
+
+
+class Manifest:
+    """
+    The element manifest (`.docs/elements.yaml`), keyed by element name.
+    Changes are collected in memory and written with a single atomic write by `save()`.
+    Loading is served from a JSON sidecar while the YAML file's mtime and size still match
+    the ones the sidecar was built from, so the YAML is only parsed after it changes.
+    """
+
+    default_location = os.path.join(".docs", "elements.yaml")
+    header = "# Languages, libraries, frameworks and tools in use\n"
+
+    def __init__(self, location=default_location):
+        self.location = str(location)
+        directory, filename = os.path.split(self.location)
+        self.sidecar_location = os.path.join(directory, f".{filename}.json")
+        self._entries = None
+        self._dirty = False
+
+    @property
+    def entries(self):
+        """Manifest entries keyed by element name, loaded on first use."""
+        if self._entries is None:
+            self._entries = self.__load()
+        return self._entries
+
+    def __load(self):
+        try:
+            key = _stat_key(self.location)
+        except FileNotFoundError:
+            return {}
+        with _parsed_lock:
+            parsed = _parsed.get(self.location)
+        if parsed is None or parsed[0] != key:
+            parsed = (key, self.__load_sidecar(key) or self.__parse(key))
+            with _parsed_lock:
+                _parsed[self.location] = parsed
+        return {name: dict(entry) for name, entry in parsed[1].items()}
+
+    def __load_sidecar(self, key):
+        try:
+            with open(self.sidecar_location, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return data["entries"] if data.get("stat") == key else None
+
+    def __parse(self, key):
+        import yaml
+        logger.debug("Parsing manifest %s...", self.location)
+        with open(self.location, "r", encoding="utf-8") as f:
+            entries = _normalize(yaml.safe_load(f))
+        self.__write_sidecar(key, entries)
+        return entries
+
+    def __write_sidecar(self, key, entries):
+        temp_path = f"{self.sidecar_location}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"stat": key, "entries": entries}, f)
+            os.replace(temp_path, self.sidecar_location)
+        except OSError as e:
+            logger.debug("Could not write manifest cache %s: %s", self.sidecar_location, e)
+
+    def get(self, name):
+        return self.entries.get(name)
+
+    def add(self, element):
+        """Add or replace an element's entry. Written on the next `save()`."""
+        self.entries[element.name] = element.metadata()
+        self._dirty = True
+
+    def record(self, name, version, **fields):
+        """Add or update an entry without an `Element`, keeping its other fields (such as `updated_at`)."""
+        entry = self.entries.get(name, {"name": name})
+        updated = {**entry, **fields, "name": name, "version": version}
+        if updated != entry:
+            self.entries[name] = updated
+            self._dirty = True
+
+    def remove(self, name):
+        if self.entries.pop(name, None) is not None:
+            self._dirty = True
+
+    def versions(self):
+        """Map each element name to its version."""
+        return {name: str(entry["version"]) for name, entry in self.entries.items()}
+
+    def save(self):
+        """Atomically write the manifest, if anything changed."""
+        if not self._dirty:
+            return
+        import yaml
+        directory = os.path.dirname(self.location) or "."
+        os.makedirs(directory, exist_ok=True)
+        data = {name: {k: v for k, v in entry.items() if k not in ("name", "content")} for name, entry in self.entries.items()}
+        temp_path = f"{self.location}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.header)
+            yaml.safe_dump(data, f, sort_keys=True)
+        os.replace(temp_path, self.location)
+        key = _stat_key(self.location)
+        entries = {name: dict(entry) for name, entry in self.entries.items()}
+        with _parsed_lock:
+            _parsed[self.location] = (key, entries)
+        self.__write_sidecar(key, entries)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.save()
@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+import time
+
+from platformdirs import user_cache_dir
+
+from docs_agent.helpers.log import logger
+
+
+def model_tag(model_name):
+    """Fully qualified name of a model, as listed by Ollama."""
+    return f"{model_name}:latest" if ":" not in model_name else model_name
+
+
+class ModelCache:
+    """
+    On-disk cache of the models available on each Ollama server, mapping model names to digests.
+    Entries are fresh for `ttl` seconds; while fresh, model availability is answered without
+    contacting the server. A refresh lists the server's models in a single call.
+    """
+
+    default_directory = os.path.join(user_cache_dir("docs_agent"), "models")
+    default_ttl = 3600
+
+    def __init__(self, directory=default_directory, ttl=None):
+        self.directory = directory
+        self.ttl = int(ttl if ttl is not None else self.default_ttl)
+        self.path = os.path.join(self.directory, "models.json")
+        self._lock = threading.Lock()
+
+    def __load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def entry(self, host):
+        """Get the cached entry for a server (`models` and `checked_at`), or None if there is none."""
+        return self.__load().get(host)
+
+    def is_fresh(self, entry):
+        return entry is not None and time.time() - entry.get("checked_at", 0) < self.ttl
+
+    def get(self, host):
+        """Get the cached name -> digest mapping for a server, or None if it is missing or stale."""
+        entry = self.entry(host)
+        return entry["models"] if self.is_fresh(entry) else None
+
+    def store(self, host, models):
+        """Atomically record the models available on a server."""
+        with self._lock:
+            data = self.__load()
+            data[host] = {"models": models, "checked_at": time.time()}
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+
+    def refresh(self, client, host):
+        """List the server's models in one call and cache them. Returns the name -> digest mapping."""
+        logger.debug("Listing models available at %s...", host)
+        models = {model["model"]: model["digest"] for model in client.list()["models"]}
+        self.store(host, models)
+        return models
+
+    def revalidate(self, client, host):
+        """Refresh the cache in a background thread. Failures are logged, not raised."""
+        def run():
+            import httpx
+            import ollama
+            try:
+                self.refresh(client, host)
+            except (ollama.ResponseError, httpx.HTTPError, OSError) as e:
+                logger.debug("Background model revalidation failed: %s", e)
+        thread = threading.Thread(target=run, name="model-revalidation")
+        thread.start()
+        return thread
@@ -0,0 +1,62 @@
+import threading
+import time
+
+
+class BufferedWriter:
+    """
+    Buffers streamed text and writes it to `stream` in batches: once `max_chars` are buffered or
+    `interval` seconds have passed since the last flush, whichever comes first. A timer flushes text
+    that is still waiting when the interval is up, so it appears on time even if the stream stalls.
+    Keeps terminal output responsive without a write and flush per token. Use as a context manager,
+    or call `flush()` when done.
+    """
+
+    default_interval = 0.05
+    default_max_chars = 4096
+
+    def __init__(self, stream, interval=None, max_chars=None):
+        self.stream = stream
+        self.interval = interval if interval is not None else self.default_interval
+        self.max_chars = max_chars or self.default_max_chars
+        self._parts = []
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()  # The timer flushes from its own thread
+        self._timer = None
+
+    def write(self, text):
+        with self._lock:
+            self._parts.append(text)
+            self._size += len(text)
+            if self._size >= self.max_chars or time.monotonic() - self._last_flush >= self.interval:
+                self.__flush()
+            elif self._timer is None:
+                self._timer = threading.Timer(self._last_flush + self.interval - time.monotonic(), self.__on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self.__flush()
+
+    def __on_timer(self):
+        with self._lock:
+            if self._timer is threading.current_thread():  # Not already flushed, or superseded by another timer
+                self.__flush()
+
+    def __flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._parts:
+            self.stream.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+        self.stream.flush()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
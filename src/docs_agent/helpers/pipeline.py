@@ -0,0 +1,74 @@
+from docs_agent.helpers.chunking import iter_chunks, iter_text
+from docs_agent.helpers.embeddings import Embedder
+from docs_agent.helpers.log import logger
+
+
+class IndexPipeline:
+    """
+    Streams an element's documentation through incremental parsing, token-aware chunking with
+    overlap, batched embedding and batched upserts into the DB's chunk collection.
+    At most one batch of chunks is held in memory, whatever the size of the documentation.
+    """
+
+    default_chunk_tokens = 512
+    default_overlap_tokens = 64
+    default_batch_size = 32
+
+    def __init__(self, db, embedder=None, chunk_tokens=None, overlap_tokens=None, batch_size=None):
+        from docs_agent.config import get_settings
+        settings = get_settings()
+        self.db = db
+        self.embedder = embedder or Embedder(batch_size=settings.get("EMBED_BATCH_SIZE"))
+        self.chunk_tokens = int(chunk_tokens or settings.get("CHUNK_TOKENS") or self.default_chunk_tokens)
+        self.overlap_tokens = int(overlap_tokens if overlap_tokens is not None else settings.get("CHUNK_OVERLAP") or self.default_overlap_tokens)
+        self.batch_size = int(batch_size or settings.get("EMBED_BATCH_SIZE") or self.default_batch_size)
+
+    def index(self, element, pieces):
+        """
+        Index streamed documentation pieces for an element, replacing its previous chunks.
+        Returns the per-stage progress counters.
+        """
+        progress = {"parsed": 0, "chunked": 0, "embedded": 0, "upserted": 0}
+
+        def parsed(texts):
+            for text in texts:
+                progress["parsed"] += len(text)
+                yield text
+
+        batch = []
+        for chunk in iter_chunks(parsed(iter_text(pieces)), self.chunk_tokens, self.overlap_tokens):
+            batch.append(chunk)
+            progress["chunked"] += 1
+            if len(batch) >= self.batch_size:
+                self.__flush(element, batch, progress)
+                batch = []
+        if batch:
+            self.__flush(element, batch, progress)
+
+        # Drop chunks left over from a longer, older copy of the documentation
+        self.db.delete_chunks(element.name, element.version, start=progress["upserted"])
+        logger.debug(
+            "Indexed '%s-%s': parsed %s characters, chunked %s, embedded %s, upserted %s.",
+            element.name, element.version, progress['parsed'], progress['chunked'], progress['embedded'], progress['upserted'],
+        )
+        return progress
+
+    def __flush(self, element, batch, progress):
+        """Embed and upsert one batch of chunks."""
+        start = progress["upserted"]
+        embeddings = self.embedder.embed(batch)
+        progress["embedded"] += len(embeddings)
+        self.db.save_chunks(
+            ids=[self.db.chunk_id(element.name, element.version, start + i) for i in range(len(batch))],
+            documents=batch,
+            embeddings=embeddings,
+            metadatas=[
+                {"name": element.name, "version": element.version, "chunk": start + i, "updated_at": element.updated_at}
+                for i in range(len(batch))
+            ],
+        )
+        progress["upserted"] += len(batch)
+        logger.debug(
+            "'%s-%s': chunked %s, embedded %s, upserted %s so far.",
+            element.name, element.version, progress['chunked'], progress['embedded'], progress['upserted'],
+        )
@@ -0,0 +1,190 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+# The active profiler, or None while profiling is disabled
+_profiler = None
+
+
+class Span:
+    """A timed stage. Attributes (counts, rates) can be attached while it runs with `set()`."""
+
+    def __init__(self, profiler, name, attributes):
+        self.profiler = profiler
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+        self.duration = None
+        self.depth = 0
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.depth = self.profiler._enter()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.profiler._exit(self)
+
+
+class _NullSpan:
+    """Stands in for a span while profiling is disabled."""
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+class Profiler:
+    """
+    Collects timed spans for one command. Spans nest per thread; finished spans are kept in `spans`
+    in the order they finish. `report()` prints a per-stage breakdown, and `write()` saves the spans
+    as JSON lines (appended) or as a Prometheus textfile (replaced), chosen by the file extension.
+    """
+
+    def __init__(self, command=None):
+        self.command = command
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def span(self, name, **attributes):
+        return Span(self, name, attributes)
+
+    def _enter(self):
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        return depth
+
+    def _exit(self, span):
+        self._local.depth = span.depth
+        with self._lock:
+            self.spans.append(span)
+
+    def stages(self):
+        """Aggregate spans by name, in the order stages first started: calls, total and max seconds, and depth."""
+        stages = {}
+        for span in sorted(self.spans, key=lambda span: span.start):
+            stage = stages.setdefault(span.name, {"calls": 0, "total": 0.0, "max": 0.0, "depth": span.depth})
+            stage["calls"] += 1
+            stage["total"] += span.duration
+            stage["max"] = max(stage["max"], span.duration)
+            stage["depth"] = min(stage["depth"], span.depth)
+        return stages
+
+    def report(self, stream):
+        """Print the stage breakdown, then time to first token and tokens/sec for each model response."""
+        total = (time.perf_counter() - self.start) * 1000
+        print(f"Profile ({total:.1f} ms total):", file=stream)
+        print(f"  {'stage':<36} {'calls':>5} {'total ms':>10} {'max ms':>10}", file=stream)
+        for name, stage in self.stages().items():
+            label = "  " * stage["depth"] + name
+            print(f"  {label:<36} {stage['calls']:>5} {stage['total'] * 1000:>10.1f} {stage['max'] * 1000:>10.1f}", file=stream)
+        for span in self.__generations():
+            details = [f"{span.attributes['ttft_ms']:.1f} ms to first token"] if "ttft_ms" in span.attributes else []
+            if "tokens_per_s" in span.attributes:
+                details.append(f"{span.attributes['tokens']} tokens at {span.attributes['tokens_per_s']:.1f} tokens/sec")
+            print(f"  {span.name}: {', '.join(details)}", file=stream)
+
+    def __generations(self):
+        """Spans of model responses, which carry time to first token and/or a token rate."""
+        return [span for span in self.spans if "ttft_ms" in span.attributes or "tokens_per_s" in span.attributes]
+
+    def records(self):
+        """The spans as JSON-serializable dicts, with start times in seconds since the profiler started."""
+        return [
+            {
+                "run_id": self.run_id,
+                "command": self.command,
+                "name": span.name,
+                "start_s": span.start - self.start,
+                "duration_s": span.duration,
+                "depth": span.depth,
+                **({"attributes": span.attributes} if span.attributes else {}),
+            }
+            for span in self.spans
+        ]
+
+    def write(self, path):
+        """Write the spans to `path`: a Prometheus textfile if it ends in `.prom`, otherwise appended JSON lines."""
+        if path.endswith(".prom"):
+            self.__write_prometheus(path)
+            return
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps({"timestamp": self.started_at, **record}) + "\n" for record in self.records())
+
+    def __write_prometheus(self, path):
+        command = self.command or ""
+        lines = [
+            "# HELP docs_agent_stage_seconds Time spent in each stage by the most recent command.",
+            "# TYPE docs_agent_stage_seconds gauge",
+        ]
+        stages = self.stages()
+        for name, stage in stages.items():
+            lines.append(f'docs_agent_stage_seconds{{command="{command}",stage="{name}"}} {stage["total"]:.6f}')
+        lines += [
+            "# HELP docs_agent_stage_calls Number of times each stage ran in the most recent command.",
+            "# TYPE docs_agent_stage_calls gauge",
+        ]
+        for name, stage in stages.items():
+            lines.append(f'docs_agent_stage_calls{{command="{command}",stage="{name}"}} {stage["calls"]}')
+        generations = self.__generations()
+        if generations:
+            last = generations[-1].attributes
+            if "ttft_ms" in last:
+                lines += [
+                    "# HELP docs_agent_time_to_first_token_seconds Time to the first streamed token of the most recent response.",
+                    "# TYPE docs_agent_time_to_first_token_seconds gauge",
+                    f'docs_agent_time_to_first_token_seconds{{command="{command}"}} {last["ttft_ms"] / 1000:.6f}',
+                ]
+            if "tokens_per_s" in last:
+                lines += [
+                    "# HELP docs_agent_tokens_per_second Generation rate of the most recent response.",
+                    "# TYPE docs_agent_tokens_per_second gauge",
+                    f'docs_agent_tokens_per_second{{command="{command}"}} {last["tokens_per_s"]:.3f}',
+                ]
+        # Write atomically, so a textfile collector never reads a partial file
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(temporary, path)
+
+
+def span(name, **attributes):
+    """
+    Time a stage: `with span("embed", texts=3) as s: ...`. Spans are only recorded while a profiler
+    is enabled; otherwise this returns a shared no-op span, so instrumentation costs next to nothing.
+    """
+    if _profiler is None:
+        return _null_span
+    return _profiler.span(name, **attributes)
+
+def enable(command=None):
+    """Start recording spans in a new profiler, and return it."""
+    global _profiler
+    _profiler = Profiler(command)
+    return _profiler
+
+def disable():
+    """Stop recording spans. Returns the profiler that was active, if any."""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    return profiler
@@ -0,0 +1,83 @@
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from docs_agent.helpers.filesize import filesize_to_english
+from docs_agent.helpers.log import logger
+
+
+class PullManager:
+    """
+    Pulls Ollama models concurrently.
+    Each pull's progress stream is consumed as fast as the server sends it. Progress is
+    rendered separately, at most every `interval` seconds, as a single status line.
+    """
+
+    default_interval = 0.2
+
+    def __init__(self, client, interval=None, out_stream=sys.stdout):
+        self.client = client
+        self.interval = interval if interval is not None else self.default_interval
+        self.out_stream = out_stream
+        self.progress = {}
+        self._lock = threading.Lock()
+        self._line_length = 0
+
+    def __pull(self, model):
+        for status in self.client.pull(model, stream=True):
+            with self._lock:
+                self.progress[model] = status
+
+    @staticmethod
+    def describe(model, status):
+        """Describe one model's pull progress."""
+        completed, total = status.get("completed"), status.get("total")
+        if not total:
+            return f"{model}: {status.get('status')}"
+        return (
+            f"{model}: {status.get('status')}, Completed: {filesize_to_english(completed)}/{filesize_to_english(total)} "
+            f"({(completed or 0) / total * 100:.2f}%)"
+        )
+
+    def render(self):
+        """Overwrite the status line with the latest progress of every pull."""
+        with self._lock:
+            line = " | ".join(self.describe(model, status) for model, status in self.progress.items())
+        self._line_length = max(self._line_length, len(line))
+        print(f"\r{line.ljust(self._line_length)}", end="", flush=True, file=self.out_stream)
+
+    def __render_until(self, done):
+        while not done.wait(self.interval):
+            self.render()
+
+    def pull(self, models):
+        """
+        Pull models in parallel, rendering progress until all have finished.
+        Returns a dict mapping each model to None, or to the exception its pull raised.
+        """
+        import httpx
+        import ollama
+
+        results = {}
+        if not models:
+            return results
+        done = threading.Event()
+        renderer = threading.Thread(target=self.__render_until, args=(done,), name="pull-progress", daemon=True)
+        renderer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=len(models)) as executor:
+                futures = {model: executor.submit(self.__pull, model) for model in models}
+                for model, future in futures.items():
+                    try:
+                        future.result()
+                        results[model] = None
+                    except (ollama.ResponseError, httpx.HTTPError, OSError) as e:
+                        logger.debug("Failed to pull model '%s': %s", model, e)
+                        results[model] = e
+        finally:
+            done.set()
+            renderer.join()
+            if self.progress:
+                self.render()
+                print(file=self.out_stream)  # Newline after progress
+        return results
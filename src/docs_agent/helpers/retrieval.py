@@ -0,0 +1,113 @@
+import time
+
+from docs_agent.helpers.embeddings import Embedder
+from docs_agent.helpers.lexical import is_identifier_query
+from docs_agent.helpers.log import logger
+from docs_agent.helpers.profile import span
+
+
+def element_filter(elements=None):
+    """
+    Build a chunk metadata filter from element names.
+    `elements` is a list of names, or a dict mapping names to versions (None for any version).
+    """
+    if not elements:
+        return None
+    if not isinstance(elements, dict):
+        elements = {name: None for name in elements}
+    clauses = [
+        {"$and": [{"name": name}, {"version": str(version)}]} if version else {"name": name}
+        for name, version in elements.items()
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+class Retriever:
+    """
+    Retrieves the documentation chunks most relevant to a question: embeds the question,
+    pulls the top `k` chunks from the DB and drops any farther than `max_distance` (0 disables this).
+    With `hybrid` search, chunks matching the question's terms are pulled from the lexical index too,
+    and both rankings are merged by reciprocal rank fusion. Questions that are nothing but
+    identifiers (function names, flags, error codes) are answered lexically, without embedding them.
+    Timings for the most recent retrieval are kept in `last_timings` (milliseconds).
+    """
+
+    rrf_k = 60  # Reciprocal rank fusion constant; damps the weight of top ranks
+    candidates_per_result = 2  # Candidates fetched from each ranking per result returned
+
+    def __init__(self, db=None, embedder=None, k=None, max_distance=None, hybrid=None):
+        from docs_agent.config import get_settings
+        settings = get_settings()
+        if db is None:
+            from docs_agent.helpers.chromadb import default_db
+            db = default_db()
+        self.db = db
+        self.embedder = embedder or Embedder()
+        self.k = int(k or settings.get("RETRIEVAL_K"))
+        self.max_distance = max_distance if max_distance is not None else settings.get("RETRIEVAL_MAX_DISTANCE")
+        self.hybrid = hybrid if hybrid is not None else settings.get("HYBRID_SEARCH")
+        self.last_timings = {}
+
+    def retrieve(self, question, where=None):
+        """
+        Return the relevant chunks as dicts of id, document, metadata and distance, best first.
+        Chunks found only by the lexical index have no distance (None).
+        """
+        with span("retrieve") as timed:
+            start = time.perf_counter()
+            self.last_timings = {}
+            if self.db.count_chunks() == 0:
+                return []  # Nothing indexed; don't pay for an embedding call
+            candidates = self.k * self.candidates_per_result
+            lexical = self.db.search_chunks_lexical(question, count=candidates, where=where) if self.hybrid else []
+            searched = time.perf_counter()
+            if lexical and is_identifier_query(question):
+                logger.debug("Identifier query; skipping the embedding call.")
+                chunks = [{**chunk, "distance": None} for chunk in lexical[:self.k]]
+                embedded = queried = searched
+            else:
+                embedding = self.embedder.embed([question])[0]
+                embedded = time.perf_counter()
+                results = self.db.search_chunks(embedding, count=candidates if lexical else self.k, where=where)
+                queried = time.perf_counter()
+                vector = [
+                    {"id": id, "document": document, "metadata": metadata, "distance": distance}
+                    for id, document, metadata, distance in zip(
+                        results['ids'][0], results['documents'][0], results['metadatas'][0], results['distances'][0]
+                    )
+                    if not self.max_distance or distance <= self.max_distance
+                ]
+                chunks = self.fuse(vector, lexical)[:self.k] if lexical else vector[:self.k]
+            self.last_timings = {
+                "embed_ms": (embedded - searched) * 1000,
+                "query_ms": ((searched - start) + (queried - embedded)) * 1000,
+                "total_ms": (time.perf_counter() - start) * 1000,
+            }
+            logger.debug(
+                "Retrieved %s chunk(s) in %.1f ms (embed %.1f ms, query %.1f ms).",
+                len(chunks), self.last_timings['total_ms'], self.last_timings['embed_ms'], self.last_timings['query_ms'],
+            )
+            timed.set(chunks=len(chunks))
+            return chunks
+
+    @classmethod
+    def fuse(cls, *rankings):
+        """Merge rankings of chunks by reciprocal rank fusion, keeping the first copy of each chunk."""
+        scores = {}
+        chunks = {}
+        for ranking in rankings:
+            for rank, chunk in enumerate(ranking):
+                scores[chunk["id"]] = scores.get(chunk["id"], 0) + 1 / (cls.rrf_k + rank + 1)
+                chunks.setdefault(chunk["id"], {"distance": None, **chunk})
+        return [chunks[id] for id in sorted(scores, key=scores.get, reverse=True)]
+
+    @staticmethod
+    def format_context(chunks):
+        """Pack retrieved chunks into a block of context for the prompt."""
+        if not chunks:
+            return None
+        sections = [
+            f"[{chunk['metadata'].get('name')} {chunk['metadata'].get('version')}]\n{chunk['document']}"
+            for chunk in chunks
+        ]
+        return "Relevant documentation:\n\n" + "\n\n".join(sections)
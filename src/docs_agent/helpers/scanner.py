@@ -0,0 +1,265 @@
+import glob
+import json
+import os
+import re
+import sys
+import tomllib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from docs_agent.helpers.dependencies import (
+    normalize_name,
+    parser_for,
+    version_from_spec,
+)
+from docs_agent.helpers.log import logger
+
+# Never descended into, ignored or not: version control, our own data, installed packages and bytecode
+SKIPPED_DIRECTORIES = frozenset({".git", ".hg", ".svn", ".docs", "node_modules", "__pycache__"})
+VENV_MARKER = "pyvenv.cfg"  # Virtual environments hold installed packages, not the project's own manifests
+
+
+def _glob_to_regex(pattern):
+    """Translate a gitignore glob to a regular expression."""
+    regex = ""
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            regex += "(?:.*/)?"
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            regex += "/.*"
+            i += 3
+        elif pattern.startswith("**", i):
+            regex += ".*"
+            i += 2
+        elif pattern[i] == "*":
+            regex += "[^/]*"
+            i += 1
+        elif pattern[i] == "?":
+            regex += "[^/]"
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            regex += "[" + pattern[i + 1:end].replace("!", "^", 1) + "]"
+            i = end + 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex)
+
+
+class GitIgnore:
+    """The rules of one `.gitignore` file, matched against paths relative to its directory."""
+
+    def __init__(self, directory, text):
+        self.directory = directory
+        self.rules = []
+        for line in text.splitlines():
+            line = line.rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            line = line[1:] if negated else line.removeprefix("\\")
+            directory_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            self.rules.append((_glob_to_regex(line.lstrip("/")), negated, directory_only, anchored))
+
+    def match(self, path, is_directory):
+        """Whether the path (relative to the project) is ignored, not ignored, or not matched at all (None)."""
+        if self.directory:
+            if not path.startswith(self.directory + "/"):
+                return None
+            path = path[len(self.directory) + 1:]
+        name = path.rsplit("/", 1)[-1]
+        result = None
+        for regex, negated, directory_only, anchored in self.rules:
+            if directory_only and not is_directory:
+                continue
+            if regex.fullmatch(path if anchored else name):
+                result = not negated
+        return result
+
+def is_ignored(ignores, path, is_directory):
+    """Whether a path is ignored by a chain of `.gitignore` files, from the root down; the deepest match wins."""
+    ignored = False
+    for ignore in ignores:
+        result = ignore.match(path, is_directory)
+        if result is not None:
+            ignored = result
+    return ignored
+
+
+class ProjectScanner:
+    """
+    Finds the dependencies of a project: walks the tree with a pool of `jobs` threads, skipping
+    what `.gitignore` files exclude, and parses the manifests and lockfiles it finds.
+
+    Results are cached in `cache_path`. A directory whose mtime is unchanged is not listed again,
+    and a file whose mtime and size are unchanged is not parsed again, so a re-scan of an unchanged
+    tree costs one `stat` per directory and dependency file.
+    """
+
+    default_jobs = 8
+
+    def __init__(self, root=".", jobs=None, cache_path=None):
+        self.root = os.path.abspath(root)
+        self.jobs = max(int(jobs or self.default_jobs), 1)
+        self.cache_path = cache_path or os.path.join(self.root, ".docs", "cache", "scan.json")
+        self._directories = {}
+        self._files = {}
+
+    def __load_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+            return cache.get("directories", {}), cache.get("files", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}, {}
+
+    def __save_cache(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"directories": self._directories, "files": self._files}, f)
+        os.replace(temp_path, self.cache_path)
+
+    def __list(self, path, cached):
+        """List a directory's subdirectories and dependency files, reusing the cached listing if its mtime is unchanged."""
+        full_path = os.path.join(self.root, path)
+        mtime = os.stat(full_path).st_mtime_ns
+        if cached is not None and cached[0] == mtime:
+            return cached
+        directories, files = [], []
+        with os.scandir(full_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.name)
+                elif entry.name in (".gitignore", VENV_MARKER) or parser_for(entry.name):
+                    files.append(entry.name)
+        return [mtime, sorted(directories), sorted(files)]
+
+    def __read(self, path, cached):
+        """Read a file (parsing dependency files), reusing the cached result if its mtime and size are unchanged."""
+        full_path = os.path.join(self.root, path)
+        stat = os.stat(full_path)
+        key = [stat.st_mtime_ns, stat.st_size]
+        if cached is not None and cached[0] == key:
+            return cached
+        with open(full_path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        name = os.path.basename(path)
+        if name == ".gitignore":
+            return [key, text]
+        try:
+            return [key, parser_for(name)(text)]
+        except (ValueError, KeyError, TypeError, AttributeError, tomllib.TOMLDecodeError) as e:
+            logger.debug("Could not parse %s: %s", path, e)
+            return [key, {}]
+
+    def scan(self):
+        """Walk the project. Returns the parsed dependency files, keyed by path relative to the root."""
+        cached_directories, cached_files = self.__load_cache()
+        self._directories, self._files = {}, {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            pending = {executor.submit(self.__list, "", cached_directories.get("")): ("", [])}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, ignores = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except OSError as e:
+                        logger.debug("Could not scan %s: %s", path or ".", e)
+                        continue
+                    if ignores is None:  # A dependency file
+                        self._files[path] = result
+                        continue
+                    self._directories[path] = result
+                    for submitted, args in self.__visit(executor, path, result, ignores, cached_directories, cached_files):
+                        pending[submitted] = args
+        try:
+            self.__save_cache()
+        except OSError as e:
+            logger.debug("Could not write the scan cache %s: %s", self.cache_path, e)
+        results = {path: entry[1] for path, entry in self._files.items() if not path.endswith(".gitignore")}
+        logger.debug("Scanned %s directories and %s dependency file(s).", len(self._directories), len(results))
+        return results
+
+    def __visit(self, executor, path, listing, ignores, cached_directories, cached_files):
+        """Queue the dependency files and subdirectories of a listed directory that aren't ignored."""
+        _, directories, files = listing
+        if VENV_MARKER in files:
+            return
+        prefix = f"{path}/" if path else ""
+        if ".gitignore" in files:
+            # Read in place: it decides what below this directory is scanned
+            gitignore = prefix + ".gitignore"
+            try:
+                self._files[gitignore] = self.__read(gitignore, cached_files.get(gitignore))
+                ignores = ignores + [GitIgnore(path, self._files[gitignore][1])]
+            except OSError as e:
+                logger.debug("Could not read %s: %s", gitignore, e)
+        for name in files:
+            file_path = prefix + name
+            if name not in (".gitignore", VENV_MARKER) and not is_ignored(ignores, file_path, False):
+                yield executor.submit(self.__read, file_path, cached_files.get(file_path)), (file_path, None)
+        for name in directories:
+            directory = prefix + name
+            if name not in SKIPPED_DIRECTORIES and not is_ignored(ignores, directory, True):
+                yield executor.submit(self.__list, directory, cached_directories.get(directory)), (directory, ignores)
+
+
+def installed_versions(root="."):
+    """
+    Versions of the Python distributions installed in the project's virtual environment: the active
+    one (`VIRTUAL_ENV`), else `.venv` or `venv` in the project, else the running interpreter's if it lives
+    inside the project. Empty if the project has none.
+    """
+    from importlib import metadata
+    root = os.path.abspath(root)
+    for venv in filter(None, [os.environ.get("VIRTUAL_ENV"), os.path.join(root, ".venv"), os.path.join(root, "venv")]):
+        paths = glob.glob(os.path.join(venv, "lib", "python*", "site-packages")) + glob.glob(os.path.join(venv, "Lib", "site-packages"))
+        if paths:
+            distributions = metadata.distributions(path=paths)
+            break
+    else:
+        if not os.path.abspath(sys.prefix).startswith(root + os.sep):
+            return {}
+        distributions = metadata.distributions()
+    return {normalize_name(distribution.metadata["Name"]): distribution.version for distribution in distributions if distribution.metadata["Name"]}
+
+def detect_dependencies(root=".", jobs=None):
+    """Detect a project's dependencies and the versions it uses. See `resolve_versions`."""
+    return resolve_versions(ProjectScanner(root, jobs=jobs).scan(), root)
+
+def resolve_versions(files, root="."):
+    """
+    Resolve the dependencies declared in scanned files (see `ProjectScanner.scan`) to the versions in use,
+    as `{name: {version, ecosystem, source}}`. Versions come from, in order of preference: lockfiles
+    (and go.mod), the project's installed Python environment, then versions pinned or lower bounds
+    given in manifests. Files nearer the root win. Dependencies without any version are left out.
+    """
+    locked, declared = {}, {}
+    for path in sorted(files, key=lambda path: (path.count("/"), path)):
+        parsed = files[path]
+        ecosystem = parsed.get("ecosystem")
+        for name, version in parsed.get("locked", {}).items():
+            locked.setdefault((ecosystem, name), (version, path))
+        for name, spec in parsed.get("dependencies", {}).items():
+            declared.setdefault((ecosystem, name), (spec, path))
+    installed = installed_versions(root) if any(ecosystem == "python" for ecosystem, _ in declared) else {}
+
+    detected = {}
+    for (ecosystem, name), (spec, source) in declared.items():
+        if (ecosystem, name) in locked:
+            version, source = locked[(ecosystem, name)]
+        elif ecosystem == "python" and name in installed:
+            version, source = installed[name], "installed"
+        else:
+            version, _ = version_from_spec(spec)
+        if version is None:
+            logger.debug("No version found for '%s' (from %s).", name, source)
+            continue
+        detected[name] = {"version": version, "ecosystem": ecosystem, "source": source}
+    return detected
@@ -0,0 +1,11 @@
+import re
+
+# Words and individual punctuation marks; a close, tokenizer-free approximation of model tokens
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def count_tokens(text):
+    """Approximate the number of model tokens in a piece of text."""
+    if not text:
+        return 0
+    return len(TOKEN_PATTERN.findall(text))
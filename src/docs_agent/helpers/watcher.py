@@ -0,0 +1,150 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from docs_agent.helpers.log import logger
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    Watches directories (not recursively) for files being written, created, moved or deleted,
+    using Linux inotify through ctypes. The kernel queues events, so none are lost between waits.
+    """
+
+    mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, directories=()):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.directories = {}  # Watch descriptor -> directory
+        self.add(directories)
+
+    def add(self, directories):
+        """Start watching more directories. Ones already watched are skipped."""
+        watched = set(self.directories.values())
+        for directory in directories:
+            if directory in watched:
+                continue
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), self.mask)
+            if wd < 0:
+                logger.debug("Could not watch %s: %s", directory, os.strerror(ctypes.get_errno()))
+                continue
+            self.directories[wd] = directory
+
+    def wait(self, timeout=None):
+        """Wait up to `timeout` seconds (forever if None) for changes. Returns the set of changed paths."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    # Events were dropped; report every watched directory as changed
+                    changed.update(self.directories.values())
+                elif wd in self.directories:
+                    changed.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+
+    def close(self):
+        os.close(self.fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PollingWatcher:
+    """
+    Watches directories (not recursively) by comparing the mtime and size of their entries
+    every `interval` seconds. For platforms and filesystems without inotify.
+    """
+
+    default_interval = 1.0
+
+    def __init__(self, directories=(), interval=None):
+        self.interval = interval or self.default_interval
+        self.snapshots = {}  # Directory -> {path: (mtime, size)}
+        self.add(directories)
+
+    def add(self, directories):
+        """Start watching more directories. Ones already watched are skipped."""
+        for directory in directories:
+            if directory not in self.snapshots:
+                self.snapshots[directory] = self.__snapshot(directory)
+
+    def __snapshot(self, directory):
+        snapshot = {}
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        stat = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError as e:
+            logger.debug("Could not poll %s: %s", directory, e)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Wait up to `timeout` seconds (forever if None) for changes. Returns the set of changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for directory, before in self.snapshots.items():
+                after = self.__snapshot(directory)
+                changed.update(path for path in before.keys() | after.keys() if before.get(path) != after.get(path))
+                self.snapshots[directory] = after
+            if changed:
+                return changed
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return changed
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+
+    def close(self):
+        self.snapshots = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def watcher(directories=(), poll=False, interval=None):
+    """A watcher for `directories`: inotify on Linux, unless `poll` is set or inotify is unavailable."""
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            logger.debug("inotify is unavailable (%s); polling for changes instead.", e)
+    return PollingWatcher(directories, interval=interval)
@@ -0,0 +1,29 @@
+"""Inspects and pulls the Ollama models used by the docs agent."""
+from docs_agent.config import get_settings
+from docs_agent.helpers.log import logger
+from docs_agent.helpers.model_cache import model_tag
+
+
+def main(refresh=False, pull=False):
+    """Main models function. Invoked by the CLI handler."""
+    import ollama
+
+    from docs_agent.agent import available_models, pull_models
+
+    settings = get_settings()
+    ollama_url = settings.get("OLLAMA_URL")
+    client = ollama.Client(host=ollama_url, timeout=2.0)
+    wanted = [settings.get("CHAT_MODEL"), settings.get("EMBEDDING_MODEL")]
+    models = available_models(client, ollama_url, required=wanted, refresh=refresh)
+    if pull:
+        missing = [model for model in wanted if model_tag(model) not in models]
+        if missing:
+            pull_models(client, ollama_url, missing)
+            models = available_models(client, ollama_url)
+        else:
+            logger.info("All models are already pulled.")
+    logger.info("%s model(s) available at %s%s.", len(models), ollama_url, ' (refreshed)' if refresh else '')
+    for role, option in (("Chat", "CHAT_MODEL"), ("Embedding", "EMBEDDING_MODEL")):
+        name = settings.get(option)
+        digest = models.get(model_tag(name))
+        logger.info("%s model '%s': %s", role, name, f'available ({digest[:12]})' if digest else 'not pulled')
@@ -1,5 +1,5 @@
 """Sets up the docs agent in your project."""
-from docs_agent.config import settings
+from docs_agent.config import get_settings
 
 interactive = True
 run_silently = False
@@ -35,13 +35,28 @@ def ensure_directory(directory="."):
         print_unless_silent(f"Local elements file already exists: {elements_path}")
     
     # Create ChromaDB directory
-    chromadb_dir = os.path.join(directory, settings.get("CHROMADB_DIR"))
+    chromadb_dir = os.path.join(directory, get_settings().get("CHROMADB_DIR"))
     if not os.path.exists(chromadb_dir):
         os.makedirs(chromadb_dir)
         print_unless_silent(f"Created ChromaDB directory: {chromadb_dir}")
     else:
         print_unless_silent(f"ChromaDB directory already exists: {chromadb_dir}")
-    # TODO: agentic project exploration
+
+def detect_elements(directory="."):
+    """Scan the project for its dependencies and record them, with the versions in use, in .docs/elements.yaml."""
+    import os
+
+    from docs_agent.helpers.manifest import Manifest
+    from docs_agent.helpers.scanner import detect_dependencies
+
+    detected = detect_dependencies(directory, jobs=get_settings().get("SCAN_JOBS"))
+    manifest = Manifest(os.path.join(directory, ".docs", "elements.yaml"))
+    for name, entry in sorted(detected.items()):
+        manifest.record(name, **entry)
+    manifest.save()
+    print_unless_silent(f"Detected {len(detected)} element(s) in use:")
+    for name, entry in sorted(detected.items()):
+        print_unless_silent(f"  {name} {entry['version']} ({entry['source']})")
 
 def main(directory=".", non_interactive=False, silent=False):
     """Main setup function. Invoked by the CLI handler."""
@@ -50,5 +65,6 @@ def main(directory=".", non_interactive=False, silent=False):
     run_silently = silent
 
     ensure_directory(directory)
+    detect_elements(directory)
     # TODO: Ensure database in .docs/chromadb/
     print("Docs agent setup complete.")
\ No newline at end of file
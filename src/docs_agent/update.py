@@ -1,32 +1,104 @@
 from docs_agent.helpers.log import logger
 
 from docs_agent.helpers.elements import Element
-from docs_agent.helpers.chromadb import ChromaDB
+from docs_agent.helpers.manifest import Manifest
+from docs_agent.helpers.profile import span
+from docs_agent.helpers.chromadb import default_db, storage_errors
+from docs_agent.helpers.fetch import fetch_errors
+from docs_agent.add_element import fetch_documentation, index_documentation, shared_documentation
 
-def needs_update(name, version, db):
-    """Check if an element needs updating."""
-    element = db.search_elements(name)
+def needs_update(name, version, db, index=None):
+    """
+    Check if an element needs updating.
+    Pass a prebuilt `index` (see `DB.get_metadata_index`) to avoid fetching one per check.
+    """
+    index = index if index is not None else db.get_metadata_index()
+    indexed = index.get(name)
     # TODO: check if version is up to date, integrating with intelligent version retrieval with `add_element`
-    if element['metadatas'][0][0]['version'] == version:
+    if indexed is not None and str(indexed['version']) == version:
         return False  # No need to update if already exists with same version
     return True  # Needs update if not found or different version
 
-def main(force=False, silent=False, verbose=False, db=ChromaDB, manifest=".docs/elements.yaml"):
+def plan_updates(index, desired=None, force=False):
+    """
+    Compute the full list of (name, version) pairs to update, up front.
+    `desired` maps element names to wanted versions and defaults to the indexed versions.
+    """
+    desired = desired if desired is not None else {name: str(metadata['version']) for name, metadata in index.items()}
+    return [
+        (name, version) for name, version in desired.items()
+        if force or needs_update(name, version, None, index=index)
+    ]
+
+def report_plan(plan, index, silent=False):
+    """Log the update plan before any work is done."""
+    if silent:
+        return
+    logger.info("%s of %s element(s) need updating.", len(plan), len(index))
+    for name, version in plan:
+        indexed = index.get(name)
+        current = f"{indexed['version']} (updated {indexed['updated_at']})" if indexed else "not indexed"
+        logger.info("  %s: %s -> %s", name, current, version)
+
+def main(force=False, silent=False, verbose=False, db=None, manifest=".docs/elements.yaml", dry_run=False, jobs=None):
     """Main update function. Invoked by the CLI handler."""
-    elements = db.get_elements()
-    for element in elements['metadatas'] or []:
-        name = str(element['name'])
-        version = str(element['version'])
-        if needs_update(name, version, db) or force:
-            logger.info(f"Updating documentation for '{name}-{version}'...") if not silent else None
-            try:
-                # doc_text = obtain_text(name, version)
-                doc_text = "Text retrieval not yet implemented"
-                logger.debug(f"Obtained updated documentation for '{name}-{version}'.")
-                updated_element = Element(name=name, version=version, content=doc_text, db=db)
-                updated_element.save()
-                logger.info(f"Successfully updated documentation for '{name}-{version}'.") if not silent else None
-            except Exception as e:
-                logger.error(f"Failed to update documentation for '{name}-{version}': {e}") if not silent else None
-        else:
-            logger.info(f"Documentation for '{name}-{version}' is already up to date.") if not silent else None
+    db = db or default_db()
+    manifest_file = Manifest(manifest)
+    with span("plan"):
+        index = db.get_metadata_index()
+        desired = {name: str(metadata['version']) for name, metadata in index.items()}
+        desired.update(manifest_file.versions())  # Versions recorded by `docs init` win, and add elements not yet indexed
+        plan = plan_updates(index, desired=desired, force=force)
+    report_plan(plan, index, silent=silent)
+    if dry_run:
+        return plan
+    apply_updates(plan, index, db, manifest_file, force=force, silent=silent, jobs=jobs)
+    if not silent:
+        for name in sorted(index.keys() - {name for name, _ in plan}):
+            logger.info("Documentation for '%s-%s' is already up to date.", name, index[name]['version'])
+    return plan
+
+def apply_updates(plan, index, db, manifest_file, force=False, silent=False, jobs=None):
+    """
+    Fetch, embed and store the documentation for each planned (name, version) pair,
+    recording the updated elements in `manifest_file`. `index` is the metadata index the plan was made from.
+    Returns the set of pairs that are now up to date; failures are logged and left out.
+    """
+    # Fetch all stale documentation concurrently, then prepare the elements.
+    known = {} if force else shared_documentation(plan, db)
+    texts, unchanged = fetch_documentation([pair for pair in plan if pair not in known], jobs=jobs)
+    texts.update(known)
+    updated_elements = []
+    done = set()
+    for name, version in plan:
+        indexed = index.get(name)
+        if (name, version) in unchanged and indexed is not None and str(indexed['version']) == version:
+            # Same body as what is already indexed; skip re-indexing it
+            logger.info("Documentation for '%s-%s' is unchanged upstream.", name, version) if not silent else None
+            done.add((name, version))
+            continue
+        logger.info("Updating documentation for '%s-%s'...", name, version) if not silent else None
+        try:
+            doc_text = texts[(name, version)]
+            if isinstance(doc_text, Exception):
+                raise doc_text
+            logger.debug("Obtained updated documentation for '%s-%s'.", name, version)
+            updated_element = Element(name=name, version=version, content=doc_text, manifest_location=manifest_file.location, db=db)
+            updated_element.save_yaml(manifest_file)
+            updated_elements.append(updated_element)
+        except fetch_errors as e:
+            logger.error("Failed to update documentation for '%s-%s': %s", name, version, e) if not silent else None
+    with span("manifest.save"):
+        manifest_file.save()  # One write for all updated elements
+
+    # Write all updated elements to the DB in one batched upsert.
+    if updated_elements:
+        try:
+            db.save_elements(updated_elements)
+        except storage_errors() as e:
+            logger.error("Failed to save updated documentation for %s element(s): %s", len(updated_elements), e) if not silent else None
+            return done
+        for updated_element in index_documentation(updated_elements, db, silent=silent, skip=known):
+            logger.info("Successfully updated documentation for '%s-%s'.", updated_element.name, updated_element.version) if not silent else None
+            done.add((updated_element.name, updated_element.version))
+    return done
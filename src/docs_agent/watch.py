@@ -0,0 +1,103 @@
+"""Keeps documentation in step with the project's dependencies as they change."""
+import os
+
+from docs_agent.config import get_settings
+from docs_agent.helpers.chromadb import default_db
+from docs_agent.helpers.dependencies import parser_for
+from docs_agent.helpers.log import logger
+from docs_agent.helpers.manifest import Manifest
+from docs_agent.helpers.scanner import ProjectScanner, resolve_versions
+from docs_agent.helpers.watcher import watcher
+from docs_agent.update import apply_updates, plan_updates, report_plan
+
+
+class DependencyWatch:
+    """
+    Tracks the project's dependency files and element manifest. Each `refresh()` re-scans them
+    (unchanged files come from the scan cache), records newly detected versions in the manifest,
+    and updates only the elements whose versions changed since the last refresh. Elements that fail
+    to update are retried on the next refresh. The first refresh records versions that changed while
+    nothing was watching, and catches up with any manifest versions that differ from the index.
+    """
+
+    def __init__(self, root=".", manifest=None, db=None, jobs=None, silent=False):
+        self.root = os.path.abspath(root)
+        self.manifest = os.path.abspath(manifest or os.path.join(self.root, Manifest.default_location))
+        self.db = db or default_db()
+        self.jobs = jobs
+        self.silent = silent
+        self.scanner = ProjectScanner(self.root, jobs=get_settings().get("SCAN_JOBS"))
+        self.files = self.scanner.scan()
+        # Compared with the manifest first, so lockfiles bumped while nothing was watching are picked up
+        self.detected = Manifest(self.manifest).versions()
+        self.versions = {name: str(metadata['version']) for name, metadata in self.db.get_metadata_index().items()}
+
+    @staticmethod
+    def __versions(detected):
+        return {name: entry["version"] for name, entry in detected.items()}
+
+    def directories(self):
+        """The directories to watch: those holding dependency files, the project root and the manifest's."""
+        directories = {os.path.dirname(os.path.join(self.root, path)) for path in self.files}
+        return sorted(directories | {self.root, os.path.dirname(self.manifest)})
+
+    def is_relevant(self, path):
+        """Whether a change to `path` can change the project's dependencies or tracked elements."""
+        return os.path.abspath(path) == self.manifest or parser_for(os.path.basename(path)) is not None
+
+    def refresh(self):
+        """Re-read dependencies and the manifest, and update the elements whose versions changed. Returns the plan."""
+        self.files = self.scanner.scan()
+        detected = resolve_versions(self.files, self.root)
+        manifest_file = Manifest(self.manifest)
+        for name, entry in sorted(detected.items()):
+            if self.detected.get(name) != entry["version"]:
+                manifest_file.record(name, **entry)
+        self.detected = self.__versions(detected)
+
+        versions = manifest_file.versions()
+        changed = {name: version for name, version in versions.items() if self.versions.get(name) != version}
+        if not changed:
+            self.versions = versions
+            manifest_file.save()
+            return []
+        index = self.db.get_metadata_index()
+        plan = plan_updates(index, desired=changed)
+        report_plan(plan, index, silent=self.silent)
+        done = apply_updates(plan, index, self.db, manifest_file, silent=self.silent, jobs=self.jobs)
+        # Only what is now indexed counts as seen; failed elements keep their old version, so are retried
+        failed = set(plan) - done
+        self.versions = {
+            name: self.versions.get(name) if (name, version) in failed else version
+            for name, version in versions.items()
+        }
+        return plan
+
+    def run(self, poll=False, debounce=None, interval=None):
+        """Watch until interrupted, refreshing once each burst of relevant changes has settled for `debounce` seconds."""
+        settings = get_settings()
+        debounce = debounce if debounce is not None else settings.get("WATCH_DEBOUNCE")
+        with watcher(self.directories(), poll=poll, interval=interval or settings.get("WATCH_POLL_INTERVAL")) as changes:
+            self.refresh()
+            logger.info("Watching %s director(ies) for dependency changes. Press Ctrl+C to stop.", len(self.directories())) if not self.silent else None
+            while True:
+                changed = {path for path in changes.wait() if self.is_relevant(path)}
+                if not changed:
+                    continue
+                # Lockfile writes, installs and our own manifest saves come in bursts; handle each burst once
+                while True:
+                    more = {path for path in changes.wait(debounce) if self.is_relevant(path)}
+                    if not more:
+                        break
+                    changed |= more
+                logger.debug("Changed: %s", ", ".join(sorted(changed)))
+                self.refresh()
+                changes.add(self.directories())  # Directories with new dependency files
+
+
+def main(poll=False, silent=False, jobs=None, db=None, directory="."):
+    """Main watch function. Invoked by the CLI handler."""
+    try:
+        DependencyWatch(root=directory, db=db, jobs=jobs, silent=silent).run(poll=poll)
+    except KeyboardInterrupt:
+        pass
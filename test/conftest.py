@@ -15,6 +15,7 @@ def with_persistence():
     yield db, manifest, config
 
     # Test cleanup
+    db.close()
     try:
         from chromadb.api.shared_system_client import SharedSystemClient
         SharedSystemClient.clear_system_cache()
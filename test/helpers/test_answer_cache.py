@@ -0,0 +1,64 @@
+import time
+
+from docs_agent.helpers.answer_cache import (
+    AnswerCache,
+    context_fingerprint,
+    normalize_prompt,
+    settings_fingerprint,
+)
+
+chunks = [{"id": "LibA@1.0#0", "document": "LibA is configured with LIBA_HOME."}]
+elements = {"LibA": "2024-01-01 00:00:00"}
+
+def test_normalize_prompt():
+    assert normalize_prompt("  How do I configure   LibA? ") == normalize_prompt("how do i configure liba")
+
+def test_exact_hits(tmp_path):
+    """Tests that answers are keyed by prompt, model and context, and invalidated when elements are updated."""
+    cache = AnswerCache(directory=tmp_path.as_posix())
+    fingerprint = context_fingerprint(chunks)
+    cache.put("How do I configure LibA?", "llama2", fingerprint, elements, "Set LIBA_HOME.")
+
+    assert cache.get("how do I configure LibA", "llama2", fingerprint, elements) == "Set LIBA_HOME."
+    assert cache.get("How do I configure LibA?", "mistral", fingerprint, elements) is None
+    assert cache.get("How do I configure LibA?", "llama2", context_fingerprint([]), elements) is None
+    assert cache.get("How do I configure LibA?", "llama2", fingerprint, {"LibA": "2025-01-01 00:00:00"}) is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 3)
+    cache.close()
+
+def test_settings_in_key(tmp_path):
+    """Tests that answers aren't served once the system prompt or chat options change."""
+    cache = AnswerCache(directory=tmp_path.as_posix(), similarity=0.9)
+    fingerprint = context_fingerprint(chunks)
+    settings = settings_fingerprint("You are helpful.", {"options": {"temperature": 0.2}})
+    cache.put("How do I configure LibA?", "llama2", fingerprint, elements, "Set LIBA_HOME.", embedding=[1.0, 0.0], settings=settings)
+
+    assert cache.get("How do I configure LibA?", "llama2", fingerprint, elements, settings=settings) == "Set LIBA_HOME."
+    for changed in (settings_fingerprint("You are terse.", {"options": {"temperature": 0.2}}), settings_fingerprint("You are helpful.", {"options": {"temperature": 0.8}})):
+        assert cache.get("How do I configure LibA?", "llama2", fingerprint, elements, embedding=[1.0, 0.0], settings=changed) is None
+    cache.close()
+
+def test_semantic_hits(tmp_path):
+    """Tests that similar prompts hit in semantic mode."""
+    cache = AnswerCache(directory=tmp_path.as_posix(), similarity=0.9)
+    fingerprint = context_fingerprint(chunks)
+    cache.put("How do I configure LibA?", "llama2", fingerprint, elements, "Set LIBA_HOME.", embedding=[1.0, 0.1, 0.0])
+
+    assert cache.get("What's the way to set up LibA?", "llama2", fingerprint, elements, embedding=[0.9, 0.2, 0.0]) == "Set LIBA_HOME."
+    assert cache.get("How do I deploy LibA?", "llama2", fingerprint, elements, embedding=[0.0, 0.0, 1.0]) is None
+    cache.close()
+
+def test_eviction(tmp_path):
+    """Tests TTL and size-bounded eviction."""
+    cache = AnswerCache(directory=tmp_path.as_posix(), max_entries=2)
+    for i in range(3):
+        cache.put(f"Question {i}", "llama2", "", {}, f"Answer {i}")
+        time.sleep(0.01)
+    assert cache.stats()["entries"] == 2
+    assert cache.get("Question 0", "llama2", "", {}) is None
+    assert cache.get("Question 2", "llama2", "", {}) == "Answer 2"
+
+    cache.ttl = 0
+    assert cache.prune() == 2
+    cache.close()
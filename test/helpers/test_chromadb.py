@@ -47,4 +47,98 @@ def test_save_element(with_persistence):
     results = db.search_elements("SaveTest")
     assert "SaveTest" in results['ids'][0]
     assert 'Testing save_element method.' in results['documents'][0]
-    assert results['metadatas'][0][0] == {"name": "SaveTest", "version": "1.0", "updated_at": test_element.metadata()["updated_at"]}
\ No newline at end of file
+    assert results['metadatas'][0][0] == {"name": "SaveTest", "version": "1.0", "updated_at": test_element.metadata()["updated_at"]}
+
+def test_client_is_reused(with_persistence):
+    """
+    Tests that DB keeps one client and one collection handle across calls.
+    """
+    db, _, _ = with_persistence
+    client = db.client
+    db.get_elements()
+    db.get_elements()
+    assert db.client is client
+    assert len(db._collections) == 1
+
+def test_close_and_directory_change(with_persistence):
+    """
+    Tests that close() and changing the persist directory drop cached handles.
+    """
+    db, _, _ = with_persistence
+    original_directory = db.persist_directory
+    db.get_elements()
+    db.close()
+    assert db._clients == {}
+    assert db._collections == {}
+
+    db.get_elements()
+    db.persist_directory = original_directory + "_other"
+    try:
+        assert db._collections == {}
+        assert db.get_elements()['ids'] == []
+        assert list(db._clients) == [original_directory + "_other"]
+    finally:
+        db.close()
+        import shutil
+        shutil.rmtree(original_directory + "_other", ignore_errors=True)
+    db.persist_directory = original_directory
+
+def test_context_manager(with_persistence):
+    """
+    Tests that DB can be used as a context manager.
+    """
+    db, _, _ = with_persistence
+    with DB(persist_directory=db.persist_directory) as scoped_db:
+        scoped_db.get_elements()
+        assert scoped_db._clients
+    assert scoped_db._clients == {}
+
+def test_save_element_uses_exact_ids(with_persistence):
+    """
+    Tests that save_element() adds similarly named elements instead of updating a near match.
+    """
+    db, _, _ = with_persistence
+    db.save_element(Element(name="requests", version="2.32", content="HTTP for humans."))
+    db.save_element(Element(name="requests-oauthlib", version="2.0", content="OAuth for requests."))
+    db.save_element(Element(name="requests", version="2.33", content="HTTP for humans, again."))
+
+    elements = db.get_elements()
+    assert sorted(elements['ids']) == ["requests", "requests-oauthlib"]
+    versions = {metadata["name"]: metadata["version"] for metadata in elements['metadatas']}
+    assert versions == {"requests": "2.33", "requests-oauthlib": "2.0"}
+
+def test_save_elements(with_persistence):
+    """
+    Tests save_elements() method of ChromaDB class with multiple batches.
+    """
+    db, _, _ = with_persistence
+    elements = [Element(name=f"BatchLib{i}", version="1.0", content=f"Batch library {i}.") for i in range(5)]
+    db.save_elements(elements, batch_size=2)
+
+    results = db.get_elements()
+    assert sorted(results['ids']) == [f"BatchLib{i}" for i in range(5)]
+    assert "Batch library 3." in results['documents']
+
+def test_shared_store(tmp_path):
+    """
+    Tests that documentation chunks in the shared store are reused across projects,
+    and searches only cover the element versions a project uses.
+    """
+    shared = (tmp_path / "shared").as_posix()
+    with DB(persist_directory=(tmp_path / "a").as_posix(), shared_directory=shared) as project_a, \
+            DB(persist_directory=(tmp_path / "b").as_posix(), shared_directory=shared) as project_b:
+        for version, embedding in [("1.0", [1.0, 0.0]), ("2.0", [0.9, 0.1])]:
+            project_a.save_chunks(
+                ids=[DB.chunk_id("SharedLib", version, 0)],
+                documents=[f"SharedLib {version} docs."],
+                embeddings=[embedding],
+                metadatas=[{"name": "SharedLib", "version": version, "chunk": 0, "updated_at": "now"}],
+            )
+        project_a.delete_chunks("SharedLib", "2.0", start=1)  # Must leave 1.0 alone in the shared store
+        assert project_b.chunk_preview("SharedLib", "1.0") == "SharedLib 1.0 docs."
+        assert project_b.chunk_preview("SharedLib", "3.0") is None
+
+        # Project B doesn't use SharedLib yet, so finds nothing
+        assert project_b.search_chunks([1.0, 0.0], count=2)['ids'] == [[]]
+        project_b.save_element(Element(name="SharedLib", version="1.0", content="SharedLib 1.0 docs."))
+        assert project_b.search_chunks([1.0, 0.0], count=2)['ids'] == [["SharedLib@1.0#0"]]
@@ -0,0 +1,37 @@
+from itertools import pairwise
+
+from docs_agent.helpers.chunking import iter_chunks, iter_pieces, iter_text
+from docs_agent.helpers.tokens import count_tokens
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("requests.get(url, timeout=5)") == 10
+
+def test_iter_chunks_respects_size_and_overlap():
+    text = " ".join(f"word{i}" for i in range(100))
+    chunks = list(iter_chunks(iter_pieces(text, size=7), chunk_tokens=20, overlap_tokens=5))
+    assert all(count_tokens(chunk) <= 20 for chunk in chunks)
+    # Every word survives, and words are never split across pieces
+    words = {word for chunk in chunks for word in chunk.split()}
+    assert words == {f"word{i}" for i in range(100)}
+    # Consecutive chunks overlap
+    for previous, following in pairwise(chunks):
+        assert previous.split()[-1] in following.split()[:5]
+
+def test_iter_chunks_short_text():
+    assert list(iter_chunks(["A short document."], chunk_tokens=512)) == ["A short document."]
+    assert list(iter_chunks([])) == []
+
+def test_iter_text_html():
+    pieces = ["<!DOCTYPE html><html><head><style>p {}</sty", "le></head><body><p>Hello &amp; ", "welcome</p><script>x()</script></body></html>"]
+    text = "".join(iter_text(pieces))
+    assert "Hello & welcome" in text
+    assert "p {}" not in text
+    assert "x()" not in text
+
+def test_iter_text_plain():
+    assert "".join(iter_text(iter_pieces("Plain <b>text</b>.", size=4))) == "Plain <b>text</b>."
+
+def test_iter_text_plain_list():
+    assert list(iter_text(["", "plain one", "plain two"])) == ["plain one", "plain two"]
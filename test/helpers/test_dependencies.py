@@ -0,0 +1,35 @@
+from docs_agent.helpers.dependencies import (
+    parse_go_mod,
+    parse_package_lock,
+    parse_pyproject,
+    parse_requirements,
+    parser_for,
+    version_from_spec,
+)
+
+
+def test_version_from_spec():
+    """Tests that pinned versions are exact and ranges give their lower bound."""
+    assert version_from_spec("==2.31.0") == ("2.31.0", True)
+    assert version_from_spec(">=1.2,<2") == ("1.2", False)
+    assert version_from_spec("<2,>=1.4") == ("1.4", False)
+    assert version_from_spec("^18.2.0") == ("18.2.0", False)
+    assert version_from_spec("*") == (None, False)
+
+def test_parsers():
+    """Tests dependency file parsing across ecosystems."""
+    requirements = parse_requirements("-r base.txt\nRequests[socks]>=2.31 ; python_version >= '3.9'\nfoo @ https://example.com/foo.whl\nzope.interface==6.0  # pinned\n")
+    assert requirements["dependencies"] == {"requests": ">=2.31", "zope-interface": "==6.0"}
+
+    pyproject = parse_pyproject('[project]\ndependencies = ["PyYAML>=6"]\n[project.optional-dependencies]\ndev = ["pytest==8.0"]\n'
+                                '[tool.poetry.dependencies]\npython = "^3.11"\nhttpx = {version = "^0.27"}\n')
+    assert pyproject["dependencies"] == {"pyyaml": ">=6", "pytest": "==8.0", "httpx": "^0.27"}
+
+    lock = parse_package_lock('{"packages": {"": {}, "node_modules/react": {"version": "18.2.0"}, "node_modules/a/node_modules/react": {"version": "17.0.0"}}}')
+    assert lock["locked"] == {"react": "18.2.0"}
+
+    go = parse_go_mod("module example.com/app\n\nrequire (\n\tgithub.com/gin-gonic/gin v1.9.1\n\tgolang.org/x/net v0.17.0 // indirect\n)\nrequire github.com/pkg/errors v0.9.1\n")
+    assert go["locked"] == {"github.com/gin-gonic/gin": "1.9.1", "github.com/pkg/errors": "0.9.1"}
+
+    assert parser_for("requirements-dev.txt") is parse_requirements
+    assert parser_for("notes.txt") is None
@@ -0,0 +1,97 @@
+import threading
+
+from docs_agent.helpers.embedding_cache import EmbeddingCache
+from docs_agent.helpers.embeddings import Embedder
+
+
+class FakeOllamaClient:
+    """Records embed calls and returns a vector derived from each text's length."""
+
+    def __init__(self):
+        self.inputs = []
+
+    def embed(self, model, input):
+        self.inputs.append(list(input))
+        return {"embeddings": [[float(len(text)), 0.5, -1.0] for text in input]}
+
+def test_get_and_put(tmp_path):
+    """Tests that stored embeddings are returned, and hits and misses are counted."""
+    cache = EmbeddingCache("test-model", directory=tmp_path.as_posix())
+    assert cache.get_many(["alpha", "beta"]) == [None, None]
+    cache.put_many(["alpha", "beta"], [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many(["beta", "gamma", "alpha"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    cache.close()
+
+    # Entries persist, and are shared by any cache instance for the same model
+    reopened = EmbeddingCache("test-model", directory=tmp_path.as_posix())
+    assert reopened.get_many(["alpha"]) == [[1.0, 2.0]]
+    assert EmbeddingCache.models(tmp_path.as_posix()) == ["test-model"]
+    reopened.close()
+
+def test_lru_eviction(tmp_path):
+    """Tests that the least recently used entries are evicted and their slots reused."""
+    cache = EmbeddingCache("test-model", directory=tmp_path.as_posix(), max_entries=2)
+    cache.put_many(["old"], [[1.0]])
+    cache.put_many(["mid"], [[2.0]])
+    cache.get_many(["old"])  # Now more recently used than "mid"
+    cache.put_many(["new"], [[3.0]])
+    assert cache.get_many(["old", "mid", "new"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["bytes"] == 2 * 4  # The evicted slot was reused
+    cache.close()
+
+def test_lookups_only_read(tmp_path):
+    """Tests that lookups don't write to the index, and their usage is written on flush or close."""
+    cache = EmbeddingCache("test-model", directory=tmp_path.as_posix())
+    cache.put_many(["alpha"], [[1.0]])
+    other = EmbeddingCache("test-model", directory=tmp_path.as_posix())
+    other._db.execute("BEGIN IMMEDIATE")  # Another process holds the write lock
+    try:
+        assert cache.get_many(["alpha", "beta"]) == [[1.0], None]
+    finally:
+        other._db.execute("ROLLBACK")
+    assert other.stats()["hits"] == 0
+    cache.close()
+    assert (other.stats()["hits"], other.stats()["misses"]) == (1, 1)
+    other.close()
+
+def test_concurrent_writers(tmp_path):
+    """Tests that writers on separate connections, like separate processes, never share a slot."""
+    caches = [EmbeddingCache("test-model", directory=tmp_path.as_posix()) for _ in range(2)]
+    barrier = threading.Barrier(len(caches))
+
+    def vector(prefix, i):
+        return [float(i), 1.0 if prefix == "a" else 2.0]
+
+    def write(cache, prefix):
+        barrier.wait()
+        for start in range(0, 200, 10):
+            batch = range(start, start + 10)
+            cache.put_many([f"{prefix}-{i}" for i in batch], [vector(prefix, i) for i in batch])
+
+    threads = [threading.Thread(target=write, args=(cache, prefix)) for cache, prefix in zip(caches, "ab")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    texts = [f"{prefix}-{i}" for prefix in "ab" for i in range(200)]
+    assert caches[0].get_many(texts) == [vector(prefix, i) for prefix in "ab" for i in range(200)]
+    assert caches[0].stats()["bytes"] == 400 * 2 * 4
+    for cache in caches:
+        cache.close()
+
+def test_embedder_uses_cache(tmp_path):
+    """Tests that only texts missing from the cache are sent to the embedding model."""
+    client = FakeOllamaClient()
+    cache = EmbeddingCache("test-model", directory=tmp_path.as_posix())
+    embedder = Embedder(client=client, model="test-model", batch_size=2, cache=cache)
+
+    first = embedder.embed(["one", "three", "five"])
+    second = embedder.embed(["three", "seven", "one"])
+    assert second[0] == first[1]
+    assert second[2] == first[0]
+    assert client.inputs == [["one", "three"], ["five"], ["seven"]]
+    cache.close()
@@ -0,0 +1,87 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from docs_agent.helpers.fetch import Fetcher
+
+
+class DocsHandler(BaseHTTPRequestHandler):
+    """Serves `/<name>` as plain text, failing `/flaky` once and `/missing` always."""
+
+    active = 0
+    peak = 0
+    flaky_failures = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        try:
+            time.sleep(0.05)
+            if self.path == "/missing":
+                return self.send_error(404)
+            if self.path == "/flaky" and cls.flaky_failures == 0:
+                cls.flaky_failures += 1
+                return self.send_error(503)
+            body = f"Docs for {self.path[1:]}".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def docs_server():
+    DocsHandler.active = DocsHandler.peak = DocsHandler.flaky_failures = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DocsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_fetch_all(docs_server, tmp_path):
+    """Tests that fetch_all fetches URLs and files, isolating per-source failures."""
+    doc_file = tmp_path / "local.txt"
+    doc_file.write_text("Local docs.", encoding="utf-8")
+    sources = {name: f"{docs_server}/{name}" for name in ["a", "b", "c"]}
+    binary_file = tmp_path / "binary.txt"
+    binary_file.write_bytes(b"\xff\xfe\x00")
+    sources["local"] = doc_file.as_posix()
+    sources["missing"] = f"{docs_server}/missing"
+    sources["missing_file"] = (tmp_path / "missing.txt").as_posix()
+    sources["binary"] = binary_file.as_posix()
+
+    with Fetcher(jobs=4, retries=0) as fetcher:
+        results = fetcher.fetch_all(sources)
+
+    assert results["a"] == "Docs for a"
+    assert results["c"] == "Docs for c"
+    assert results["local"] == "Local docs."
+    assert isinstance(results["missing"], requests.HTTPError)
+    assert isinstance(results["missing_file"], FileNotFoundError)
+    assert isinstance(results["binary"], UnicodeDecodeError)
+
+def test_per_host_limit(docs_server):
+    """Tests that concurrent requests to one host stay within the per-host limit."""
+    sources = {i: f"{docs_server}/{i}" for i in range(8)}
+    with Fetcher(jobs=8, per_host=2) as fetcher:
+        results = fetcher.fetch_all(sources)
+    assert all(results[i] == f"Docs for {i}" for i in range(8))
+    assert DocsHandler.peak <= 2
+
+def test_retry_with_backoff(docs_server):
+    """Tests that transient server errors are retried."""
+    with Fetcher(retries=2, backoff=0) as fetcher:
+        assert fetcher.fetch(f"{docs_server}/flaky") == "Docs for flaky"
+    assert DocsHandler.flaky_failures == 1
@@ -0,0 +1,77 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import ClassVar
+
+import pytest
+
+from docs_agent.helpers.fetch import Fetcher
+from docs_agent.helpers.http_cache import ResponseCache
+
+
+class ETagHandler(BaseHTTPRequestHandler):
+    """Serves a fixed body per path with an ETag, honouring If-None-Match."""
+
+    requests_seen: ClassVar[list] = []  # Shared by every handler instance
+
+    def do_GET(self):
+        body = f"Docs for {self.path[1:]}".encode()
+        etag = f'"{self.path[1:]}-v1"'
+        type(self).requests_seen.append((self.path, self.headers.get("If-None-Match")))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def etag_server():
+    ETagHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ETagHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_conditional_fetch(etag_server, tmp_path):
+    """Tests that a cached URL is revalidated with a conditional request and reported unchanged."""
+    url = f"{etag_server}/lib"
+    with Fetcher(cache=ResponseCache(directory=tmp_path.as_posix())) as fetcher:
+        assert fetcher.fetch(url) == "Docs for lib"
+        assert fetcher.unchanged == set()
+
+    # A new cache instance loads the saved index from disk
+    cache = ResponseCache(directory=tmp_path.as_posix())
+    with Fetcher(cache=cache) as fetcher:
+        assert fetcher.fetch(url) == "Docs for lib"
+        assert fetcher.unchanged == {url}
+    assert ETagHandler.requests_seen == [("/lib", None), ("/lib", '"lib-v1"')]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_store_detects_unchanged_body(tmp_path):
+    """Tests that storing an identical body is reported as unchanged."""
+    cache = ResponseCache(directory=tmp_path.as_posix())
+    assert cache.store("http://example.com/a", {}, "Same text.")
+    assert not cache.store("http://example.com/a", {}, "Same text.")
+    assert cache.store("http://example.com/a", {}, "New text.")
+
+def test_size_bounded_eviction(tmp_path):
+    """Tests that the least recently used entries are evicted to respect the size bound."""
+    cache = ResponseCache(directory=tmp_path.as_posix(), max_bytes=25)
+    cache.store("http://example.com/old", {}, "0123456789")
+    cache.store("http://example.com/mid", {}, "0123456789")
+    cache.read("http://example.com/old")  # Now more recently used than "mid"
+    cache.store("http://example.com/new", {}, "0123456789")
+    cache.save()
+
+    assert set(cache.entries) == {"http://example.com/old", "http://example.com/new"}
+    assert len(list(tmp_path.glob("*.txt"))) == 2
+    assert cache.stats()["bytes"] == 20
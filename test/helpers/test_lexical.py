@@ -0,0 +1,53 @@
+from docs_agent.helpers.lexical import (
+    LexicalIndex,
+    is_identifier_query,
+    query_terms,
+    where_clause,
+)
+
+
+def index_chunks(tmp_path):
+    index = LexicalIndex((tmp_path / "lexical.sqlite3").as_posix())
+    index.upsert(
+        ids=["LibA#0", "LibA#1", "LibB#0"],
+        documents=["Call os.path.join to build paths.", "Pass --force to overwrite files.", "Error E501 means the line is too long."],
+        metadatas=[
+            {"name": "LibA", "version": "1.0", "chunk": 0},
+            {"name": "LibA", "version": "1.0", "chunk": 1},
+            {"name": "LibB", "version": "2.0", "chunk": 0},
+        ],
+    )
+    return index
+
+def test_query_terms():
+    """Tests that identifiers are kept whole and common words dropped."""
+    assert query_terms("How do I use os.path.join?") == ["os.path.join"]
+    assert query_terms("what is E501") == ["E501"]
+
+def test_is_identifier_query():
+    for query in ["os.path.join", "--force", "E501", "get_metadata_index()", "camelCase", "`std::vector`"]:
+        assert is_identifier_query(query), query
+    for query in ["how do I install it", "install", ""]:
+        assert not is_identifier_query(query), query
+
+def test_where_clause():
+    """Tests translating ChromaDB metadata filters to SQL."""
+    sql, params = where_clause({"$and": [{"name": "LibA"}, {"$or": [{"version": {"$ne": "1.0"}}, {"chunk": {"$gte": 2}}]}]})
+    assert sql == "(name = ? AND (version != ? OR chunk >= ?))"
+    assert params == ["LibA", "1.0", 2]
+    assert where_clause(None) == ("1", [])
+
+def test_search(tmp_path):
+    """Tests exact identifier matches, filters, replacement and deletion."""
+    index = index_chunks(tmp_path)
+    assert [chunk["id"] for chunk in index.search("os.path.join")] == ["LibA#0"]
+    assert [chunk["id"] for chunk in index.search("--force")] == ["LibA#1"]
+    assert index.search("E501", where={"name": "LibA"}) == []
+    assert index.search("the") == []
+
+    index.upsert(["LibA#1"], ["Pass --yes to skip prompts."], [{"name": "LibA", "version": "1.0", "chunk": 1}])
+    assert index.count() == 3
+    assert index.search("--force") == []
+    index.delete({"$and": [{"name": "LibA"}, {"chunk": {"$gte": 1}}]})
+    assert index.count() == 2
+    index.close()
@@ -0,0 +1,40 @@
+import json
+import logging
+
+from docs_agent.helpers import log
+
+
+def test_configure(capsys):
+    """Tests that the level and format can be changed, and JSON records go to stderr."""
+    level = log.logger.level
+    try:
+        log.configure(level="warning", format="json")
+        assert not log.logger.isEnabledFor(logging.INFO)
+        log.logger.warning("Disk %s is full.", "/tmp")
+        record = json.loads(capsys.readouterr().err)
+        assert record["level"] == "WARNING"
+        assert record["message"] == "Disk /tmp is full."
+    finally:
+        log.configure(level=logging.getLevelName(level), format="text")
+
+def test_deferred_debug_order(capsys):
+    """Tests that queued debug records are written before a later warning, and info goes to stdout."""
+    level = log.logger.level
+    try:
+        log.configure(level="DEBUG")
+        for i in range(3):
+            log.logger.debug("Step %d.", i)
+        thread = log.deferred_handler.listener._thread
+        log.logger.warning("Done.")
+        log.logger.info("Result.")
+        assert log.deferred_handler.listener._thread is thread  # Flushed without restarting the listener
+        captured = capsys.readouterr()
+        assert captured.err.splitlines() == [
+            "docs_agent: (DEBUG) Step 0.",
+            "docs_agent: (DEBUG) Step 1.",
+            "docs_agent: (DEBUG) Step 2.",
+            "docs_agent: (WARNING) Done.",
+        ]
+        assert captured.out == "Result.\n"
+    finally:
+        log.configure(level=logging.getLevelName(level))
@@ -0,0 +1,44 @@
+import os
+
+import yaml
+
+from docs_agent.helpers.elements import Element
+from docs_agent.helpers.manifest import Manifest
+
+
+def test_entries_accumulate(tmp_path):
+    """Tests that elements accumulate in the manifest, keyed by name, with one write per save."""
+    location = (tmp_path / "elements.yaml").as_posix()
+    manifest = Manifest(location)
+    for name, version in [("LibA", "1.0"), ("LibB", "2.0"), ("LibA", "1.1")]:
+        Element(name=name, version=version, content="", manifest_location=location).save_yaml(manifest)
+    assert not os.path.exists(location)  # Nothing is written until the manifest is saved
+    manifest.save()
+
+    with open(location, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    assert set(data) == {"LibA", "LibB"}
+    assert data["LibA"]["version"] == "1.1"
+    assert Manifest(location).versions() == {"LibA": "1.1", "LibB": "2.0"}
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_sidecar(tmp_path):
+    """Tests that loads use the JSON sidecar until the YAML file changes."""
+    location = (tmp_path / "elements.yaml").as_posix()
+    with Manifest(location) as manifest:
+        manifest.add(Element(name="LibA", version="1.0", content="", manifest_location=location))
+    assert os.path.exists(tmp_path / ".elements.yaml.json")
+    assert Manifest(location).versions() == {"LibA": "1.0"}
+
+    # Editing the YAML by hand invalidates the sidecar
+    with open(location, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"LibA": {"version": "3.0"}, "LibC": {"version": "0.1"}}, f)
+    assert Manifest(location).versions() == {"LibA": "3.0", "LibC": "0.1"}
+
+def test_legacy_layouts(tmp_path):
+    """Tests that single-entry manifests written by older releases are still read."""
+    location = (tmp_path / "elements.yaml").as_posix()
+    with open(location, "w", encoding="utf-8") as f:
+        yaml.safe_dump({"name": "LibA", "version": "1.0", "updated_at": "2024-01-01 00:00:00"}, f)
+    elements = Element.from_file(location)
+    assert [(element.name, element.version, element.updated_at) for element in elements] == [("LibA", "1.0", "2024-01-01 00:00:00")]
@@ -0,0 +1,45 @@
+import time
+
+from docs_agent.helpers.model_cache import ModelCache, model_tag
+
+
+class ListClient:
+    """Stands in for the Ollama client, listing a fixed set of models and counting list calls."""
+
+    def __init__(self, models):
+        self.models = models
+        self.list_calls = 0
+
+    def list(self):
+        self.list_calls += 1
+        return {"models": [{"model": name, "digest": digest} for name, digest in self.models.items()]}
+
+def test_model_tag():
+    """Tests that model names without a tag get the default one."""
+    assert model_tag("llama2") == "llama2:latest"
+    assert model_tag("llama2:7b") == "llama2:7b"
+
+def test_refresh_and_ttl(tmp_path):
+    """Tests that a refresh lists models once, and that cached entries expire after the TTL."""
+    client = ListClient({"llama2:latest": "abc123"})
+    cache = ModelCache(directory=tmp_path.as_posix(), ttl=60)
+    assert cache.get("http://ollama") is None
+    assert cache.refresh(client, "http://ollama") == {"llama2:latest": "abc123"}
+    assert client.list_calls == 1
+
+    # A new instance reads the same cache from disk
+    assert ModelCache(directory=tmp_path.as_posix(), ttl=60).get("http://ollama") == {"llama2:latest": "abc123"}
+    assert ModelCache(directory=tmp_path.as_posix(), ttl=0).get("http://ollama") is None
+    assert cache.get("http://other") is None
+
+def test_revalidate(tmp_path):
+    """Tests that background revalidation updates the cache."""
+    client = ListClient({"llama2:latest": "abc123"})
+    cache = ModelCache(directory=tmp_path.as_posix(), ttl=60)
+    cache.store("http://ollama", {})
+    before = cache.entry("http://ollama")["checked_at"]
+    time.sleep(0.01)
+    cache.revalidate(client, "http://ollama").join()
+    entry = cache.entry("http://ollama")
+    assert entry["models"] == {"llama2:latest": "abc123"}
+    assert entry["checked_at"] > before
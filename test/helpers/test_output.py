@@ -0,0 +1,45 @@
+import io
+import time
+
+from docs_agent.helpers.output import BufferedWriter
+
+
+class CountingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+def test_buffered_writer():
+    """Tests that writes are batched by size, and everything is written on flush."""
+    stream = CountingStream()
+    with BufferedWriter(stream, interval=60, max_chars=100) as writer:
+        for _ in range(1000):
+            writer.write("token ")
+        assert stream.writes < 100
+    assert stream.getvalue() == "token " * 1000
+
+def test_buffered_writer_interval():
+    """Tests that a zero interval writes through immediately."""
+    stream = CountingStream()
+    writer = BufferedWriter(stream, interval=0)
+    writer.write("a")
+    writer.write("b")
+    assert stream.getvalue() == "ab"
+    assert stream.writes == 2
+
+def test_buffered_writer_stall():
+    """Tests that buffered text is flushed once the interval is up, without waiting for the next write."""
+    stream = CountingStream()
+    with BufferedWriter(stream, interval=0.2) as writer:
+        writer.write("a")
+        writer.write("b")
+        assert stream.getvalue() == ""
+        deadline = time.monotonic() + 5
+        while stream.getvalue() != "ab" and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert stream.getvalue() == "ab"
+        assert stream.writes == 1
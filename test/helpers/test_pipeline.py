@@ -0,0 +1,39 @@
+from docs_agent.helpers.chunking import iter_pieces
+from docs_agent.helpers.elements import Element
+from docs_agent.helpers.pipeline import IndexPipeline
+
+
+class FakeEmbedder:
+    """Deterministic embedder that records the size of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(len(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+def test_index_pipeline(with_persistence):
+    """Tests that documentation is chunked, embedded in batches and stored as chunks."""
+    db, _, _ = with_persistence
+    embedder = FakeEmbedder()
+    pipeline = IndexPipeline(db, embedder=embedder, chunk_tokens=10, overlap_tokens=2, batch_size=4)
+    element = Element(name="BigLib", version="1.0", content=" ".join(f"token{i}" for i in range(200)), db=db)
+
+    progress = pipeline.index(element, iter_pieces(element.content, size=50))
+    assert progress["chunked"] == progress["embedded"] == progress["upserted"] == db.count_chunks()
+    assert progress["chunked"] > 4
+    assert max(embedder.calls) == 4
+    assert len(element.to_dict()['documents']) <= Element.preview_length
+
+    # Re-indexing shorter documentation drops the leftover chunks
+    element.content = "Much shorter now."
+    progress = pipeline.index(element, iter_pieces(element.content))
+    assert progress["upserted"] == 1
+    assert db.count_chunks() == 1
+
+    # In a project-local store, indexing a new version replaces the old version's chunks
+    element.version = "2.0"
+    pipeline.index(element, iter_pieces(element.content))
+    assert db.count_chunks() == 1
+    assert db.chunk_preview("BigLib", "2.0") == "Much shorter now."
@@ -0,0 +1,52 @@
+import io
+import json
+
+from docs_agent.helpers import profile
+
+
+def test_span_disabled():
+    """Tests that spans are shared no-ops while profiling is disabled."""
+    assert profile.span("a") is profile.span("b")
+    with profile.span("a") as timed:
+        timed.set(count=1)
+
+def test_profiler_stages():
+    """Tests that spans nest, aggregate by name, and are reported with generation rates."""
+    profiler = profile.enable("ask")
+    try:
+        with profile.span("retrieve"):
+            for _ in range(2):
+                with profile.span("embed"):
+                    pass
+        with profile.span("generate") as timed:
+            timed.set(ttft_ms=12.5, tokens=20, tokens_per_s=100.0)
+    finally:
+        assert profile.disable() is profiler
+    stages = profiler.stages()
+    assert list(stages) == ["retrieve", "embed", "generate"]
+    assert stages["embed"]["calls"] == 2
+    assert stages["embed"]["depth"] == 1
+    assert stages["retrieve"]["total"] >= stages["embed"]["total"]
+    report = io.StringIO()
+    profiler.report(report)
+    assert "12.5 ms to first token" in report.getvalue()
+    assert "20 tokens at 100.0 tokens/sec" in report.getvalue()
+
+def test_profiler_write(tmp_path):
+    """Tests that spans are appended as JSON lines, or written as a Prometheus textfile."""
+    profiler = profile.enable("update")
+    try:
+        with profile.span("fetch", sources=2):
+            pass
+    finally:
+        profile.disable()
+    jsonl = tmp_path / "spans.jsonl"
+    profiler.write(str(jsonl))
+    profiler.write(str(jsonl))
+    records = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["name"] == "fetch"
+    assert records[0]["attributes"] == {"sources": 2}
+    prom = tmp_path / "docs.prom"
+    profiler.write(str(prom))
+    assert 'docs_agent_stage_calls{command="update",stage="fetch"} 1' in prom.read_text()
@@ -0,0 +1,56 @@
+import io
+import threading
+import time
+
+import ollama
+
+from docs_agent.helpers.pull import PullManager
+
+
+class PullClient:
+    """Stands in for the Ollama client, streaming pull progress and recording concurrent pulls."""
+
+    def __init__(self, statuses=100, fail=()):
+        self.statuses = statuses
+        self.fail = fail
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def pull(self, model, stream=False):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            if model in self.fail:
+                raise ollama.ResponseError(f"pull model manifest: file does not exist: {model}")
+            time.sleep(0.05)  # Give the other pulls a chance to start
+            for completed in range(1, self.statuses + 1):
+                yield {"status": "pulling", "completed": completed, "total": self.statuses}
+            yield {"status": "success"}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+def test_pull_in_parallel():
+    """Tests that models are pulled concurrently and that the progress stream isn't throttled."""
+    client = PullClient(statuses=1000)
+    out = io.StringIO()
+    start = time.perf_counter()
+    results = PullManager(client, interval=0.01, out_stream=out).pull(["chat", "embed"])
+    assert time.perf_counter() - start < 1
+    assert results == {"chat": None, "embed": None}
+    assert client.max_active == 2
+    assert "chat: success" in out.getvalue().splitlines()[-1]
+    assert "embed: success" in out.getvalue().splitlines()[-1]
+
+def test_pull_failure():
+    """Tests that a failed pull is reported without stopping the others."""
+    results = PullManager(PullClient(fail=["missing"]), out_stream=io.StringIO()).pull(["chat", "missing"])
+    assert results["chat"] is None
+    assert isinstance(results["missing"], ollama.ResponseError)
+
+def test_describe():
+    """Tests progress descriptions with and without a known total."""
+    assert PullManager.describe("chat", {"status": "verifying"}) == "chat: verifying"
+    assert "(50.00%)" in PullManager.describe("chat", {"status": "pulling", "completed": 512, "total": 1024})
@@ -0,0 +1,99 @@
+from typing import ClassVar
+
+from docs_agent.helpers.retrieval import Retriever, element_filter
+
+
+class AxisEmbedder:
+    """Embeds known words onto fixed axes, so nearest neighbours are predictable."""
+
+    axes: ClassVar[dict] = {"install": [1.0, 0.0, 0.0], "configure": [0.0, 1.0, 0.0], "deploy": [0.0, 0.0, 1.0]}
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        return [self.axes.get(text.split()[0].lower(), [0.5, 0.5, 0.5]) for text in texts]
+
+def save_chunks(db):
+    db.save_chunks(
+        ids=["LibA#0", "LibA#1", "LibB#0"],
+        documents=["How to install LibA.", "How to configure LibA.", "How to install LibB."],
+        embeddings=[[1.0, 0.0, 0.0], [0.0, 1.0, 0.0], [0.9, 0.1, 0.0]],
+        metadatas=[
+            {"name": "LibA", "version": "1.0", "chunk": 0, "updated_at": "now"},
+            {"name": "LibA", "version": "1.0", "chunk": 1, "updated_at": "now"},
+            {"name": "LibB", "version": "2.0", "chunk": 0, "updated_at": "now"},
+        ],
+    )
+
+def test_retrieve(with_persistence):
+    """Tests top-k retrieval, distance thresholds and timings."""
+    db, _, _ = with_persistence
+    save_chunks(db)
+    retriever = Retriever(db=db, embedder=AxisEmbedder(), k=2, max_distance=0.5)
+
+    chunks = retriever.retrieve("install it")
+    assert [chunk["id"] for chunk in chunks] == ["LibA#0", "LibB#0"]
+    assert set(retriever.last_timings) == {"embed_ms", "query_ms", "total_ms"}
+
+    # Far-away chunks are dropped by the distance threshold
+    assert [chunk["id"] for chunk in retriever.retrieve("configure it")] == ["LibA#1"]
+
+def test_retrieve_with_filter(with_persistence):
+    """Tests that retrieval can be restricted to particular elements and versions."""
+    db, _, _ = with_persistence
+    save_chunks(db)
+    retriever = Retriever(db=db, embedder=AxisEmbedder(), k=3, max_distance=0)
+
+    chunks = retriever.retrieve("install it", where=element_filter(["LibB"]))
+    assert [chunk["id"] for chunk in chunks] == ["LibB#0"]
+    chunks = retriever.retrieve("install it", where=element_filter({"LibA": "1.0", "LibB": "9.9"}))
+    assert [chunk["id"] for chunk in chunks] == ["LibA#0", "LibA#1"]
+
+def test_retrieve_empty_collection(with_persistence):
+    """Tests that nothing is embedded when there is nothing to search."""
+    db, _, _ = with_persistence
+    embedder = AxisEmbedder()
+    assert Retriever(db=db, embedder=embedder, k=2).retrieve("install it") == []
+    assert embedder.calls == 0
+
+def test_format_context():
+    chunks = [{"id": "LibA#0", "document": "How to install LibA.", "metadata": {"name": "LibA", "version": "1.0"}, "distance": 0.0}]
+    context = Retriever.format_context(chunks)
+    assert "[LibA 1.0]\nHow to install LibA." in context
+    assert Retriever.format_context([]) is None
+
+def test_hybrid_retrieve(with_persistence):
+    """Tests that lexical matches are fused with vector results, and identifier queries skip embedding."""
+    db, _, _ = with_persistence
+    save_chunks(db)
+    db.save_chunks(
+        ids=["LibC#0"],
+        documents=["Set LIBC_HOME before running libc.install_all()."],
+        embeddings=[[0.0, 0.0, 1.0]],
+        metadatas=[{"name": "LibC", "version": "1.0", "chunk": 0, "updated_at": "now"}],
+    )
+    embedder = AxisEmbedder()
+    retriever = Retriever(db=db, embedder=embedder, k=2, max_distance=0.5, hybrid=True)
+
+    chunks = retriever.retrieve("libc.install_all")
+    assert [chunk["id"] for chunk in chunks] == ["LibC#0"]
+    assert chunks[0]["distance"] is None
+    assert embedder.calls == 0
+
+    # LibC#0 is too far away for vector search alone, but matches LIBC_HOME exactly
+    retriever.k = 3
+    chunks = retriever.retrieve("install with LIBC_HOME")
+    assert embedder.calls == 1
+    assert "LibC#0" in [chunk["id"] for chunk in chunks]
+    vector_only = Retriever(db=db, embedder=embedder, k=3, max_distance=0.5, hybrid=False)
+    assert [chunk["id"] for chunk in vector_only.retrieve("install with LIBC_HOME")] == ["LibA#0", "LibB#0"]
+
+def test_fuse():
+    """Tests reciprocal rank fusion of two rankings."""
+    vector = [{"id": "a", "distance": 0.1}, {"id": "b", "distance": 0.2}]
+    lexical = [{"id": "b", "score": -2.0}, {"id": "c", "score": -1.0}]
+    fused = Retriever.fuse(vector, lexical)
+    assert [chunk["id"] for chunk in fused] == ["b", "a", "c"]
+    assert fused[2]["distance"] is None
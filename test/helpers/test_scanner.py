@@ -0,0 +1,64 @@
+import json
+import os
+
+from docs_agent.helpers.scanner import (
+    GitIgnore,
+    ProjectScanner,
+    detect_dependencies,
+    is_ignored,
+)
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def test_gitignore():
+    """Tests gitignore matching: unanchored names, anchored paths, directory-only rules and negation."""
+    ignores = [GitIgnore("", "build/\n*.log\n!keep.log\n/vendor\n"), GitIgnore("app", "generated/**\n")]
+    assert is_ignored(ignores, "app/build", True)
+    assert not is_ignored(ignores, "app/build", False)
+    assert is_ignored(ignores, "a/b/debug.log", False)
+    assert not is_ignored(ignores, "a/keep.log", False)
+    assert is_ignored(ignores, "vendor", True)
+    assert not is_ignored(ignores, "app/vendor", True)
+    assert is_ignored(ignores, "app/generated/x", False)
+    assert not is_ignored(ignores, "lib/generated/x", False)
+
+def test_scan(tmp_path, monkeypatch):
+    """Tests that the scan honours .gitignore, skips virtual environments and resolves versions."""
+    monkeypatch.delenv("VIRTUAL_ENV", raising=False)
+    root = tmp_path.as_posix()
+    write(f"{root}/.gitignore", "ignored/\n")
+    write(f"{root}/pyproject.toml", '[project]\ndependencies = ["requests>=2.0", "pyyaml==6.0.1", "rich"]\n')
+    write(f"{root}/uv.lock", '[[package]]\nname = "requests"\nversion = "2.32.3"\n')
+    write(f"{root}/web/package.json", '{"dependencies": {"react": "^18.2.0"}}')
+    write(f"{root}/ignored/package.json", '{"dependencies": {"left-pad": "1.0.0"}}')
+    write(f"{root}/env/pyvenv.cfg", "home = /usr/bin\n")
+    write(f"{root}/env/lib/requirements.txt", "django==5.0\n")
+
+    detected = detect_dependencies(root, jobs=4)
+    assert detected == {
+        "requests": {"version": "2.32.3", "ecosystem": "python", "source": "uv.lock"},
+        "pyyaml": {"version": "6.0.1", "ecosystem": "python", "source": "pyproject.toml"},
+        "react": {"version": "18.2.0", "ecosystem": "node", "source": "web/package.json"},
+    }
+
+def test_scan_cache(tmp_path):
+    """Tests that unchanged files are served from the cache, and changed ones are parsed again."""
+    root = tmp_path.as_posix()
+    write(f"{root}/requirements.txt", "requests==2.31.0\n")
+    scanner = ProjectScanner(root)
+    assert scanner.scan() == {"requirements.txt": {"ecosystem": "python", "dependencies": {"requests": "==2.31.0"}}}
+
+    # Tamper with the cached result: an unchanged file must not be parsed again
+    with open(scanner.cache_path, "r", encoding="utf-8") as f:
+        cache = json.load(f)
+    cache["files"]["requirements.txt"][1]["dependencies"] = {"cached": ""}
+    with open(scanner.cache_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    assert scanner.scan()["requirements.txt"]["dependencies"] == {"cached": ""}
+
+    write(f"{root}/requirements.txt", "requests==2.32.0\nrich\n")
+    assert scanner.scan()["requirements.txt"]["dependencies"] == {"requests": "==2.32.0", "rich": ""}
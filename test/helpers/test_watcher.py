@@ -0,0 +1,31 @@
+import sys
+
+import pytest
+
+from docs_agent.helpers.watcher import InotifyWatcher, PollingWatcher
+
+
+@pytest.mark.parametrize("kind", ["inotify", "polling"])
+def test_watcher_reports_changes(tmp_path, kind):
+    """Tests that both watchers report written, replaced and deleted files, and time out when nothing changes."""
+    if kind == "inotify" and not sys.platform.startswith("linux"):
+        pytest.skip("inotify is Linux-only")
+    watched = tmp_path / "watched"
+    watched.mkdir()
+    (watched / "uv.lock").write_text("old")
+    with (InotifyWatcher([watched.as_posix()]) if kind == "inotify" else PollingWatcher([watched.as_posix()], interval=0.01)) as watcher:
+        assert watcher.wait(0.05) == set()
+
+        (watched / "uv.lock").write_text("new contents")
+        (tmp_path / "elsewhere.txt").write_text("not watched")
+        assert (watched / "uv.lock").as_posix() in watcher.wait(1)
+
+        (tmp_path / "package.json.tmp").write_text("{}")
+        (tmp_path / "package.json.tmp").replace(watched / "package.json")
+        (watched / "uv.lock").unlink()
+        changed = set()
+        while len(changed) < 2:
+            more = watcher.wait(1)
+            assert more, changed
+            changed |= more
+        assert changed >= {(watched / "package.json").as_posix(), (watched / "uv.lock").as_posix()}
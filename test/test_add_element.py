@@ -32,3 +32,28 @@ def test_obtain_text():
         assert text == "Sample documentation text."
     finally:
         os.remove(tmp_file_path)  # Clean up the temporary file
+
+def test_index_documentation_failures(monkeypatch):
+    """Test that an element whose embedding fails is skipped, while programming errors still surface."""
+    import ollama
+    import pytest
+
+    import docs_agent.add_element
+    from docs_agent.add_element import index_documentation
+    from docs_agent.helpers.elements import Element
+
+    class FailingPipeline:
+        def __init__(self, db):
+            pass
+
+        def index(self, element, pieces):
+            if element.name == "down":
+                raise ollama.ResponseError("model not found")
+            if element.name == "bug":
+                raise TypeError("unexpected")
+
+    monkeypatch.setattr(docs_agent.add_element, "IndexPipeline", FailingPipeline)
+    elements = [Element(name=name, version="1.0", content="Docs.", db=object()) for name in ["up", "down", "also_up"]]
+    assert [element.name for element in index_documentation(elements, db=None, silent=True)] == ["up", "also_up"]
+    with pytest.raises(TypeError):
+        list(index_documentation([Element(name="bug", version="1.0", content="Docs.", db=object())], db=None))
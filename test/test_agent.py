@@ -1,11 +1,38 @@
 import pytest
 import os
 import io
+import ollama
 from docs_agent.agent import Conversation, ask, chat
 
-if os.getenv("GITHUB_ACTIONS") == "true":
-    pytest.skip("Skipping tests that require Ollama server and model in CI environment", allow_module_level=True)
+requires_ollama = pytest.mark.skipif(os.getenv("GITHUB_ACTIONS") == "true", reason="Skipping tests that require Ollama server and model in CI environment")
 
+class FakeClient:
+    """Stands in for the Ollama client, replying with a fixed answer and recording what was sent."""
+
+    def __init__(self, reply="Fake answer.", models=None):
+        self.reply = reply
+        self.sent = []
+        self.models = models or {}
+        self.list_calls = 0
+
+    def list(self):
+        self.list_calls += 1
+        return {"models": [{"model": name, "digest": digest} for name, digest in self.models.items()]}
+
+    def chat(self, model, messages, stream=False, **kwargs):
+        self.sent.append(list(messages))
+        if stream:
+            words = [word + " " for word in self.reply.split(" ")]
+            words[-1] = words[-1].rstrip()
+            return (ollama.ChatResponse(message=ollama.Message(role="assistant", content=word)) for word in words)
+        # Token counts as the server reports them: words stand in for tokens
+        return ollama.ChatResponse(
+            message=ollama.Message(role="assistant", content=self.reply),
+            prompt_eval_count=sum(len(message["content"].split()) for message in messages),
+            eval_count=len(self.reply.split()),
+        )
+
+@requires_ollama
 class TestConversation:
     
     def test_conversation_initialization(self):
@@ -22,6 +49,18 @@ class TestConversation:
         assert conversation.messages[-1]["role"] == "user"
         assert conversation.messages[-1]["content"] == "Hello, agent!"
 
+    def test_add_user_message_with_context(self):
+        """Test that retrieved documentation is added to the conversation ahead of the user message."""
+        class FakeRetriever:
+            def retrieve(self, question, where=None):
+                return [{"id": "LibA#0", "document": "LibA is configured with LIBA_HOME.", "metadata": {"name": "LibA", "version": "1.0"}, "distance": 0.1}]
+
+        conversation = Conversation(retriever=FakeRetriever())
+        conversation.add_user_message("How do I configure LibA?")
+        assert conversation.messages[-2]["role"] == "system"
+        assert "LIBA_HOME" in conversation.messages[-2]["content"]
+        assert conversation.messages[-1]["content"] == "How do I configure LibA?"
+
     def test_get_response(self):
         """Test that get_response returns a response from the agent."""
         conversation = Conversation()
@@ -31,12 +70,14 @@ class TestConversation:
         assert len(response) > 0
         assert "Paris" in response
 
+@requires_ollama
 def test_ask():
     """Test the ask function with a simple prompt."""
     response = ask("What is 2 + 2?")
     assert isinstance(response, str)
     assert "4" in response
 
+@requires_ollama
 def test_chat():
     """Test the chat function by simulating a short conversation."""
     in_stream = io.StringIO("What is the capital of Germany?\nWhat about France?\n/done\n")
@@ -44,4 +85,317 @@ def test_chat():
     chat(in_stream=in_stream, out_stream=out_stream)
     output = out_stream.getvalue()
     assert "Berlin" in output
-    assert "Paris" in output
\ No newline at end of file
+    assert "Paris" in output
+
+class TestConversationWindow:
+
+    def test_token_counts_are_tracked(self):
+        """Test that the running token total matches the messages in the conversation."""
+        conversation = Conversation(client=FakeClient(), retrieve=False)
+        conversation.add_user_message("How do I install the library?")
+        conversation.get_response()
+        assert len(conversation.token_counts) == len(conversation.messages) == 3
+        assert conversation.total_tokens == sum(conversation.token_counts)
+
+    def test_old_turns_are_evicted(self):
+        """Test that the system prompt and latest turn are kept when the budget is exceeded."""
+        client = FakeClient(reply=" ".join(["word"] * 30))
+        conversation = Conversation(client=client, retrieve=False, max_tokens=120)
+        for i in range(5):
+            conversation.add_user_message(f"Question number {i}?")
+            list(conversation.stream_response())
+        assert conversation.total_tokens == sum(conversation.token_counts)
+
+        conversation.add_user_message("Final question?")
+        conversation.get_response()
+        sent = client.sent[-1]
+        assert sent[0]["role"] == "system"
+        assert sent[1]["role"] == "user"
+        assert sent[-1]["content"] == "Final question?"
+        assert len(sent) < 12
+        assert conversation.total_tokens - conversation.token_counts[-1] <= 120
+
+class TestAvailableModels:
+
+    def test_warm_cache_skips_listing(self, tmp_path):
+        """Test that a fresh model cache answers without listing models on the server."""
+        from docs_agent.agent import available_models
+        from docs_agent.helpers.model_cache import ModelCache
+
+        client = FakeClient(models={"llama2:latest": "abc123", "nomic-embed-text:latest": "def456"})
+        cache = ModelCache(directory=tmp_path.as_posix(), ttl=60)
+        assert "llama2:latest" in available_models(client, "http://ollama", required=["llama2"], cache=cache)
+        assert "llama2:latest" in available_models(client, "http://ollama", required=["llama2"], cache=cache)
+        assert client.list_calls == 1
+
+        # A model missing from the cache may have been pulled since; list again
+        available_models(client, "http://ollama", required=["mistral"], cache=cache)
+        assert client.list_calls == 2
+        available_models(client, "http://ollama", refresh=True, cache=cache)
+        assert client.list_calls == 3
+
+class TestAnswerCache:
+
+    def test_repeated_question_skips_model(self, tmp_path):
+        """Test that a repeated first question is answered, and streamed, from the answer cache."""
+        from docs_agent.helpers.answer_cache import AnswerCache
+
+        client = FakeClient(reply="Cached answer here.")
+        cache = AnswerCache(directory=tmp_path.as_posix())
+        for stream in (False, True, True):
+            conversation = Conversation(client=client, retrieve=False, answer_cache=cache)
+            conversation.add_user_message("What is LibA?")
+            response = "".join(conversation.stream_response()) if stream else conversation.get_response()
+            assert response == "Cached answer here."
+            assert conversation.messages[-1] == {"role": "assistant", "content": "Cached answer here."}
+        assert len(client.sent) == 1
+
+        # Follow-up questions depend on the conversation so far, and aren't cached
+        conversation.add_user_message("And LibB?")
+        conversation.get_response()
+        assert len(client.sent) == 2
+
+class TestAskBatch:
+
+    class SlowClient(FakeClient):
+        """Takes a while to answer, recording how many calls were in flight at once."""
+
+        def __init__(self, *args, **kwargs):
+            import threading
+            super().__init__(*args, **kwargs)
+            self.lock = threading.Lock()
+            self.active = 0
+            self.max_active = 0
+
+        def chat(self, model, messages, stream=False, **kwargs):
+            import time
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            try:
+                time.sleep(0.1)
+                if messages[-1]["content"] == "Fail":
+                    raise RuntimeError("Model failed")
+                return super().chat(model, messages, stream=stream, **kwargs)
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+    class NoRetriever:
+        def retrieve(self, question, where=None):
+            return []
+
+    def test_ask_batch(self, tmp_path):
+        """Test that batch prompts are answered concurrently and written as JSONL results."""
+        import json
+
+        from docs_agent.agent import ask_batch
+        from docs_agent.helpers.answer_cache import AnswerCache
+
+        client = self.SlowClient(reply="Batch answer.")
+        prompts = [json.dumps({"id": f"q{i}", "prompt": f"Question {i}?"}) for i in range(8)] + ['"Question 0?"', "", '{"prompt": "Fail"}', "not json", '{"id": "x"}', "[1]"]
+        out_stream = io.StringIO()
+        answered = ask_batch(
+            in_stream=io.StringIO("\n".join(prompts)), out_stream=out_stream, jobs=4, client=client,
+            retriever=self.NoRetriever(), answer_cache=AnswerCache(directory=tmp_path.as_posix()),
+        )
+        assert 1 < client.max_active <= 4
+        results = [json.loads(line) for line in out_stream.getvalue().splitlines()]
+        assert answered == 9
+        assert len(results) == 13
+        assert {result["id"] for result in results} == {f"q{i}" for i in range(8)} | {9, 11, 12, 13, 14}
+        failed = [result for result in results if "error" in result]
+        assert sorted(result.get("prompt", "") for result in failed) == ["", "", "", "Fail"]  # Unreadable lines have no prompt
+        ok = [result for result in results if "error" not in result]
+        assert all(result["response"] == "Batch answer." and result["latency_ms"] >= 0 for result in ok)
+        sent = {messages[-1]["content"]: messages for messages in client.sent}
+        for result in ok:
+            if result["cached"]:
+                assert (result["prompt_tokens"], result["response_tokens"]) == (0, 0)
+            else:
+                # The server's counts, not estimates
+                assert result["prompt_tokens"] == sum(len(message["content"].split()) for message in sent[result["prompt"]])
+                assert result["response_tokens"] == 2
+
+class FakeAsyncClient:
+    """Stands in for the Ollama async client, streaming a reply word by word and recording closed streams."""
+
+    def __init__(self, reply="Fake answer.", delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self.closed = 0
+
+    async def chat(self, model, messages, stream=False, **kwargs):
+        import asyncio
+        if not stream:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                await asyncio.sleep(self.delay)
+            finally:
+                self.active -= 1
+            return ollama.ChatResponse(message=ollama.Message(role="assistant", content=self.reply))
+
+        async def words():
+            try:
+                for word in self.reply.split(" "):
+                    await asyncio.sleep(self.delay)
+                    yield ollama.ChatResponse(message=ollama.Message(role="assistant", content=word + " "))
+            finally:
+                self.closed += 1
+        return words()
+
+class TestAsyncConversation:
+
+    def test_concurrent_sessions(self):
+        """Test that many async sessions share a client and run concurrently."""
+        import asyncio
+        import time
+
+        from docs_agent.agent import AsyncConversation
+
+        client = FakeAsyncClient(reply="Async answer.", delay=0.1)
+
+        async def session(i):
+            conversation = AsyncConversation(client=client, retrieve=False)
+            await conversation.add_user_message(f"Question {i}?")
+            return await conversation.get_response()
+
+        async def main():
+            return await asyncio.gather(*(session(i) for i in range(10)))
+
+        start = time.perf_counter()
+        assert asyncio.run(main()) == ["Async answer."] * 10
+        assert time.perf_counter() - start < 0.5
+        assert client.max_active == 10
+
+    def test_stream_response(self):
+        import asyncio
+
+        from docs_agent.agent import AsyncConversation
+
+        async def main():
+            conversation = AsyncConversation(client=FakeAsyncClient(reply="One two three"), retrieve=False)
+            await conversation.add_user_message("Count?")
+            chunks = [chunk async for chunk in conversation.stream_response()]
+            return conversation, chunks
+
+        conversation, chunks = asyncio.run(main())
+        assert chunks == ["One ", "two ", "three "]
+        assert conversation.messages[-1]["content"] == "One two three "
+        assert conversation.total_tokens == sum(conversation.token_counts)
+
+    def test_cancellation_and_timeout(self):
+        """Test that cancelled and timed-out streams are closed, aborting the generation."""
+        import asyncio
+
+        from docs_agent.agent import AsyncConversation
+
+        client = FakeAsyncClient(reply="A long answer that takes a while", delay=0.05)
+
+        async def consume(conversation, **kwargs):
+            await conversation.add_user_message("Tell me everything.")
+            async for _ in conversation.stream_response(**kwargs):
+                pass
+
+        async def main():
+            task = asyncio.create_task(consume(AsyncConversation(client=client, retrieve=False)))
+            await asyncio.sleep(0.12)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            with pytest.raises(TimeoutError):
+                await consume(AsyncConversation(client=client, retrieve=False), timeout=0.12)
+            with pytest.raises(TimeoutError):
+                conversation = AsyncConversation(client=client, retrieve=False, timeout=0.01)
+                await conversation.add_user_message("Quick?")
+                await conversation.get_response()
+
+        asyncio.run(main())
+        assert client.closed == 2
+
+    def test_create_checks_models_off_the_event_loop(self, monkeypatch):
+        """Test that a slow model check in `create` doesn't hold up other work on the event loop."""
+        import asyncio
+        import time
+
+        import docs_agent.agent
+        from docs_agent.agent import AsyncConversation
+        from docs_agent.config import get_settings
+
+        def slow_init_client():
+            time.sleep(0.3)  # Listing, or pulling, the models
+            return FakeClient(), get_settings()
+
+        client = FakeAsyncClient(reply="Async answer.")
+        monkeypatch.setattr(docs_agent.agent, "init_client", slow_init_client)
+        monkeypatch.setattr(docs_agent.agent, "async_client", lambda: client)
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        async def main():
+            ticker = asyncio.create_task(tick())
+            conversation = await AsyncConversation.create(retrieve=False)
+            ticker.cancel()
+            await conversation.add_user_message("Question?")
+            return conversation, await conversation.get_response()
+
+        conversation, response = asyncio.run(main())
+        assert response == "Async answer."
+        assert conversation.client is client
+        assert ticks >= 10
+
+class TestProfile:
+
+    def test_stream_profile(self):
+        """Test that a profiled streamed response records time to first token and tokens/sec."""
+        from docs_agent.helpers import profile
+        conversation = Conversation(client=FakeClient(reply="one two three"), retrieve=False)
+        conversation.add_user_message("Count.")
+        profiler = profile.enable("ask")
+        try:
+            assert "".join(conversation.stream_response()) == "one two three"
+        finally:
+            profile.disable()
+        [generate] = [span for span in profiler.spans if span.name == "generate"]
+        assert generate.attributes["stream"] is True
+        assert generate.attributes["ttft_ms"] >= 0
+        assert generate.attributes["tokens"] == 3
+        assert generate.attributes["tokens_per_s"] > 0
+
+class TestStreamingOverhead:
+
+    class PrebuiltClient:
+        """Streams a prebuilt list of chunks."""
+
+        def __init__(self, tokens):
+            self.chunks = [ollama.ChatResponse(message=ollama.Message(role="assistant", content="token ")) for _ in range(tokens)]
+
+        def chat(self, model, messages, stream=False, **kwargs):
+            return iter(self.chunks)
+
+    def test_reply_is_counted_once(self, monkeypatch):
+        """
+        Test that a streamed reply is joined and token-counted once, when streaming ends, rather than per chunk,
+        which would make long responses quadratic. The benchmarks' stream_long scenario measures the cost per token.
+        """
+        import docs_agent.agent
+
+        counted = []
+        count_tokens = docs_agent.agent.count_tokens
+        monkeypatch.setattr(docs_agent.agent, "count_tokens", lambda text: counted.append(text) or count_tokens(text))
+        conversation = Conversation(client=self.PrebuiltClient(10_000), retrieve=False, max_tokens=100_000)
+        conversation.add_user_message("Go on.")
+        counted.clear()
+
+        reply = "".join(conversation.stream_response())
+        assert reply == "token " * 10_000
+        assert counted == ["", reply]  # The empty placeholder, then the finished reply
+        assert conversation.messages[-1]["content"] == reply
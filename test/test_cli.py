@@ -0,0 +1,54 @@
+import subprocess
+import sys
+
+import pytest
+
+heavy_modules = ["chromadb", "ollama", "requests", "docs_agent.helpers.chromadb", "docs_agent.agent"]
+
+def import_times(tmp_path, *args):
+    """Run the CLI with `-X importtime`, returning {module: cumulative microseconds} for imports made after start-up."""
+    code = f"import sys; sys.argv = ['docs', *{list(args)!r}]; from docs_agent.__main__ import main; main()"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True)
+    lines = result.stderr.splitlines()
+    # Everything up to and including `site` is interpreter start-up
+    start = next((i + 1 for i, line in enumerate(lines) if line.endswith("| site")), 0)
+    times = {}
+    for line in lines[start:]:
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            times[name.rstrip()] = int(cumulative)
+    return times
+
+@pytest.mark.parametrize("args", [["--version"], ["config", "CHAT_MODEL"]])
+def test_startup_avoids_heavy_imports(tmp_path, args):
+    """
+    Tests that trivial commands don't import storage, model or HTTP clients.
+    """
+    imported = {name.strip() for name in import_times(tmp_path, *args)}
+    assert not imported & set(heavy_modules)
+
+def test_version_imports(tmp_path):
+    """
+    Tests that `docs --version` imports only the CLI, not configuration or anything heavier.
+    Checked by module rather than by time, which varies too much between machines.
+    """
+    imported = {name.strip() for name in import_times(tmp_path, "--version")}
+    assert "docs_agent.cli" in imported
+    assert not imported & {"docs_agent.config", *heavy_modules}
+
+@pytest.mark.parametrize("argv, expected", [(["models", "pull"], {"refresh": False, "pull": True}), (["models", "refresh"], {"refresh": True, "pull": False})])
+def test_models_command(monkeypatch, argv, expected):
+    """
+    Tests that `docs models pull` reaches the models command rather than `docs pull`.
+    """
+    from docopt import docopt
+
+    import docs_agent.models
+    import docs_agent.update
+    from docs_agent import cli
+
+    calls = []
+    monkeypatch.setattr(docs_agent.models, "main", lambda **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(docs_agent.update, "main", lambda **kwargs: pytest.fail("`docs pull` ran instead"))
+    cli.run(docopt(cli.__doc__, argv=argv))
+    assert calls == [expected]
@@ -0,0 +1,80 @@
+import io
+import socket
+import threading
+
+import pytest
+from test_agent import FakeClient
+
+from docs_agent import daemon
+
+
+@pytest.fixture
+def running_daemon(tmp_path):
+    path = (tmp_path / "agent.sock").as_posix()
+    server = daemon.DaemonServer(path, client=FakeClient(reply="Answer from the daemon."), retrieve=False)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path, server
+    server.shutdown()
+    server.server_close()
+
+def test_ask_via_daemon(running_daemon):
+    """Test that ask is answered by a running daemon, streamed or not."""
+    path, _ = running_daemon
+    out_stream = io.StringIO()
+    assert daemon.ask("What?", out_stream=out_stream, path=path) == "Answer from the daemon."
+    assert daemon.ask("What?", stream=True, out_stream=out_stream, path=path) == "Answer from the daemon."
+    assert out_stream.getvalue() == "Answer from the daemon.\n" * 2
+
+def test_chat_via_daemon(running_daemon):
+    """Test that a chat session keeps its history on the daemon and is cleaned up afterwards."""
+    path, server = running_daemon
+    in_stream = io.StringIO("First question\nSecond question\n/done\n")
+    out_stream = io.StringIO()
+    assert daemon.chat(in_stream=in_stream, out_stream=out_stream, path=path)
+    assert out_stream.getvalue().count("Answer from the daemon.") == 2
+    sent = server.client.sent[-1]
+    assert [message["content"] for message in sent if message["role"] == "user"] == ["First question", "Second question"]
+    assert server.sessions == {}
+
+def test_no_daemon(tmp_path):
+    """Test that callers are told to fall back when no daemon is running."""
+    path = (tmp_path / "agent.sock").as_posix()
+    assert daemon.ask("What?", path=path) is None
+    assert daemon.chat(in_stream=io.StringIO("/done\n"), path=path) is False
+
+@pytest.fixture
+def dying_daemon(tmp_path):
+    """A daemon that reads each request, sends the given reply lines, then hangs up."""
+    path = (tmp_path / "agent.sock").as_posix()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    replies = []
+
+    def serve():
+        while True:
+            try:
+                connection, _ = listener.accept()
+            except OSError:
+                return
+            with connection, connection.makefile("rwb") as stream:
+                stream.readline()
+                stream.write(b"".join(replies))
+                stream.flush()
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield path, replies
+    listener.close()
+
+def test_daemon_goes_away(dying_daemon):
+    """Test that callers fall back when the daemon goes away before replying, and get a partial answer after."""
+    path, replies = dying_daemon
+    assert daemon.ask("What?", path=path) is None
+    assert daemon.chat(in_stream=io.StringIO("First question\n/done\n"), out_stream=io.StringIO(), path=path) is False
+
+    replies.append(b'{"chunk": "Partial "}\n')
+    replies.append(b"not json\n")
+    out_stream = io.StringIO()
+    assert daemon.ask("What?", stream=True, out_stream=out_stream, path=path) == "Partial "
+    assert out_stream.getvalue() == "Partial \n"
@@ -29,4 +29,30 @@ def test_needs_update(with_persistence):
     assert not needs_update("update_test_tool", "0.0.1", db)
 
     # Test that it needs update when version is different
-    assert needs_update("update_test_tool", "0.0.2", db)
\ No newline at end of file
+    assert needs_update("update_test_tool", "0.0.2", db)
+
+def test_plan_updates(with_persistence):
+    """Test that plan_updates computes stale elements from a single metadata index."""
+    db, _, _ = with_persistence
+    db.save_elements([
+        Element(name="plan_tool_a", version="1.0", content="Docs for A.", db=db),
+        Element(name="plan_tool_b", version="2.0", content="Docs for B.", db=db),
+    ])
+
+    from docs_agent.update import plan_updates
+
+    index = db.get_metadata_index()
+    assert set(index) == {"plan_tool_a", "plan_tool_b"}
+    assert plan_updates(index) == []
+    assert sorted(plan_updates(index, force=True)) == [("plan_tool_a", "1.0"), ("plan_tool_b", "2.0")]
+    assert plan_updates(index, desired={"plan_tool_a": "1.1", "plan_tool_b": "2.0", "plan_tool_c": "0.1"}) == [("plan_tool_a", "1.1"), ("plan_tool_c", "0.1")]
+
+def test_dry_run(with_persistence):
+    """Test that a dry run reports the plan without saving anything."""
+    db, manifest, _ = with_persistence
+    element = Element(name="dry_run_tool", version="0.0.1", content="Documentation.", db=db)
+    element.save()
+
+    plan = update_elements(force=True, silent=True, db=db, manifest=manifest.as_posix(), dry_run=True)
+    assert plan == [("dry_run_tool", "0.0.1")]
+    assert db.get_metadata_index()["dry_run_tool"]["updated_at"] == element.updated_at
@@ -0,0 +1,67 @@
+import os
+
+from docs_agent.helpers.elements import Element
+from docs_agent.helpers.manifest import Manifest
+from docs_agent.watch import DependencyWatch
+
+
+def test_refresh_updates_changed_versions(with_persistence, tmp_path):
+    """Test that a refresh only re-indexes elements whose versions changed, recording detected bumps in the manifest."""
+    db, _, _ = with_persistence
+    db.save_elements([
+        Element(name="requests", version="2.31.0", content="Docs for requests.", db=db),
+        Element(name="rich", version="13.0", content="Docs for rich.", db=db),
+    ])
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests==2.31.0\nrich==13.0\n")
+    manifest = (tmp_path / ".docs" / "elements.yaml").as_posix()
+
+    watch = DependencyWatch(root=tmp_path.as_posix(), manifest=manifest, db=db, silent=True)
+    assert watch.refresh() == []
+    assert tmp_path.as_posix() in watch.directories()
+    assert watch.is_relevant(requirements.as_posix()) and watch.is_relevant(manifest)
+    assert not watch.is_relevant((tmp_path / "main.py").as_posix())
+
+    rich_updated_at = db.get_metadata_index()["rich"]["updated_at"]
+    requirements.write_text("requests==2.32.3\nrich==13.0\n# bumped\n")
+    assert watch.refresh() == [("requests", "2.32.3")]
+    index = db.get_metadata_index()
+    assert str(index["requests"]["version"]) == "2.32.3"
+    assert index["rich"]["updated_at"] == rich_updated_at
+    assert Manifest(manifest).get("requests")["version"] == "2.32.3"
+    assert os.path.exists(manifest)
+    assert watch.refresh() == []
+
+def test_first_refresh_catches_up(with_persistence, tmp_path):
+    """Test that a lockfile bumped while nothing was watching is recorded and indexed by the first refresh."""
+    db, _, _ = with_persistence
+    db.save_elements([Element(name="requests", version="2.31.0", content="Docs for requests.", db=db)])
+    manifest = (tmp_path / ".docs" / "elements.yaml").as_posix()
+    with Manifest(manifest) as manifest_file:
+        manifest_file.record("requests", "2.31.0")
+    (tmp_path / "requirements.txt").write_text("requests==2.32.3\n")
+
+    watch = DependencyWatch(root=tmp_path.as_posix(), manifest=manifest, db=db, silent=True)
+    assert watch.refresh() == [("requests", "2.32.3")]
+    assert Manifest(manifest).get("requests")["version"] == "2.32.3"
+    assert str(db.get_metadata_index()["requests"]["version"]) == "2.32.3"
+
+def test_failed_updates_are_retried(with_persistence, tmp_path, monkeypatch):
+    """Test that an element whose update failed is retried on the next refresh."""
+    import docs_agent.update
+
+    db, _, _ = with_persistence
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("requests==2.31.0\n")
+    manifest = (tmp_path / ".docs" / "elements.yaml").as_posix()
+    watch = DependencyWatch(root=tmp_path.as_posix(), manifest=manifest, db=db, silent=True)
+
+    fetch_documentation = docs_agent.update.fetch_documentation
+    monkeypatch.setattr(docs_agent.update, "fetch_documentation", lambda pairs, jobs=None: ({pair: OSError("offline") for pair in pairs}, set()))
+    assert watch.refresh() == [("requests", "2.31.0")]
+    assert "requests" not in db.get_metadata_index()
+
+    monkeypatch.setattr(docs_agent.update, "fetch_documentation", fetch_documentation)
+    assert watch.refresh() == [("requests", "2.31.0")]
+    assert str(db.get_metadata_index()["requests"]["version"]) == "2.31.0"
+    assert watch.refresh() == []